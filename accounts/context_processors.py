@@ -4,6 +4,45 @@ Context processors for the accounts app.
 
 from quizzes.models import Notification
 
+from .models import Profile
+
+
+def get_saved_quiz_ids(request, quiz_ids):
+    """
+    Return which of the given quiz ids the current user has saved.
+
+    Only the quizzes a page shows are looked up, with one small query for
+    the ids not already checked during this request.
+    """
+    if not hasattr(request, '_saved_quiz_ids'):
+        request._saved_quiz_ids = set()
+        request._checked_quiz_ids = set()
+    quiz_ids = set(quiz_ids)
+    unchecked = quiz_ids - request._checked_quiz_ids
+    if unchecked and request.user.is_authenticated:
+        request._saved_quiz_ids.update(
+            Profile.saved_quizzes.through.objects.filter(
+                profile__user_id=request.user.id, quiz_id__in=unchecked
+            ).values_list('quiz_id', flat=True)
+        )
+    request._checked_quiz_ids |= unchecked
+    return quiz_ids & request._saved_quiz_ids
+
+
+class SavedQuizIds:
+    """
+    Saved state of quizzes for templates: `quiz.id in saved_quiz_ids`.
+
+    Views listing quizzes pass their ids to get_saved_quiz_ids first so
+    they are checked together; any other id is checked on its own.
+    """
+
+    def __init__(self, request):
+        self.request = request
+
+    def __contains__(self, quiz_id):
+        return bool(get_saved_quiz_ids(self.request, [quiz_id]))
+
 
 def notifications(request):
     """Add unread notification count to all templates."""
@@ -13,3 +52,10 @@ def notifications(request):
         ).count()
         return {'unread_notifications_count': unread_count}
     return {'unread_notifications_count': 0}
+
+
+def saved_quizzes(request):
+    """Add the saved state of quizzes to all templates."""
+    return {
+        'saved_quiz_ids': SavedQuizIds(request),
+    }
@@ -2,11 +2,25 @@
 Tests for the accounts app.
 Tests cover models, views, and templates.
 """
-from django.test import TestCase, Client
+import asyncio
+import threading
+from unittest import mock
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.contrib.auth.models import User
 from .models import Profile
-from quizzes.models import Quiz, QuizAttempt, Notification
+from datetime import timedelta
+from django.utils import timezone
+from quizzes.archive import archive_attempts
+from quizzes.events import (
+    QUEUE_SIZE, Event, EventStreamASGIHandler, broker, event_stream)
+from quizzes.models import (
+    Quiz, Question, QuizAttempt, QuizVersion, ArchivedQuizAttempt,
+    Notification)
 
 
 class ProfileModelTest(TestCase):
@@ -115,6 +129,25 @@ class ProfileViewTest(TestCase):
         )
         self.assertEqual(len(response.context['saved_quizzes']), 0)
 
+    def test_profile_stats_include_archived_attempts(self):
+        """Test that archiving old attempts leaves profile stats unchanged."""
+        quiz = Quiz.objects.create(title='Stats Quiz')
+        for score in (2, 4):
+            QuizAttempt.objects.create(
+                user=self.user, quiz=quiz, score=score, total_questions=4)
+        url = reverse('accounts:profile_user', kwargs={'username': 'testuser'})
+        before = self.client.get(url).context
+        self.assertEqual(
+            (before['total_attempts'], before['avg_percentage']), (2, 75))
+
+        QuizAttempt.objects.filter(score=2).update(
+            started_at=timezone.now() - timedelta(days=400))
+        archive_attempts(timezone.now() - timedelta(days=365))
+        self.assertEqual(ArchivedQuizAttempt.objects.count(), 1)
+        after = self.client.get(url).context
+        self.assertEqual(
+            (after['total_attempts'], after['avg_percentage']), (2, 75))
+
     def test_profile_404_for_nonexistent_user(self):
         """Test that 404 is returned for nonexistent username."""
         response = self.client.get(
@@ -217,12 +250,14 @@ class SaveQuizViewTest(TestCase):
         )
         self.assertNotIn(self.quiz, self.user.profile.saved_quizzes.all())
 
+    @override_settings(BACKGROUND_TASKS_EAGER=True)
     def test_save_quiz_creates_notification(self):
         """Test that saving creates a notification for quiz creator."""
         self.client.login(username='testuser', password='testpass123')
-        self.client.get(
-            reverse('accounts:save_quiz', kwargs={'quiz_id': self.quiz.id})
-        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(
+                reverse('accounts:save_quiz', kwargs={'quiz_id': self.quiz.id})
+            )
         notification = Notification.objects.filter(
             recipient=self.quiz_creator,
             notification_type='quiz_saved'
@@ -264,6 +299,205 @@ class QuizHistoryViewTest(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(len(response.context['attempts']), 1)
 
+    def test_quiz_history_hides_archived_by_default(self):
+        """Test that archived attempts are only shown on request."""
+        self.client.login(username='testuser', password='testpass123')
+        QuizAttempt.objects.create(
+            quiz=self.quiz, user=self.user, score=8, total_questions=10)
+        archived = ArchivedQuizAttempt.objects.create(
+            id=999, quiz=self.quiz, user=self.user, score=2,
+            total_questions=10,
+            started_at=timezone.now() - timedelta(days=400)
+        )
+        response = self.client.get(reverse('accounts:quiz_history'))
+        self.assertEqual(len(response.context['attempts']), 1)
+
+        response = self.client.get(
+            reverse('accounts:quiz_history') + '?archived=1')
+        attempts = response.context['attempts']
+        self.assertEqual(len(attempts), 2)
+        self.assertEqual(attempts[-1], archived)
+
+    def test_attempt_detail_reads_archived_attempt(self):
+        """Test that archived attempts can still be reviewed."""
+        self.client.login(username='testuser', password='testpass123')
+        ArchivedQuizAttempt.objects.create(
+            id=999, quiz=self.quiz, user=self.user, score=2,
+            total_questions=10,
+            started_at=timezone.now() - timedelta(days=400)
+        )
+        response = self.client.get(
+            reverse('accounts:attempt_detail', kwargs={'attempt_id': 999}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['attempt'].score, 2)
+
+    def test_attempt_detail_decodes_compact_answers(self):
+        """Test that attempt detail shows answers from the answer string."""
+        self.client.login(username='testuser', password='testpass123')
+        questions = [
+            Question.objects.create(
+                quiz=self.quiz, text=f'Q{i}', option_a='A', option_b='B',
+                option_c='C', option_d='D', correct_answer='A', order=i
+            )
+            for i in range(1, 3)
+        ]
+        version = QuizVersion.objects.for_questions(
+            self.quiz, [q.id for q in questions])
+        attempt = QuizAttempt.objects.create(
+            quiz=self.quiz,
+            user=self.user,
+            score=1,
+            total_questions=2,
+            version=version,
+            answer_string='AC'
+        )
+        response = self.client.get(
+            reverse('accounts:attempt_detail',
+                    kwargs={'attempt_id': attempt.id})
+        )
+        results = response.context['results']
+        self.assertEqual(results[0]['user_answer'], 'A')
+        self.assertTrue(results[0]['is_correct'])
+        self.assertEqual(results[1]['user_answer'], 'C')
+        self.assertFalse(results[1]['is_correct'])
+
+
+class SaveQuizApiTest(TestCase):
+    """Test cases for the PUT/DELETE save quiz API."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.creator = User.objects.create_user(
+            username='creator',
+            email='creator@example.com',
+            password='testpass123'
+        )
+        self.quiz = Quiz.objects.create(title='Test Quiz', creator=self.creator)
+        self.url = reverse('accounts:save_quiz', kwargs={'quiz_id': self.quiz.id})
+        self.client.login(username='testuser', password='testpass123')
+
+    @override_settings(BACKGROUND_TASKS_EAGER=True)
+    def test_put_is_idempotent(self):
+        """Test that saving twice leaves one saved row and one notification."""
+        with self.captureOnCommitCallbacks(execute=True):
+            first = self.client.put(self.url)
+            second = self.client.put(self.url)
+        self.assertTrue(first.json()['saved'])
+        self.assertTrue(second.json()['saved'])
+        self.assertEqual(self.user.profile.saved_quizzes.count(), 1)
+        self.assertEqual(Notification.objects.filter(
+            recipient=self.creator, related_quiz=self.quiz).count(), 1)
+        self.assertEqual(Notification.objects.count(), 1)
+
+    def test_delete_is_idempotent(self):
+        """Test that unsaving an unsaved quiz succeeds and stays unsaved."""
+        self.user.profile.saved_quizzes.add(self.quiz)
+        self.client.delete(self.url)
+        response = self.client.delete(self.url)
+        self.assertFalse(response.json()['saved'])
+        self.assertFalse(self.user.profile.saved_quizzes.exists())
+
+    def test_put_requires_login(self):
+        """Test that anonymous API calls get a 401 instead of a redirect."""
+        self.client.logout()
+        response = self.client.put(self.url)
+        self.assertEqual(response.status_code, 401)
+
+    def test_notification_not_created_during_request(self):
+        """Test that the creator is notified only after the commit."""
+        self.client.put(self.url)
+        self.assertFalse(Notification.objects.exists())
+
+    def test_query_count_fixed_with_many_saved_quizzes(self):
+        """Test that save and unsave cost the same with 10,000 saved."""
+        quizzes = Quiz.objects.bulk_create(
+            Quiz(title=f'Quiz {i}', slug=f'quiz-{i}') for i in range(10000))
+        Profile.saved_quizzes.through.objects.bulk_create(
+            Profile.saved_quizzes.through(
+                profile_id=self.user.profile.pk, quiz_id=quiz.id)
+            for quiz in quizzes)
+        self.client.get(reverse('home'))
+
+        # Session, user, quiz, profile, saved row lookup, savepoint, insert,
+        # savepoint release
+        with self.assertNumQueries(8):
+            self.client.put(self.url)
+        # Session, user, quiz, delete
+        with self.assertNumQueries(4):
+            self.client.delete(self.url)
+
+
+class SavedQuizIdsTest(TestCase):
+    """Test cases for the saved state shown on quiz pages and cards."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.quiz = Quiz.objects.create(title='Test Quiz', creator=self.user)
+        self.user.profile.saved_quizzes.add(self.quiz)
+        self.client.login(username='testuser', password='testpass123')
+
+    def _count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        return response, len(queries)
+
+    def test_quiz_detail_queries_do_not_grow_with_saved_quizzes(self):
+        """Test that saved state costs the same however many are saved."""
+        url = reverse('quizzes:detail', kwargs={'slug': self.quiz.slug})
+        # The first visit warms the quiz's cached answer key
+        self.client.get(url)
+        response, before = self._count_queries(url)
+        self.assertContains(response, 'data-saved="true"')
+
+        self.user.profile.saved_quizzes.add(*[
+            Quiz.objects.create(title=f'Other {i}') for i in range(30)])
+        response, after = self._count_queries(url)
+        self.assertContains(response, 'data-saved="true"')
+        self.assertEqual(before, after)
+
+    def test_home_embeds_saved_quiz_ids(self):
+        """Test that the homepage carries the ids for marking cards."""
+        response = self.client.get(reverse('home'))
+        self.assertContains(response, 'id="saved-quiz-ids"')
+        self.assertEqual(
+            response.context['saved_quiz_ids_list'], [self.quiz.id])
+
+    def test_only_quizzes_on_the_page_are_looked_up(self):
+        """Test that saved ids are read for the shown quizzes only."""
+        for i in range(6):
+            Quiz.objects.create(title=f'Newer {i}')
+        self.user.profile.saved_quizzes.add(*[
+            Quiz.objects.create(title=f'Saved {i}') for i in range(2)])
+        response = self.client.get(reverse('home'))
+        shown = {quiz.pk for quiz in response.context['featured_quizzes']}
+        self.assertNotIn(self.quiz.pk, shown)
+        self.assertEqual(
+            set(response.context['saved_quiz_ids_list']),
+            shown & set(self.user.profile.saved_quizzes.values_list(
+                'pk', flat=True)))
+
+        response = self.client.get(reverse('accounts:profile'))
+        self.assertEqual(response.context['total_saved'], 3)
+
+    def test_my_quizzes_marks_saved_cards(self):
+        """Test that saved quizzes are marked on the my quizzes page."""
+        Quiz.objects.create(title='Unsaved Quiz', creator=self.user)
+        response = self.client.get(reverse('accounts:my_quizzes'))
+        self.assertContains(response, 'title="Saved"', count=1)
+
 
 class MyQuizzesViewTest(TestCase):
     """Test cases for my quizzes view."""
@@ -359,3 +593,111 @@ class NotificationsViewTest(TestCase):
             reverse('accounts:notifications_mark_all_read'))
         notification = Notification.objects.first()
         self.assertTrue(notification.is_read)
+
+
+class NotificationStreamTest(TestCase):
+    """Test cases for the live notification stream."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(
+            username='testuser', password='testpass123')
+        self.quiz = Quiz.objects.create(title='Stream Quiz')
+        self.first = Notification.objects.create(
+            recipient=self.user, message='First')
+        self.second = Notification.objects.create(
+            recipient=self.user, message='Second', related_quiz=self.quiz)
+
+    def test_stream_requires_login(self):
+        """Test that the stream redirects anonymous users to log in."""
+        response = self.client.get(reverse('accounts:notification_stream'))
+        self.assertEqual(response.status_code, 302)
+
+    @override_settings(NOTIFICATION_STREAM_TIMEOUT=0)
+    async def test_stream_replays_missed_notifications(self):
+        """Test that a reconnecting stream replays newer notifications."""
+        await sync_to_async(self.client.force_login)(self.user)
+        self.async_client.cookies = self.client.cookies
+        response = await self.async_client.get(
+            reverse('accounts:notification_stream'),
+            headers={'Last-Event-ID': str(self.first.pk)})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+
+        chunks = [
+            chunk.decode() async for chunk in response.streaming_content]
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(chunks[0], 'retry: 5000\n\n')
+        self.assertIn(f'id: {self.second.pk}', chunks[1])
+        self.assertIn('"message": "Second"', chunks[1])
+        self.assertIn(f'/quizzes/{self.quiz.slug}/', chunks[1])
+        self.assertEqual(
+            chunks[2],
+            f'event: unread\nid: {self.second.pk}\n'
+            'data: {"count": 2}\n\n')
+
+    async def test_stream_forwards_published_events(self):
+        """Test that saved notifications reach an open stream."""
+        stream = event_stream(self.user.pk, None, timeout=5)
+        self.assertEqual(await anext(stream), 'retry: 5000\n\n')
+        self.assertIn('"count": 2', await anext(stream))
+        self.assertEqual(broker.subscriber_count(), 1)
+
+        def notify():
+            with self.captureOnCommitCallbacks(execute=True):
+                return Notification.objects.create(
+                    recipient=self.user, message='Third')
+        third = await sync_to_async(notify)()
+        event = await anext(stream)
+        self.assertIn(f'id: {third.pk}', event)
+        self.assertIn('"message": "Third"', event)
+        self.assertIn('"count": 3', await anext(stream))
+
+        # Events can be published from any thread; old ones are skipped
+        publisher = threading.Thread(target=lambda: [
+            broker.publish(self.user.pk, Event(
+                'notification', {}, self.first.pk)),
+            broker.publish(self.user.pk, Event('unread', {'count': 0}, None)),
+        ])
+        publisher.start()
+        publisher.join()
+        self.assertIn('"count": 0', await anext(stream))
+
+        await stream.aclose()
+        self.assertEqual(broker.subscriber_count(), 0)
+
+    async def test_stream_closes_after_timeout_or_overflow(self):
+        """Test that streams end so the browser reconnects and catches up."""
+        stream = event_stream(self.user.pk, None, timeout=0)
+        self.assertEqual(len([chunk async for chunk in stream]), 2)
+
+        stream = event_stream(self.user.pk, None, timeout=5)
+        await anext(stream)
+        await anext(stream)
+        event = Event('unread', {'count': 2}, None)
+        for _ in range(QUEUE_SIZE + 1):
+            broker.publish(self.user.pk, event)
+        # Let the queued callbacks run
+        await asyncio.sleep(0)
+        with self.assertRaises(StopAsyncIteration):
+            await anext(stream)
+        self.assertEqual(broker.subscriber_count(), 0)
+
+    async def test_asgi_handler_serves_streams_without_own_thread(self):
+        """Test that only streams skip the per-request sync thread."""
+        handler = EventStreamASGIHandler()
+        with mock.patch.object(EventStreamASGIHandler, 'handle'), \
+                mock.patch('django.core.handlers.asgi.'
+                           'ThreadSensitiveContext') as context:
+            await handler({'type': 'http', 'path': reverse(
+                'accounts:notification_stream')}, None, None)
+            context.assert_not_called()
+            await handler({'type': 'http', 'path': '/'}, None, None)
+            context.assert_called_once()
+
+    def test_mark_all_read_publishes_unread_count(self):
+        """Test that marking all read updates open pages."""
+        self.client.force_login(self.user)
+        with mock.patch('accounts.views.publish_unread_count') as publish:
+            self.client.post(reverse('accounts:notifications_mark_all_read'))
+        publish.assert_called_once_with(self.user.pk)
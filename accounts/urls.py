@@ -13,6 +13,7 @@ urlpatterns = [
     path('history/', views.quiz_history, name='quiz_history'),
     path('history/<int:attempt_id>/', views.attempt_detail, name='attempt_detail'),
     path('notifications/', views.notifications_list, name='notifications'),
+    path('notifications/stream/', views.notification_stream, name='notification_stream'),
     path('notifications/mark-read/', views.notification_mark_read, name='notifications_mark_all_read'),
     path('notifications/<int:notification_id>/read/', views.notification_mark_read, name='notification_mark_read'),
 ]
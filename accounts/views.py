@@ -1,10 +1,20 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
+from django.contrib.auth.views import redirect_to_login
 from django.contrib.auth.models import User
 from django.contrib import messages
-from django.http import JsonResponse
-from django.db.models import Avg
-from quizzes.models import Quiz, QuizAttempt, Notification
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from django.db.models import Count, Sum
+from itertools import chain
+from quizzes.events import event_stream, publish_unread_count
+from quizzes.models import Quiz, QuizAttempt, ArchivedQuizAttempt, Notification
+from quizzes.tasks import notify_quiz_saved, run_in_background
+from .context_processors import get_saved_quiz_ids
+from .models import Profile
+
+# Newest notifications listed on the notifications page
+NOTIFICATIONS_SHOWN = 50
 
 
 def profile_view(request, username=None):
@@ -18,7 +28,9 @@ def profile_view(request, username=None):
         user = request.user
 
     profile = user.profile
-    created_quizzes = user.created_quizzes.all().order_by('-created_at')[:6]
+    created_quizzes = list(
+        user.created_quizzes.all().order_by('-created_at')[:6])
+    get_saved_quiz_ids(request, [quiz.pk for quiz in created_quizzes])
 
     # Check if viewing own profile
     is_own_profile = request.user.is_authenticated and request.user == user
@@ -27,22 +39,16 @@ def profile_view(request, username=None):
     saved_quizzes = profile.saved_quizzes.all().order_by(
         '-created_at')[:6] if is_own_profile else []
 
-    # Calculate quiz attempt stats
-    quiz_attempts = user.quiz_attempts.all()
-    total_attempts = quiz_attempts.count()
-
-    # Calculate average score percentage
-    if total_attempts > 0:
-        avg_score = quiz_attempts.aggregate(
-            avg=Avg('score')
-        )['avg'] or 0
-        avg_total = quiz_attempts.aggregate(
-            avg=Avg('total_questions')
-        )['avg'] or 1
-        avg_percentage = round(
-            (avg_score / avg_total) * 100) if avg_total > 0 else 0
-    else:
-        avg_percentage = 0
+    # Attempt stats include archived attempts so they never shrink
+    live = user.quiz_attempts.aggregate(
+        count=Count('id'), score=Sum('score'), total=Sum('total_questions'))
+    archived = ArchivedQuizAttempt.objects.filter(user=user).aggregate(
+        count=Count('id'), score=Sum('score'), total=Sum('total_questions'))
+    total_attempts = live['count'] + archived['count']
+    total_questions = (live['total'] or 0) + (archived['total'] or 0)
+    total_score = (live['score'] or 0) + (archived['score'] or 0)
+    avg_percentage = (
+        round(total_score / total_questions * 100) if total_questions else 0)
 
     context = {
         'profile_user': user,
@@ -51,7 +57,8 @@ def profile_view(request, username=None):
         'saved_quizzes': saved_quizzes,
         'is_own_profile': is_own_profile,
         'total_created': user.created_quizzes.count(),
-        'total_saved': profile.saved_quizzes.count() if is_own_profile else 0,
+        'total_saved': (
+            profile.saved_quizzes.count() if is_own_profile else 0),
         'total_attempts': total_attempts,
         'avg_percentage': avg_percentage,
     }
@@ -89,36 +96,54 @@ def profile_edit(request):
     return render(request, 'account/profile_edit.html', context)
 
 
-@login_required
 def save_quiz(request, quiz_id):
-    """Save/unsave a quiz to user's profile."""
-    quiz = get_object_or_404(Quiz, id=quiz_id)
-    profile = request.user.profile
+    """
+    Save or unsave a quiz on the user's profile.
+
+    PUT saves and DELETE unsaves; both are idempotent. Other methods toggle
+    the current state. Each is a single insert or delete on the saved
+    quizzes table, so the cost does not depend on how many are saved.
+    """
+    is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+    if not request.user.is_authenticated:
+        if is_ajax or request.method in ('PUT', 'DELETE'):
+            return JsonResponse({'success': False}, status=401)
+        return redirect_to_login(request.get_full_path())
+
+    quiz = get_object_or_404(
+        Quiz.objects.only('id', 'title', 'creator_id'), id=quiz_id)
+    saved = Profile.saved_quizzes.through.objects.filter(
+        profile__user_id=request.user.id, quiz_id=quiz.id)
+
+    if request.method == 'DELETE':
+        saved.delete()
+        is_saved = False
+    elif request.method == 'PUT':
+        is_saved = True
+    else:
+        # Toggle: deleting nothing means the quiz was not saved yet
+        is_saved = not saved.delete()[0]
 
-    is_saved = quiz in profile.saved_quizzes.all()
+    created = False
+    if is_saved:
+        # get_or_create relies on the table's unique constraint, so
+        # concurrent saves cannot insert the quiz twice
+        _, created = Profile.saved_quizzes.through.objects.get_or_create(
+            profile_id=request.user.profile.pk, quiz_id=quiz.id)
 
     if is_saved:
-        profile.saved_quizzes.remove(quiz)
-        message = f'"{quiz.title}" removed from saved quizzes.'
-        is_saved = False
-    else:
-        profile.saved_quizzes.add(quiz)
         message = f'"{quiz.title}" saved to your profile!'
-        is_saved = True
+    else:
+        message = f'"{quiz.title}" removed from saved quizzes.'
 
-        # Notify quiz creator (if not self)
-        if quiz.creator and quiz.creator != request.user:
-            Notification.objects.create(
-                recipient=quiz.creator,
-                notification_type=Notification.NotificationType.QUIZ_SAVED,
-                message=f'{
-                    request.user.username} saved your quiz "{
-                    quiz.title}"',
-                related_quiz=quiz,
-            )
+    # Notify quiz creator (if not self) once the response is on its way
+    if created and quiz.creator_id and quiz.creator_id != request.user.id:
+        run_in_background(
+            notify_quiz_saved, quiz.id, quiz.creator_id,
+            request.user.username, quiz.title)
 
     # Return JSON for AJAX requests
-    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+    if is_ajax or request.method in ('PUT', 'DELETE'):
         return JsonResponse({
             'success': True,
             'saved': is_saved,
@@ -140,8 +165,18 @@ def quiz_history(request):
     attempts = QuizAttempt.objects.filter(
         user=request.user).select_related('quiz')
 
+    # Archived attempts live in cold storage and are only read on request.
+    # Everything archived is older than every live attempt, so appending
+    # keeps the newest-first order.
+    show_archived = request.GET.get('archived') == '1'
+    if show_archived:
+        archived = ArchivedQuizAttempt.objects.filter(
+            user=request.user).select_related('quiz')
+        attempts = list(chain(attempts, archived))
+
     context = {
         'attempts': attempts,
+        'show_archived': show_archived,
     }
     return render(request, 'account/quiz_history.html', context)
 
@@ -149,13 +184,19 @@ def quiz_history(request):
 @login_required
 def attempt_detail(request, attempt_id):
     """Display detailed view of a quiz attempt."""
-    attempt = get_object_or_404(QuizAttempt, id=attempt_id, user=request.user)
-    questions = attempt.quiz.questions.all()
+    attempt = QuizAttempt.objects.select_related('quiz', 'version').filter(
+        id=attempt_id, user=request.user).first()
+    if attempt is None:
+        attempt = get_object_or_404(
+            ArchivedQuizAttempt.objects.select_related('quiz', 'version'),
+            id=attempt_id, user=request.user)
+    questions = attempt.quiz.questions.rendered()
+    answers = attempt.get_answers()
 
     # Build results with user's answers
     results = []
     for question in questions:
-        user_answer = attempt.answers.get(str(question.id), '')
+        user_answer = answers.get(question.id, '')
         is_correct = user_answer == question.correct_answer
         results.append({
             'question': question,
@@ -181,7 +222,8 @@ def notifications_list(request):
     unread_count = notifications.filter(is_read=False).count()
 
     context = {
-        'notifications': notifications,
+        'notifications': notifications.select_related(
+            'related_quiz')[:NOTIFICATIONS_SHOWN],
         'unread_count': unread_count,
     }
     return render(request, 'account/notifications.html', context)
@@ -205,6 +247,8 @@ def notification_mark_read(request, notification_id=None):
         Notification.objects.filter(
             recipient=request.user, is_read=False
         ).update(is_read=True)
+        # update() sends no signals, so open pages are told here
+        publish_unread_count(request.user.pk)
         messages.success(request, 'All notifications marked as read.')
 
     # Return JSON for AJAX requests
@@ -214,10 +258,30 @@ def notification_mark_read(request, notification_id=None):
     return redirect('accounts:notifications')
 
 
+@login_required
+async def notification_stream(request):
+    """Stream new notifications and unread counts as server-sent events."""
+    user = await request.auser()
+    try:
+        last_event_id = int(request.headers['Last-Event-ID'])
+    except (KeyError, ValueError):
+        last_event_id = None
+    response = StreamingHttpResponse(
+        event_stream(
+            user.pk, last_event_id, settings.NOTIFICATION_STREAM_TIMEOUT),
+        content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stops nginx-style proxies from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 @login_required
 def my_quizzes(request):
     """Display all quizzes created by the current user."""
-    quizzes = request.user.created_quizzes.all().order_by('-created_at')
+    quizzes = list(request.user.created_quizzes.all().order_by('-created_at'))
+    # Marks the saved ones with one query
+    get_saved_quiz_ids(request, [quiz.pk for quiz in quizzes])
 
     context = {
         'quizzes': quizzes,
@@ -232,7 +296,9 @@ def my_quizzes(request):
 @login_required
 def saved_quizzes(request):
     """Display all quizzes saved by the current user."""
-    quizzes = request.user.profile.saved_quizzes.all().order_by('-created_at')
+    quizzes = list(request.user.profile.saved_quizzes.all().order_by('-created_at'))
+    # Marks the saved ones with one query
+    get_saved_quiz_ids(request, [quiz.pk for quiz in quizzes])
 
     context = {
         'quizzes': quizzes,
@@ -0,0 +1,6 @@
+"""
+Standalone performance benchmarks.
+
+Run a benchmark from the project root, e.g.:
+    python -m benchmarks.question_render
+"""
@@ -0,0 +1,98 @@
+"""
+Benchmark adaptive question selection on a large synthetic item bank.
+
+Builds an item bank of --questions questions with random 2PL parameters
+and runs --sessions simulated learners of random true ability through it,
+timing each step the adaptive endpoint does per answer: updating the
+ability posterior, estimating the ability and selecting the next question.
+Also reports how far the final estimates are from the true abilities.
+
+Needs no database: the bank is built in memory, as get_item_bank would
+leave it in its cache.
+
+Usage:
+    python -m benchmarks.adaptive [--questions N] [--sessions N]
+"""
+
+import argparse
+import os
+import random
+import time
+
+import django
+import numpy as np
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'code_mastery.settings')
+os.environ.setdefault('SECRET_KEY', 'benchmark')
+os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+django.setup()
+
+from scipy.special import expit  # noqa: E402
+
+from quizzes.adaptive import (  # noqa: E402
+    D, LOG_PRIOR, MAX_QUESTIONS, ItemBank, estimate, select_next, update)
+
+
+def build_bank(questions, rng):
+    """Return an ItemBank with plausible random parameters."""
+    return ItemBank(
+        question_ids=np.arange(1, questions + 1, dtype=np.int64),
+        letters=['A'] * questions,
+        a=rng.lognormal(0, 0.3, questions).clip(0.3, 2.5),
+        b=rng.normal(0, 1.2, questions).clip(-3.5, 3.5),
+    )
+
+
+def run_session(bank, true_theta, rng, picker):
+    """Simulate one learner and return (step timings, final estimate)."""
+    log_posterior = LOG_PRIOR
+    answered = []
+    timings = []
+    theta = 0.0
+    for _ in range(MAX_QUESTIONS):
+        start = time.perf_counter()
+        index = select_next(bank, theta, answered, rng=picker)
+        if index is None:
+            break
+        elapsed = time.perf_counter() - start
+
+        a, b = bank.a[index], bank.b[index]
+        correct = rng.random() < expit(D * a * (true_theta - b))
+
+        start = time.perf_counter()
+        log_posterior = update(log_posterior, a, b, correct)
+        theta, _ = estimate(log_posterior)
+        timings.append(elapsed + time.perf_counter() - start)
+        answered.append(int(bank.question_ids[index]))
+    return timings, theta
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--questions', type=int, default=10000)
+    parser.add_argument('--sessions', type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    picker = random.Random(42)
+    bank = build_bank(args.questions, rng)
+    print(f'Item bank of {args.questions} questions, '
+          f'{args.sessions} sessions of up to {MAX_QUESTIONS} answers')
+
+    timings, errors = [], []
+    for _ in range(args.sessions):
+        true_theta = rng.normal()
+        session_timings, theta = run_session(bank, true_theta, rng, picker)
+        timings += session_timings
+        errors.append(theta - true_theta)
+
+    timings = np.array(timings) * 1000
+    p50, p95, p99 = np.percentile(timings, [50, 95, 99])
+    print(f'Per answer: p50 {p50:.3f} ms, p95 {p95:.3f} ms, '
+          f'p99 {p99:.3f} ms, max {timings.max():.3f} ms')
+    print(f'Ability RMSE after {MAX_QUESTIONS} answers: '
+          f'{np.sqrt(np.mean(np.square(errors))):.3f}')
+
+
+if __name__ == '__main__':
+    main()
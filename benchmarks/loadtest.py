@@ -0,0 +1,375 @@
+"""
+Load test realistic user journeys against a local server.
+
+Starts the mock LLM and a gunicorn (or uvicorn) server on a seeded database,
+then runs --users concurrent simulated users for --duration seconds. Each
+logs in once and repeats the journey: land on home, generate a quiz, open
+it, load its questions, submit answers, then check their profile and
+notifications, pausing for a random think time between steps.
+
+Reports throughput, error rate and latency percentiles and histograms per
+endpoint. The server runs with SERVER_TIMING on, so each response says how
+long Django worked on it; the rest of the client's latency is queueing and
+transfer, and the work summed over all requests divided by the server's
+capacity (workers x threads) gives worker saturation.
+
+The database is the SQLite file benchmarks.views uses, unless DATABASE_URL
+points elsewhere; SQLite serialises writes, so use PostgreSQL for numbers
+that matter. Pass --url to test a server that is already running instead
+(it must share the seeded database and use the mock LLM).
+
+Usage:
+    python -m benchmarks.loadtest [--users N] [--duration S] [--workers N]
+                                  [--threads N] [--asgi] [--output FILE]
+"""
+
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+
+import requests
+
+# Imported first: sets the benchmark database and calls django.setup()
+from benchmarks.views import PREFIX, seed
+from benchmarks.mock_llm import start_mock_llm
+
+from django.contrib.auth.models import User
+
+ENDPOINTS = (
+    'login', 'home', 'generate', 'quiz_detail', 'quiz_data', 'quiz_grade',
+    'profile', 'notifications')
+# Upper bounds (ms) of the latency histogram buckets; the last is open
+BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+TOPICS = (
+    'Python loops', 'JavaScript arrays', 'SQL joins', 'CSS grid',
+    'Django querysets', 'Git branching', 'Python decorators',
+    'JavaScript promises', 'PostgreSQL indexes', 'Docker images')
+TIMEOUT = 30
+
+
+class Stats:
+    """Thread-safe per-endpoint request log."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.app_times = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.journeys = 0
+
+    def record(self, endpoint, latency, response=None, ok=True):
+        app_time = None
+        if response is not None:
+            app_time = server_time(response, 'app')
+        with self.lock:
+            self.latencies[endpoint].append(latency)
+            if app_time is not None:
+                self.app_times[endpoint].append(app_time)
+            if not ok:
+                self.errors[endpoint] += 1
+
+
+def server_time(response, metric):
+    """Return a duration (ms) from the Server-Timing header, or None."""
+    for part in response.headers.get('Server-Timing', '').split(','):
+        name, _, params = part.strip().partition(';')
+        if name == metric and params.startswith('dur='):
+            return float(params[4:])
+    return None
+
+
+def percentile(values, fraction):
+    """Return the value at fraction of the way through sorted values."""
+    return values[max(int(len(values) * fraction) - 1, 0)]
+
+
+class SimulatedUser(threading.Thread):
+    """One user logging in and repeating the journey until the deadline."""
+
+    def __init__(self, base_url, username, password, stats, deadline,
+                 think_time, seed):
+        super().__init__(daemon=True)
+        self.base_url = base_url.rstrip('/')
+        self.username = username
+        self.password = password
+        self.stats = stats
+        self.deadline = deadline
+        self.think_time = think_time
+        self.random = random.Random(seed)
+        self.session = requests.Session()
+
+    def request(self, endpoint, method, path, expect=200, **kwargs):
+        """Send one request and record it; return the response or None."""
+        kwargs.setdefault('allow_redirects', False)
+        start = time.perf_counter()
+        try:
+            response = self.session.request(
+                method, self.base_url + path, timeout=TIMEOUT, **kwargs)
+        except requests.RequestException:
+            self.stats.record(
+                endpoint, (time.perf_counter() - start) * 1000, ok=False)
+            return None
+        latency = (time.perf_counter() - start) * 1000
+        ok = response.status_code == expect
+        self.stats.record(endpoint, latency, response, ok)
+        return response if ok else None
+
+    def csrf_headers(self):
+        return {'X-CSRFToken': self.session.cookies.get('csrftoken', '')}
+
+    def think(self):
+        if self.think_time:
+            time.sleep(self.random.expovariate(1 / self.think_time))
+
+    def login(self):
+        # /csrf/ sets the cookie the login form needs
+        self.session.get(self.base_url + '/csrf/', timeout=TIMEOUT)
+        response = self.request(
+            'login', 'post', '/accounts/login/', expect=302,
+            data={'login': self.username, 'password': self.password},
+            headers=self.csrf_headers())
+        # Logging in rotates the CSRF token
+        self.session.get(self.base_url + '/csrf/', timeout=TIMEOUT)
+        return response is not None
+
+    def journey(self):
+        """Run one journey; stop at the first failed step."""
+        if not self.request('home', 'get', '/'):
+            return False
+        self.think()
+        response = self.request(
+            'generate', 'post', '/quizzes/generate/', expect=302,
+            data={'topic': self.random.choice(TOPICS)},
+            headers=self.csrf_headers())
+        # A failed generation redirects back home
+        if not response or response.headers['Location'] in ('/', ''):
+            return False
+        quiz_url = response.headers['Location']
+        if not self.request('quiz_detail', 'get', quiz_url):
+            return False
+        response = self.request('quiz_data', 'get', quiz_url + 'data/')
+        if not response:
+            return False
+        document = response.json()
+        self.think()
+        answers = ''.join(
+            self.random.choice('ABCD') for _ in document['questions'])
+        if not self.request(
+                'quiz_grade', 'post', quiz_url + 'grade/',
+                json={'revision': document['revision'], 'answers': answers},
+                headers={**self.csrf_headers(),
+                         'X-Requested-With': 'XMLHttpRequest'}):
+            return False
+        self.think()
+        if not self.request('profile', 'get', '/accounts/profile/'):
+            return False
+        return bool(self.request(
+            'notifications', 'get', '/accounts/notifications/'))
+
+    def run(self):
+        if not self.login():
+            return
+        while time.monotonic() < self.deadline:
+            if self.journey():
+                with self.stats.lock:
+                    self.stats.journeys += 1
+            self.think()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(args, llm_url):
+    """Start gunicorn or uvicorn with the mock LLM and Server-Timing on."""
+    port = free_port()
+    env = {
+        **os.environ,
+        'SERVER_TIMING': 'True',
+        'QUIZ_GENERATOR_API_URL': llm_url,
+        'GITHUB_TOKEN': os.environ.get('GITHUB_TOKEN', 'mock'),
+    }
+    if args.asgi:
+        command = [
+            sys.executable, '-m', 'uvicorn', 'code_mastery.asgi:application',
+            '--host', '127.0.0.1', '--port', str(port),
+            '--workers', str(args.workers), '--log-level', 'warning']
+    else:
+        command = [
+            sys.executable, '-m', 'gunicorn', 'code_mastery.wsgi',
+            '--bind', f'127.0.0.1:{port}', '--workers', str(args.workers),
+            '--threads', str(args.threads), '--timeout', str(TIMEOUT * 2)]
+    server = subprocess.Popen(command, env=env)
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            sys.exit(f'{command[2]} exited with status {server.returncode}')
+        try:
+            requests.get(base_url + '/csrf/', timeout=1)
+            return server, base_url
+        except requests.ConnectionError:
+            time.sleep(0.2)
+    server.terminate()
+    sys.exit('The server did not start within 30 s')
+
+
+def summarize(stats, elapsed, capacity):
+    """Return the run's results as a JSON-serialisable dict."""
+    endpoints = {}
+    total_requests = total_errors = 0
+    busy = 0.0
+    for endpoint in ENDPOINTS:
+        latencies = sorted(stats.latencies.get(endpoint, []))
+        if not latencies:
+            continue
+        app_times = stats.app_times.get(endpoint, [])
+        errors = stats.errors.get(endpoint, 0)
+        total_requests += len(latencies)
+        total_errors += errors
+        busy += sum(app_times)
+        histogram = [0] * (len(BUCKETS) + 1)
+        for latency in latencies:
+            histogram[sum(latency > bound for bound in BUCKETS)] += 1
+        mean_app = sum(app_times) / len(app_times) if app_times else None
+        mean_latency = sum(latencies) / len(latencies)
+        endpoints[endpoint] = {
+            'requests': len(latencies),
+            'errors': errors,
+            'error_rate': round(errors / len(latencies), 4),
+            'rps': round(len(latencies) / elapsed, 2),
+            'p50_ms': round(percentile(latencies, 0.5), 1),
+            'p95_ms': round(percentile(latencies, 0.95), 1),
+            'p99_ms': round(percentile(latencies, 0.99), 1),
+            'mean_app_ms': round(mean_app, 1) if mean_app is not None
+            else None,
+            'mean_queue_ms': round(mean_latency - mean_app, 1)
+            if mean_app is not None else None,
+            'histogram': histogram,
+        }
+    return {
+        'duration_s': round(elapsed, 1),
+        'journeys': stats.journeys,
+        'journeys_per_s': round(stats.journeys / elapsed, 2),
+        'requests': total_requests,
+        'rps': round(total_requests / elapsed, 2),
+        'error_rate': round(total_errors / total_requests, 4)
+        if total_requests else 0,
+        'capacity': capacity,
+        'saturation': round(busy / (elapsed * 1000 * capacity), 3)
+        if capacity else None,
+        'endpoints': endpoints,
+    }
+
+
+def report(results):
+    print(f'\n{results["journeys"]} journeys ({results["journeys_per_s"]}/s),'
+          f' {results["requests"]} requests ({results["rps"]}/s) in '
+          f'{results["duration_s"]} s, error rate '
+          f'{results["error_rate"]:.2%}')
+    if results['saturation'] is not None:
+        print(f'Worker saturation {results["saturation"]:.0%} of '
+              f'{results["capacity"]} worker threads')
+    print(f'\n{"endpoint":<15}{"reqs":>7}{"err":>6}{"rps":>8}{"p50":>8}'
+          f'{"p95":>8}{"p99":>8}{"app":>8}{"queue":>8}  (ms)')
+    for endpoint, row in results['endpoints'].items():
+        app = row['mean_app_ms']
+        queue = row['mean_queue_ms']
+        print(f'{endpoint:<15}{row["requests"]:>7}{row["errors"]:>6}'
+              f'{row["rps"]:>8.1f}{row["p50_ms"]:>8.0f}{row["p95_ms"]:>8.0f}'
+              f'{row["p99_ms"]:>8.0f}'
+              f'{"-" if app is None else f"{app:.0f}":>8}'
+              f'{"-" if queue is None else f"{queue:.0f}":>8}')
+
+    labels = [f'<={bound}' for bound in BUCKETS] + [f'>{BUCKETS[-1]}']
+    print(f'\nLatency histogram (ms)\n{"endpoint":<15}'
+          + ''.join(f'{label:>8}' for label in labels))
+    for endpoint, row in results['endpoints'].items():
+        print(f'{endpoint:<15}'
+              + ''.join(f'{count:>8}' for count in row['histogram']))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--duration', type=float, default=60,
+                        help='Seconds to run after every user has started.')
+    parser.add_argument('--ramp-up', type=float, default=5,
+                        help='Seconds over which users start.')
+    parser.add_argument('--think-time', type=float, default=1,
+                        help='Mean pause in seconds between steps.')
+    parser.add_argument('--llm-latency', type=float, default=800,
+                        help='Mean mock LLM response time in milliseconds.')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--asgi', action='store_true',
+                        help='Serve with uvicorn instead of gunicorn.')
+    parser.add_argument('--url', help='Test an already running server.')
+    parser.add_argument('--capacity', type=int,
+                        help='Worker threads of the --url server, for '
+                             'saturation.')
+    parser.add_argument('--scale', type=float, default=0.01,
+                        help='Dataset scale if the database is empty.')
+    parser.add_argument('--password', default='password')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Save the results as JSON.')
+    args = parser.parse_args()
+
+    server = llm = None
+    if args.url:
+        base_url = args.url
+        capacity = args.capacity
+    else:
+        seed(args.scale)
+        llm = start_mock_llm(latency=args.llm_latency / 1000)
+        server, base_url = start_server(
+            args, f'http://127.0.0.1:{llm.server_port}/')
+        # Uvicorn runs sync views on one thread per worker
+        capacity = args.workers * (1 if args.asgi else args.threads)
+
+    users = list(User.objects.filter(
+        username__startswith=f'{PREFIX}_').order_by('pk').values_list(
+            'username', flat=True)[:args.users])
+
+    stats = Stats()
+    print(f'{len(users)} users against {base_url} for {args.duration:g} s')
+    try:
+        started = time.monotonic()
+        deadline = started + args.ramp_up + args.duration
+        threads = []
+        for i, username in enumerate(users):
+            thread = SimulatedUser(
+                base_url, username, args.password, stats, deadline,
+                args.think_time, args.seed + i)
+            thread.start()
+            threads.append(thread)
+            time.sleep(args.ramp_up / len(users))
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+        if llm is not None:
+            llm.shutdown()
+
+    results = summarize(stats, elapsed, capacity)
+    report(results)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f'Saved results to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+Mock of the chat completions API used by QuizGeneratorService.
+
+Answers every POST with a quiz in the JSON shape the real model is asked
+for, after a configurable delay that stands in for model latency, so load
+tests exercise quiz generation without a token or network access. Point the
+app at it with QUIZ_GENERATOR_API_URL=http://127.0.0.1:PORT/ and any
+GITHUB_TOKEN.
+
+Usage:
+    python -m benchmarks.mock_llm [--port N] [--latency MS]
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TOPIC_RE = re.compile(r'quiz about: (.*)')
+COUNT_RE = re.compile(r'Create exactly (\d+)')
+
+
+def build_quiz(topic, count, rng):
+    """Return a quiz on topic with count code-flavoured questions."""
+    questions = []
+    for i in range(1, count + 1):
+        n = rng.randint(2, 9)
+        correct = rng.choice('ABCD')
+        options = [str(n * i + offset) for offset in (0, 1, 2, 3)]
+        index = 'ABCD'.index(correct)
+        options[0], options[index] = options[index], options[0]
+        questions.append({
+            'text': f'What is the output?[codeblock]x = {n}\n'
+                    f'print(x * {i})[/codeblock]',
+            'option_a': options[0],
+            'option_b': options[1],
+            'option_c': options[2],
+            'option_d': options[3],
+            'correct_answer': correct,
+            'explanation': f'[code]x * {i}[/code] is {n * i}.',
+        })
+    return {
+        'title': f'{topic.strip()[:80]} Quiz',
+        'description': f'Generated questions about {topic.strip()[:80]}.',
+        'questions': questions,
+    }
+
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    """Reply to chat completion requests with a generated quiz."""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(
+            int(self.headers.get('Content-Length', 0))) or b'{}')
+        prompt = ' '.join(
+            message.get('content', '') for message in body.get('messages', [])
+            if message.get('role') == 'user')
+        topic = TOPIC_RE.search(prompt)
+        count = COUNT_RE.search(prompt)
+        quiz = build_quiz(
+            topic.group(1) if topic else 'Programming',
+            int(count.group(1)) if count else 5,
+            random.Random(prompt))
+
+        # Jitter of +-25% around the configured latency
+        time.sleep(self.server.latency * random.uniform(0.75, 1.25))
+        payload = json.dumps({
+            'choices': [{'message': {
+                'role': 'assistant', 'content': json.dumps(quiz)}}],
+        }).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_mock_llm(port=0, latency=0.8):
+    """
+    Serve the mock API from a daemon thread.
+
+    Args:
+        port: Port to listen on; 0 picks a free one
+        latency: Seconds each response is delayed by, on average
+
+    Returns:
+        The running server; its URL is http://127.0.0.1:<server_port>/
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', port), MockLLMHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--latency', type=float, default=800,
+                        help='Mean response delay in milliseconds.')
+    args = parser.parse_args()
+
+    server = start_mock_llm(args.port, args.latency / 1000)
+    print(f'Mock LLM listening on http://127.0.0.1:{server.server_port}/')
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
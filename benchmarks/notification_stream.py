@@ -0,0 +1,153 @@
+"""
+Load test the live notification stream with many idle connections.
+
+Starts a single uvicorn worker on the seeded database, logs in --users
+seeded users and opens --connections event streams spread across them,
+then reports the threads and memory the server process needs to hold
+them. Each round one of the users marks their notifications read, which
+publishes their unread count to all of their open streams, and the time
+until every stream has received it is recorded.
+
+Connections are plain sockets on one asyncio loop, so the client does not
+need a thread per stream either. Raise the open file limit (ulimit -n)
+for more than about a thousand connections.
+
+Usage:
+    python -m benchmarks.notification_stream [--connections N] [--users N]
+                                             [--rounds N]
+"""
+
+import argparse
+import asyncio
+import resource
+import statistics
+import time
+from types import SimpleNamespace
+from urllib.parse import urlsplit
+
+# Imported first: sets the benchmark database and calls django.setup()
+from benchmarks.views import PREFIX, seed
+from benchmarks.loadtest import SimulatedUser, Stats, start_server
+
+from django.contrib.auth.models import User
+from django.urls import reverse
+
+STREAM_PATH = reverse('accounts:notification_stream')
+MARK_READ_PATH = reverse('accounts:notifications_mark_all_read')
+
+
+def process_status(pid):
+    """Return the (threads, resident MB) of a process, from /proc."""
+    fields = {}
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            key, _, value = line.partition(':')
+            fields[key] = value.split()
+    return int(fields['Threads'][0]), int(fields['VmRSS'][0]) / 1024
+
+
+class Stream:
+    """One open event stream and the times it received unread events."""
+
+    def __init__(self, user):
+        self.user = user
+        self.received = []
+        self.opened = asyncio.Event()
+
+    async def run(self, host, port, cookie):
+        reader, writer = await asyncio.open_connection(host, port)
+        writer.write(
+            f'GET {STREAM_PATH} HTTP/1.1\r\nHost: {host}\r\n'
+            f'Cookie: sessionid={cookie}\r\n'
+            'Accept: text/event-stream\r\n\r\n'.encode())
+        await writer.drain()
+        try:
+            while True:
+                chunk = await reader.readuntil(b'\n\n')
+                if b'event: unread' in chunk:
+                    self.received.append(time.perf_counter())
+                    self.opened.set()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+async def run(args, base_url, server_pid, users):
+    url = urlsplit(base_url)
+    streams = [Stream(users[i % len(users)]) for i in range(args.connections)]
+    tasks = []
+    start = time.perf_counter()
+    for stream in streams:
+        tasks.append(asyncio.create_task(stream.run(
+            url.hostname, url.port,
+            stream.user.session.cookies['sessionid'])))
+    await asyncio.wait_for(
+        asyncio.gather(*(stream.opened.wait() for stream in streams)),
+        timeout=60)
+    print(f'Opened {len(streams)} streams in '
+          f'{time.perf_counter() - start:.1f} s')
+    threads, rss = process_status(server_pid)
+    print(f'Server process: {threads} threads, {rss:.0f} MB resident')
+
+    latencies = []
+    for round_number in range(args.rounds):
+        user = users[round_number % len(users)]
+        mine = [stream for stream in streams if stream.user is user]
+        before = [len(stream.received) for stream in mine]
+        sent = time.perf_counter()
+        await asyncio.to_thread(
+            user.session.post, base_url + MARK_READ_PATH,
+            headers={**user.csrf_headers(),
+                     'X-Requested-With': 'XMLHttpRequest'})
+        while any(len(stream.received) == count
+                  for stream, count in zip(mine, before)):
+            await asyncio.sleep(0.001)
+        latencies.append(
+            (max(stream.received[-1] for stream in mine) - sent) * 1000)
+
+    print(f'Delivery to all of a user\'s streams over {args.rounds} rounds: '
+          f'median {statistics.median(latencies):.1f} ms, '
+          f'max {max(latencies):.1f} ms')
+    threads, rss = process_status(server_pid)
+    print(f'Server process: {threads} threads, {rss:.0f} MB resident')
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--connections', type=int, default=1000)
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--scale', type=float, default=0.01,
+                        help='Dataset scale if the database is empty.')
+    parser.add_argument('--password', default='password')
+    args = parser.parse_args()
+
+    # Each stream is a socket on both ends; the server inherits the limit
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+    seed(args.scale)
+    server, base_url = start_server(
+        SimpleNamespace(asgi=True, workers=1), 'http://127.0.0.1:9/')
+    try:
+        users = []
+        for username in User.objects.filter(
+                username__startswith=f'{PREFIX}_').order_by(
+                    'pk').values_list('username', flat=True)[:args.users]:
+            user = SimulatedUser(
+                base_url, username, args.password, Stats(), 0, 0, 0)
+            if not user.login():
+                raise SystemExit(f'Could not log in as {username}')
+            users.append(user)
+        asyncio.run(run(args, base_url, server.pid, users))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == '__main__':
+    main()
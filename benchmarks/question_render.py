@@ -0,0 +1,91 @@
+"""
+Benchmark rendering a 50-question quiz full of code blocks.
+
+Compares running the render_code filter on every field at read time with
+outputting the HTML stored on each question at write time. No database is
+needed; the quiz and questions are built in memory.
+
+Usage:
+    python -m benchmarks.question_render
+"""
+
+import os
+import timeit
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'code_mastery.settings')
+os.environ.setdefault('SECRET_KEY', 'benchmark')
+os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+django.setup()
+
+from django.template import Context, Template  # noqa: E402
+
+from quizzes.models import Quiz, Question  # noqa: E402
+from quizzes.rendering import RENDERED_FIELDS, render_question  # noqa: E402
+from quizzes.templatetags.quiz_filters import _render  # noqa: E402
+
+QUESTIONS = 50
+REPEAT = 20
+
+CODE_TEXT = (
+    'What does this code print?\\n'
+    '[codeblock]def greet(name):\n'
+    '    return `Hello, ${name}` if name else "<nobody>"\n\n'
+    'for i in range(3):\n'
+    '    print(greet(str(i)))[/codeblock]?\n'
+    'Hint: look at ```python\nprint(1 < 2)\n``` and [code]i % 2[/code].'
+)
+
+ON_READ = Template(
+    '{% load quiz_filters %}{% for q in questions %}'
+    + ''.join(f'{{{{ q.{field}|render_code }}}}' for field in RENDERED_FIELDS)
+    + '{% endfor %}'
+)
+STORED = Template(
+    '{% for q in questions %}'
+    + ''.join(f'{{{{ q.{field}_html|safe }}}}' for field in RENDERED_FIELDS)
+    + '{% endfor %}'
+)
+
+
+def build_quiz():
+    """Return an unsaved quiz and its questions."""
+    quiz = Quiz(pk=1, title='Python Benchmark Quiz')
+    return [
+        Question(
+            pk=i, quiz=quiz, order=i, text=f'{i}. {CODE_TEXT}',
+            option_a=f'[code]print({i})[/code]',
+            option_b='[code]return `x`[/code]',
+            option_c='It raises [code]TypeError[/code]',
+            option_d='Nothing, the loop never runs',
+            explanation=f'{CODE_TEXT} ({i})', correct_answer='A',
+        )
+        for i in range(1, QUESTIONS + 1)
+    ]
+
+
+def main():
+    questions = build_quiz()
+    context = Context({'questions': questions})
+
+    def on_read():
+        _render.cache_clear()
+        ON_READ.render(context)
+
+    read = min(timeit.repeat(on_read, number=1, repeat=REPEAT))
+    write = min(timeit.repeat(
+        lambda: [render_question(q) for q in questions],
+        number=1, repeat=REPEAT))
+    stored = min(timeit.repeat(
+        lambda: STORED.render(context), number=1, repeat=REPEAT))
+
+    print(f'{QUESTIONS} questions, best of {REPEAT} runs')
+    print(f'render_code on every read:   {read * 1000:8.2f} ms')
+    print(f'stored HTML per read:        {stored * 1000:8.2f} ms '
+          f'({read / stored:.1f}x)')
+    print(f'render and highlight on save: {write * 1000:7.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
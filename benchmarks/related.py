@@ -0,0 +1,106 @@
+"""
+Benchmark the related quizzes batch job on a large synthetic attempt log.
+
+Generates --attempts logged-in attempts (one million by default) by users
+who mostly stay within one topic, with quiz popularity following a Zipf
+law, then times the three stages of compute_related_quizzes: loading the
+attempt pairs, computing similarities and storing the top K per quiz.
+
+Runs on an in-memory SQLite database unless DATABASE_URL points elsewhere.
+
+Usage:
+    python -m benchmarks.related [--attempts N] [--users N] [--quizzes N]
+"""
+
+import argparse
+import os
+import time
+
+import django
+import numpy as np
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'code_mastery.settings')
+os.environ.setdefault('SECRET_KEY', 'benchmark')
+os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import connection, transaction  # noqa: E402
+
+from quizzes.models import Quiz, QuizAttempt, RelatedQuiz  # noqa: E402
+from quizzes.recommendations import (  # noqa: E402
+    compute_related_quizzes, load_attempt_pairs, related_quizzes)
+
+BATCH_SIZE = 5000
+TOPICS = 50
+# Share of a user's attempts taken outside their favourite topic
+STRAY = 0.2
+
+
+def build_attempts(attempts, users, quizzes):
+    """Insert the synthetic users, quizzes and attempts."""
+    rng = np.random.default_rng(42)
+    with transaction.atomic():
+        user_ids = [user.pk for user in User.objects.bulk_create(
+            User(username=f'bench{i}') for i in range(users))]
+        quiz_ids = [quiz.pk for quiz in Quiz.objects.bulk_create(
+            Quiz(title=f'Quiz {i}', slug=f'bench-{i}')
+            for i in range(quizzes))]
+    user_ids = np.array(user_ids)
+    quiz_ids = np.array(quiz_ids)
+
+    # Quizzes are dealt round-robin into topics; within a topic the first
+    # quizzes are the most popular
+    per_topic = quizzes // TOPICS
+    popularity = 1 / np.arange(1, per_topic + 1)
+    popularity /= popularity.sum()
+    attempt_users = rng.integers(0, users, attempts)
+    topics = attempt_users % TOPICS
+    strays = rng.random(attempts) < STRAY
+    topics[strays] = rng.integers(0, TOPICS, strays.sum())
+    positions = rng.choice(per_topic, size=attempts, p=popularity)
+    attempt_quizzes = positions * TOPICS + topics
+
+    for start in range(0, attempts, BATCH_SIZE):
+        stop = min(start + BATCH_SIZE, attempts)
+        QuizAttempt.objects.bulk_create(
+            QuizAttempt(quiz_id=quiz_id, user_id=user_id, score=1,
+                        total_questions=1)
+            for user_id, quiz_id in zip(
+                user_ids[attempt_users[start:stop]].tolist(),
+                quiz_ids[attempt_quizzes[start:stop]].tolist()))
+        print(f'  {stop} attempts inserted', end='\r')
+    print()
+
+
+def timed(label, func, *args, **kwargs):
+    """Run func, print how long it took and return its result."""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    print(f'{label:<28}{time.perf_counter() - start:>8.2f} s')
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--attempts', type=int, default=1_000_000)
+    parser.add_argument('--users', type=int, default=100_000)
+    parser.add_argument('--quizzes', type=int, default=10_000)
+    args = parser.parse_args()
+
+    call_command('migrate', verbosity=0)
+    timed('Built attempt log', build_attempts,
+          args.attempts, args.users, args.quizzes)
+
+    print(f'{connection.vendor}, {args.attempts} attempts by {args.users} '
+          f'users on {args.quizzes} quizzes')
+    pairs = timed('Load attempt pairs', load_attempt_pairs)
+    links = timed('Compute similarities', related_quizzes, *pairs)
+    print(f'  {len(links[0])} links, mean score {links[3].mean():.3f}')
+    timed('Full job incl. storing', compute_related_quizzes)
+    print(f'  {RelatedQuiz.objects.count()} rows stored')
+
+
+if __name__ == '__main__':
+    main()
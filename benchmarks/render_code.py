@@ -0,0 +1,204 @@
+"""
+Benchmark the render_code filter against its original multi-pass version.
+
+The original implementation is kept here as the reference for the golden
+output corpus used by the quizzes tests.
+
+Usage:
+    python -m benchmarks.render_code
+    python -m benchmarks.render_code --write-golden
+"""
+
+import json
+import os
+import random
+import re
+import sys
+import timeit
+from pathlib import Path
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'code_mastery.settings')
+os.environ.setdefault('SECRET_KEY', 'benchmark')
+os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+django.setup()
+
+from django.utils.html import escape  # noqa: E402
+from django.utils.safestring import mark_safe  # noqa: E402
+
+from quizzes.templatetags.quiz_filters import _render, render_code  # noqa: E402
+
+GOLDEN_PATH = (
+    Path(__file__).resolve().parent.parent
+    / 'quizzes' / 'testdata' / 'render_code_golden.json'
+)
+REPEAT = 20
+
+# Hand-written cases covering each rule and the awkward overlaps
+EDGE_CASES = [
+    '',
+    'Plain text with no markup',
+    'Escape <b>tags</b> & "quotes" and \'apostrophes\'',
+    'Line one\nLine two\\nLine three',
+    'What does [code]len(x)[/code] return?',
+    'Which is correct?[code]a = 1[/code] ?',
+    'Choose one [codeblock]x = 1\ny = 2[/codeblock] :',
+    '[codeblock]for i in range(3):\n    print(i)[/codeblock]',
+    '```python\nprint("hi")\n```',
+    '```\nno language\n```',
+    '```js```',
+    '```py print(1)```',
+    'Template `${name}` literal',
+    '[code]`backtick`[/code] and `outside`',
+    '[codeblock]`a`\n`b`[/codeblock]',
+    'Unclosed [code]tag',
+    'Stray [/code] closer',
+    '[code]one[/code] and [code]two[/code]',
+    '[code][code]nested[/code][/code]',
+    '[codeblock]```inner```[/codeblock]',
+    '```[codeblock]crossing```[/codeblock]',
+    '[codeblock]crossing```python\nx[/codeblock]\n```',
+    '[code]```x```[/code]',
+    '````',
+    '`````',
+    '``````',
+    '```a\n```b\n```c\n```',
+    '[codeblock]a[/codeblock]\n\n[codeblock]b[/codeblock]',
+    'Ends with [/codeblock]?\n',
+    '[code]x[/code]; trailing',
+    'Unicode ```é\nü```',
+]
+
+# Fragments used to build the randomized corpus
+ATOMS = [
+    '```', '```python\n', '```js', '`', '``', '[code]', '[/code]',
+    '[codeblock]', '[/codeblock]', '\n', '\\n', 'x', 'a b', '<', '&', "'",
+    '?', ':', ';', ' ', 'py', '[', ']', '[/code', 'code]', '\t',
+]
+
+
+def legacy_render_code(text):
+    """The original render_code filter, unchanged."""
+    if not text:
+        return text
+
+    text = escape(text)
+    text = text.replace('\\n', '\n')
+    text = re.sub(r'\[/code\]\s*[?;:]\s*$', '[/code]', text)
+    text = re.sub(r'\[/codeblock\]\s*[?;:]\s*$', '[/codeblock]', text)
+    text = re.sub(
+        r'```(?:\w+)?\n?(.*?)```',
+        r'<pre><code class="code-block">\1</code></pre>',
+        text,
+        flags=re.DOTALL
+    )
+
+    def protect_backticks_codeblock(match):
+        content = match.group(1).replace('`', '&#96;')
+        return f'<pre><code class="code-block">{content}</code></pre>'
+
+    text = re.sub(
+        r'\[codeblock\](.*?)\[/codeblock\]',
+        protect_backticks_codeblock,
+        text,
+        flags=re.DOTALL
+    )
+
+    def protect_backticks_code(match):
+        content = match.group(1).replace('`', '&#96;')
+        return f'<code class="code-inline">{content}</code>'
+
+    text = re.sub(
+        r'\[code\](.*?)\[/code\]',
+        protect_backticks_code,
+        text,
+        flags=re.DOTALL
+    )
+    text = text.replace('`', '&#96;')
+
+    parts = re.split(r'(<pre>.*?</pre>)', text, flags=re.DOTALL)
+    result = []
+    for part in parts:
+        if part.startswith('<pre>'):
+            result.append(part)
+        else:
+            result.append(part.replace('\n', '<br>'))
+    return mark_safe(''.join(result))
+
+
+def long_ai_text(blocks=40):
+    """Return a long question explanation in the style the AI produces."""
+    paragraph = (
+        'The function [code]reduce(fn, items)[/code] folds the list from '
+        'the left, so the accumulator `acc` starts at the first item.\\n'
+    )
+    example = (
+        '[codeblock]const total = items.reduce((acc, x) => {\n'
+        '    return acc + x;  // `${acc}` & <x>\n'
+        '}, 0);[/codeblock]\n'
+        '```python\nfrom functools import reduce\n'
+        'print(reduce(lambda a, b: a + b, [1, 2, 3]))\n```\n'
+    )
+    return (paragraph + example) * blocks
+
+
+def golden_corpus(size=400, seed=2024):
+    """Return the edge cases followed by seeded random inputs."""
+    rng = random.Random(seed)
+    corpus = list(EDGE_CASES)
+    corpus.append(long_ai_text(3))
+    for _ in range(size):
+        corpus.append(''.join(
+            rng.choice(ATOMS) for _ in range(rng.randint(1, 16))))
+    return corpus
+
+
+def write_golden():
+    """Record legacy outputs for the golden corpus."""
+    cases = [
+        {'input': text, 'output': str(legacy_render_code(text))}
+        for text in golden_corpus()
+    ]
+    GOLDEN_PATH.parent.mkdir(exist_ok=True)
+    GOLDEN_PATH.write_text(
+        json.dumps(cases, indent=1, ensure_ascii=False) + '\n',
+        encoding='utf-8')
+    print(f'Wrote {len(cases)} cases to {GOLDEN_PATH}')
+
+
+def _time(func, number):
+    """Return the best per-call time of func in seconds."""
+    return min(timeit.repeat(func, number=number, repeat=REPEAT)) / number
+
+
+def main():
+    print(f'best of {REPEAT} runs, microseconds per call')
+    print(f'{"input":>24} {"legacy":>10} {"single-pass":>12} {"memoized":>10}')
+    inputs = [
+        ('short option', 'Use [code]len(items)[/code] instead'),
+        ('AI explanation', long_ai_text(1)),
+        ('long AI explanation', long_ai_text()),
+    ]
+    for label, text in inputs:
+        assert render_code(text) == legacy_render_code(text)
+
+        def uncached():
+            _render.cache_clear()
+            render_code(text)
+
+        legacy = _time(lambda: legacy_render_code(text), 10)
+        tokenizer = _time(uncached, 10)
+        memo = _time(lambda: render_code(text), 1000)
+        print(
+            f'{label:>24} {legacy * 1e6:10.1f} '
+            f'{tokenizer * 1e6:8.1f} ({legacy / tokenizer:.1f}x) '
+            f'{memo * 1e6:10.2f}'
+        )
+
+
+if __name__ == '__main__':
+    if '--write-golden' in sys.argv:
+        write_golden()
+    else:
+        main()
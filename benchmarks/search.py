@@ -0,0 +1,149 @@
+"""
+Benchmark full-text search latency over a large synthetic catalogue.
+
+Builds quizzes with --questions-per-quiz questions each straight into the
+search documents (the question table itself is not needed to query), then
+times search_hits for a mix of rare, common and multi-word queries. The
+default size is one million questions.
+
+Runs on an in-memory SQLite database unless DATABASE_URL points elsewhere,
+e.g. a scratch PostgreSQL database to measure the GIN index:
+
+    DATABASE_URL=postgres://... python -m benchmarks.search --quizzes 100000
+
+Usage:
+    python -m benchmarks.search [--quizzes N] [--questions-per-quiz N]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import time
+from itertools import accumulate
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'code_mastery.settings')
+os.environ.setdefault('SECRET_KEY', 'benchmark')
+os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+django.setup()
+
+from django.core.management import call_command  # noqa: E402
+from django.db import connection, transaction  # noqa: E402
+
+from quizzes.models import Quiz, QuizSearchDocument  # noqa: E402
+from quizzes.search import document_body, search_hits  # noqa: E402
+
+BATCH_SIZE = 2000
+REPEAT = 20
+
+TOPICS = [
+    'python', 'javascript', 'django', 'sql', 'css', 'html', 'react',
+    'postgresql', 'docker', 'git', 'rust', 'typescript', 'linux', 'regex',
+]
+WORDS = (
+    'list dictionary closure decorator generator iterator promise async '
+    'await callback query index join transaction migration selector grid '
+    'flexbox component hook state container image branch commit merge '
+    'rebase pointer borrow lifetime module package import exception error '
+    'loop function class method object array string integer boolean null '
+    'variable scope recursion algorithm sort search tree graph hash queue '
+    'stack heap cache thread process socket request response header cookie'
+).split()
+VOCABULARY_SIZE = 5000
+SYLLABLES = 'ba ce di fo gu ka le mi no pu ra se ti vo zu'.split()
+QUERIES = [
+    'decorator', 'python generator', 'sql join index', 'flexbox grid',
+    'rebase', 'closure scope', 'docker container image', 'lifetim',
+    'exception', 'hash', 'async await promise', 'zzzz nothing matches',
+]
+
+
+def build_vocabulary(rng):
+    """
+    Return words and cumulative Zipf weights for synthetic question text.
+
+    Programming terms are spread among filler words from rank 50 down, so
+    like real text a few words are very common and most are rare.
+    """
+    filler = {
+        ''.join(rng.choices(SYLLABLES, k=rng.randint(2, 4)))
+        for _ in range(VOCABULARY_SIZE * 2)
+    }
+    vocabulary = sorted(filler - set(WORDS))[:VOCABULARY_SIZE]
+    rng.shuffle(vocabulary)
+    step = (VOCABULARY_SIZE - 50) // len(WORDS)
+    for i, word in enumerate(WORDS):
+        vocabulary.insert(50 + i * step, word)
+    # Cumulative weights spare rng.choices summing them on every call
+    cum_weights = list(accumulate(
+        1 / rank for rank in range(1, len(vocabulary) + 1)))
+    return vocabulary, cum_weights
+
+
+def build_catalogue(quizzes, questions_per_quiz):
+    """Insert the synthetic quizzes and their search documents."""
+    rng = random.Random(42)
+    vocabulary, cum_weights = build_vocabulary(rng)
+    created = 0
+    while created < quizzes:
+        size = min(BATCH_SIZE, quizzes - created)
+        with transaction.atomic():
+            batch = Quiz.objects.bulk_create(
+                Quiz(
+                    title=f'{rng.choice(TOPICS).title()} '
+                          f'{rng.choice(WORDS)} quiz {created + i}',
+                    slug=f'bench-{created + i}',
+                )
+                for i in range(size)
+            )
+            QuizSearchDocument.objects.bulk_create(
+                QuizSearchDocument(
+                    quiz_id=quiz.pk,
+                    title=quiz.title,
+                    body=document_body('', [
+                        ' '.join(rng.choices(
+                            vocabulary, cum_weights=cum_weights, k=12)) + '?'
+                        for _ in range(questions_per_quiz)
+                    ]),
+                )
+                for quiz in batch
+            )
+        created += size
+        print(f'  {created * questions_per_quiz} questions indexed', end='\r')
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--quizzes', type=int, default=100_000)
+    parser.add_argument('--questions-per-quiz', type=int, default=10)
+    args = parser.parse_args()
+
+    call_command('migrate', verbosity=0)
+    started = time.perf_counter()
+    build_catalogue(args.quizzes, args.questions_per_quiz)
+    print(f'Built catalogue in {time.perf_counter() - started:.1f} s')
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE quizzes_quizsearchdocument')
+
+    total = args.quizzes * args.questions_per_quiz
+    print(f'{connection.vendor}, {total} questions in {args.quizzes} quizzes,'
+          f' {REPEAT} runs per query')
+    print(f'{"query":<26}{"hits":>6}{"p50 ms":>10}{"p95 ms":>10}')
+    for query in QUERIES:
+        timings = []
+        for _ in range(REPEAT):
+            start = time.perf_counter()
+            hits = search_hits(query)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        print(f'{query:<26}{len(hits):>6}'
+              f'{statistics.median(timings):>10.2f}{p95:>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
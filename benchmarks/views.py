@@ -0,0 +1,287 @@
+"""
+Benchmark the hot views in-process with the test client on a seeded database.
+
+Seeds a dataset with the seed_data command (skipped if the database already
+holds one), logs in as the most active seeded user and requests each view
+--requests times. Reports p50/p95 latency, SQL queries and peak memory
+allocated per request. Queries and memory are measured in separate passes
+so that their bookkeeping does not inflate the timings, and background
+tasks started by a request are awaited outside the timed section.
+
+Runs on a SQLite file in the temp directory, kept between runs so every
+run measures the same data, unless DATABASE_URL points elsewhere. Pass
+--fresh to rebuild it, e.g. after changing --scale.
+
+Results can be saved with --output and compared with an earlier run with
+--compare; metrics worse than the baseline by more than --threshold are
+flagged and the exit status is 1.
+
+Usage:
+    python -m benchmarks.views [--scale N] [--requests N] [--views NAME ...]
+                               [--output FILE] [--compare FILE]
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+from io import StringIO
+
+import django
+
+DEFAULT_DATABASE = os.path.join(
+    tempfile.gettempdir(), 'code_mastery_benchmark.sqlite3')
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'code_mastery.settings')
+os.environ.setdefault('SECRET_KEY', 'benchmark')
+os.environ.setdefault('DATABASE_URL', f'sqlite:///{DEFAULT_DATABASE}')
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.core.cache import cache  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.db.models import Count  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import (  # noqa: E402
+    CaptureQueriesContext, setup_test_environment)
+from django.urls import reverse  # noqa: E402
+
+from quizzes import tasks  # noqa: E402
+from quizzes.models import Quiz, QuizAttempt  # noqa: E402
+
+PREFIX = 'bench'
+WARMUP = 3
+# Requests measured for queries and memory, after the timed ones; even,
+# so that toggling views such as save_quiz count both directions equally
+TRACED = 6
+METRICS = ('p50_ms', 'p95_ms', 'queries', 'memory_kib')
+VIEWS = (
+    'home', 'quiz_detail', 'quiz_submit', 'profile_view', 'quiz_history',
+    'notifications_list', 'save_quiz')
+
+
+class TrackingExecutor(ThreadPoolExecutor):
+    """Thread pool that remembers its pending tasks so they can be awaited."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pending = []
+
+    def submit(self, *args, **kwargs):
+        future = super().submit(*args, **kwargs)
+        self.pending.append(future)
+        return future
+
+    def drain(self):
+        wait(self.pending)
+        self.pending.clear()
+
+
+def seed(scale):
+    """Seed the database unless it already holds a benchmark dataset."""
+    call_command('migrate', verbosity=0)
+    if Quiz.objects.filter(slug__startswith=f'{PREFIX}-quiz-').exists():
+        print('Using the existing benchmark dataset')
+        return
+    print(f'Seeding at scale {scale}...')
+    started = time.perf_counter()
+    call_command('seed_data', scale=scale, prefix=PREFIX, stdout=StringIO())
+    print(f'Seeded in {time.perf_counter() - started:.1f} s')
+
+
+def build_requests():
+    """
+    Return {view name: (client method, path, kwargs)} for the hot views.
+
+    Views run as the seeded user with the most attempts, on the quiz with
+    the most attempts.
+    """
+    user_id = QuizAttempt.objects.filter(
+        user__username__startswith=f'{PREFIX}_').values('user').annotate(
+            total=Count('id')).order_by('-total')[0]['user']
+    quiz = Quiz.objects.get(pk=QuizAttempt.objects.filter(
+        quiz__slug__startswith=f'{PREFIX}-quiz-').values('quiz').annotate(
+            total=Count('id')).order_by('-total')[0]['quiz'])
+    answers = {
+        f'question_{question_id}': answer
+        for question_id, answer in quiz.questions.values_list(
+            'id', 'correct_answer')
+    }
+    return user_id, {
+        'home': ('get', reverse('home'), {}),
+        'quiz_detail': (
+            'get', reverse('quizzes:detail', args=[quiz.slug]), {}),
+        'quiz_submit': (
+            'post', reverse('quizzes:submit', args=[quiz.slug]),
+            {'data': answers}),
+        'profile_view': ('get', reverse('accounts:profile'), {}),
+        'quiz_history': ('get', reverse('accounts:quiz_history'), {}),
+        'notifications_list': (
+            'get', reverse('accounts:notifications'), {}),
+        # Toggles, so runs alternate between saving and unsaving
+        'save_quiz': (
+            'post', reverse('accounts:save_quiz', args=[quiz.pk]),
+            {'headers': {'X-Requested-With': 'XMLHttpRequest'}}),
+    }
+
+
+def measure(client, method, path, kwargs, requests):
+    """Request one view repeatedly and return its metrics."""
+    executor = tasks._executor
+
+    def fetch():
+        response = getattr(client, method)(path, **kwargs)
+        if response.status_code != 200:
+            raise RuntimeError(
+                f'{method.upper()} {path} returned {response.status_code}')
+        return response
+
+    for _ in range(WARMUP):
+        fetch()
+        executor.drain()
+
+    timings = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        fetch()
+        timings.append((time.perf_counter() - start) * 1000)
+        executor.drain()
+
+    queries = []
+    for _ in range(TRACED):
+        with CaptureQueriesContext(connection) as captured:
+            fetch()
+        queries.append(len(captured))
+        executor.drain()
+
+    peaks = []
+    tracemalloc.start()
+    for _ in range(TRACED):
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        fetch()
+        peaks.append((tracemalloc.get_traced_memory()[1] - baseline) / 1024)
+        executor.drain()
+    tracemalloc.stop()
+
+    timings.sort()
+    return {
+        'p50_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(timings[max(int(len(timings) * 0.95) - 1, 0)], 3),
+        'queries': statistics.median(queries),
+        'memory_kib': round(statistics.median(peaks), 1),
+    }
+
+
+def git_revision():
+    """Return the short hash of the checked-out commit, if any."""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+            text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def compare(results, baseline, threshold):
+    """
+    Print each metric against a baseline run.
+
+    Returns:
+        The number of metrics worse than the baseline by more than threshold
+    """
+    regressions = 0
+    print(f'\nCompared with {baseline["meta"].get("revision") or "baseline"}'
+          f' (threshold {threshold:.0%})')
+    print(f'{"view":<20}{"metric":<12}{"before":>10}{"after":>10}'
+          f'{"change":>10}')
+    for view, metrics in results['views'].items():
+        before = baseline['views'].get(view)
+        if before is None:
+            continue
+        for metric in METRICS:
+            old, new = before.get(metric), metrics[metric]
+            if old is None:
+                continue
+            change = (new - old) / old if old else (1.0 if new else 0.0)
+            flag = ''
+            if change > threshold:
+                flag = '  REGRESSION'
+                regressions += 1
+            print(f'{view:<20}{metric:<12}{old:>10g}{new:>10g}'
+                  f'{change:>+10.1%}{flag}')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--scale', type=float, default=0.01)
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--views', nargs='+', choices=VIEWS, default=VIEWS)
+    parser.add_argument('--output', help='Save the results as JSON.')
+    parser.add_argument('--compare', help='JSON results of a baseline run.')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Relative worsening flagged as a regression.')
+    parser.add_argument('--fresh', action='store_true',
+                        help='Rebuild the default SQLite database.')
+    args = parser.parse_args()
+
+    if args.fresh and os.environ['DATABASE_URL'].endswith(DEFAULT_DATABASE):
+        if os.path.exists(DEFAULT_DATABASE):
+            os.remove(DEFAULT_DATABASE)
+    seed(args.scale)
+
+    # Adds the test client's host to ALLOWED_HOSTS
+    setup_test_environment()
+    tasks._executor = TrackingExecutor(max_workers=2)
+    user_id, requests = build_requests()
+    client = Client()
+    client.force_login(User.objects.get(pk=user_id))
+
+    results = {
+        'meta': {
+            'revision': git_revision(),
+            'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'database': connection.vendor,
+            'attempts': QuizAttempt.objects.count(),
+            'requests': args.requests,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+        },
+        'views': {},
+    }
+    print(f'{connection.vendor}, {results["meta"]["attempts"]} attempts, '
+          f'{args.requests} requests per view')
+    print(f'{"view":<20}{"p50 ms":>10}{"p95 ms":>10}{"queries":>9}'
+          f'{"KiB":>10}')
+    for view in args.views:
+        cache.clear()
+        method, path, kwargs = requests[view]
+        metrics = measure(client, method, path, kwargs, args.requests)
+        results['views'][view] = metrics
+        print(f'{view:<20}{metrics["p50_ms"]:>10.2f}'
+              f'{metrics["p95_ms"]:>10.2f}{metrics["queries"]:>9g}'
+              f'{metrics["memory_kib"]:>10.1f}')
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f'Saved results to {args.output}')
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,6 +2,8 @@
 ASGI config for code_mastery project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+This is Django's ASGI handler, adapted to hold live notification streams
+without a thread each (see quizzes.events).
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -9,8 +11,11 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'code_mastery.settings')
+django.setup(set_prefix=False)
 
-application = get_asgi_application()
+from quizzes.events import EventStreamASGIHandler  # noqa: E402
+
+application = EventStreamASGIHandler()
@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 import os
 from pathlib import Path
 import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
 
 # Load environment variables from env.py if it exists (local development)
 if os.path.isfile('env.py'):
@@ -101,6 +102,7 @@ SOCIALACCOUNT_PROVIDERS = {
 }
 
 MIDDLEWARE = [
+    'quizzes.middleware.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -125,6 +127,7 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'accounts.context_processors.notifications',
+                'accounts.context_processors.saved_quizzes',
             ],
         },
     },
@@ -199,6 +202,80 @@ EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
 DEFAULT_FROM_EMAIL = os.environ.get(
     'DEFAULT_FROM_EMAIL', 'noreply@codemastery.com')
 
+# Quiz attempts older than this are moved to the archive table by the
+# archive_attempts management command
+ATTEMPT_ARCHIVE_AFTER_DAYS = int(
+    os.environ.get('ATTEMPT_ARCHIVE_AFTER_DAYS', 365))
+
+# Retention rules applied by the prune_notifications management command
+NOTIFICATION_RETENTION = {
+    'KEEP_LAST': 200,
+    'DELETE_READ_AFTER_DAYS': 30,
+    'ROLLUP_AFTER_DAYS': 90,
+}
+
+# Cache used for data shared by every visitor, such as the homepage
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+#
+# Writes only invalidate the cache they can reach, so production should set
+# CACHE_URL to a cache that every worker and management command shares:
+# db://<table> for Django's database cache (run createcachetable first) or
+# redis://host:port/db (needs the redis package). Without it each process
+# keeps its own memory cache, and the homepage is cached only briefly.
+CACHE_URL = os.environ.get('CACHE_URL', '')
+
+if CACHE_URL.startswith('db://'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': CACHE_URL.removeprefix('db://'),
+        }
+    }
+elif CACHE_URL.startswith(('redis://', 'rediss://')):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+        }
+    }
+elif CACHE_URL:
+    raise ImproperlyConfigured(f'Unsupported CACHE_URL: {CACHE_URL}')
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'code-mastery',
+        }
+    }
+
+# Seconds the homepage stays cached. Writes in other processes cannot clear
+# a process-local cache, so the default is short without a shared one.
+HOMEPAGE_CACHE_TIMEOUT = int(os.environ.get(
+    'HOMEPAGE_CACHE_TIMEOUT', 60 * 15 if CACHE_URL else 60))
+
+# Run background tasks inline instead of on the worker thread pool
+BACKGROUND_TASKS_EAGER = os.environ.get('BACKGROUND_TASKS_EAGER') == 'True'
+
+# Shared cache lifetime (seconds) of anonymous home and quiz pages. Bump
+# PUBLIC_PAGE_VERSION when a deploy changes those templates so cached copies
+# stop validating.
+PUBLIC_PAGE_MAX_AGE = int(os.environ.get('PUBLIC_PAGE_MAX_AGE', 60))
+PUBLIC_PAGE_VERSION = os.environ.get('PUBLIC_PAGE_VERSION', '1')
+
+# Largest quiz bank (bytes) users may upload; bigger files go through the
+# import_quizzes command
+QUIZ_IMPORT_MAX_UPLOAD_SIZE = int(
+    os.environ.get('QUIZ_IMPORT_MAX_UPLOAD_SIZE', 5 * 1024 * 1024))
+
+# Add a Server-Timing header with app and database time to every response;
+# used by benchmarks/loadtest.py to tell queueing from work
+SERVER_TIMING = os.environ.get('SERVER_TIMING') == 'True'
+
+# Seconds a live notification stream stays open before the browser
+# reconnects and catches up on notifications published by other workers
+NOTIFICATION_STREAM_TIMEOUT = int(
+    os.environ.get('NOTIFICATION_STREAM_TIMEOUT', 300))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
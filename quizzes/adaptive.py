@@ -0,0 +1,242 @@
+"""
+Adaptive quiz sessions that pick each question for the learner's ability.
+
+Questions are modelled with the two-parameter logistic IRT model: the
+chance of answering question j correctly at ability theta is
+
+    P_j(theta) = 1 / (1 + exp(-D * a_j * (theta - b_j)))
+
+with discrimination a_j and difficulty b_j. These are derived from the
+classical statistics of compute_item_statistics (Lord's approximations
+from the p-value and point-biserial), and questions without enough
+responses get a=1, b=0.
+
+A quiz's parameters are loaded once into NumPy arrays and kept in an
+in-process cache keyed by the quiz revision and statistics run, so each
+step only does array math over the bank:
+
+- the ability posterior lives on a fixed grid and is updated with one
+  multiplication per response (expected a posteriori estimate);
+- the next question is the one with the most Fisher information at the
+  current estimate, drawn at random from the top SELECTION_POOL so that
+  everyone does not start with the same question.
+
+A session ends after MAX_QUESTIONS answers, once the standard error
+drops below TARGET_SE, or when the bank runs out.
+"""
+
+import random
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+from scipy.special import expit, ndtr, ndtri
+
+from .models import Question, QuizStatistics
+
+MAX_QUESTIONS = 20
+TARGET_SE = 0.3
+SELECTION_POOL = 3
+# Responses a question needs before its statistics are trusted
+MIN_CALIBRATION_RESPONSES = 30
+BANK_CACHE_SIZE = 64
+
+# Scales the logistic curve to match the normal ogive
+D = 1.7
+GRID = np.linspace(-4, 4, 81)
+LOG_PRIOR = -GRID ** 2 / 2
+
+ItemBank = namedtuple('ItemBank', ['question_ids', 'letters', 'a', 'b'])
+
+
+def item_parameters(difficulty, discrimination):
+    """
+    Convert classical item statistics to 2PL parameters.
+
+    Args:
+        difficulty: Array of p-values, NaN for uncalibrated questions
+        discrimination: Array of point-biserial correlations, or NaN
+
+    Returns:
+        (a, b) arrays
+    """
+    p = np.clip(difficulty, 0.02, 0.98)
+    r = np.clip(discrimination, 0.05, 0.9)
+    a = np.clip(r / np.sqrt(1 - r ** 2), 0.3, 2.5)
+    b = np.clip(-ndtri(p) / r, -3.5, 3.5)
+    unknown = np.isnan(p) | np.isnan(r)
+    a[unknown] = 1.0
+    b[unknown] = 0.0
+    return a, b
+
+
+@lru_cache(maxsize=BANK_CACHE_SIZE)
+def _load_item_bank(quiz_id, revision, statistics_version):
+    """Load a quiz's item bank; the versions only key the cache."""
+    rows = list(Question.objects.filter(quiz_id=quiz_id).values_list(
+        'id', 'correct_answer', 'statistics__responses',
+        'statistics__difficulty', 'statistics__discrimination'))
+    calibrated = [
+        (responses or 0) >= MIN_CALIBRATION_RESPONSES
+        for _, _, responses, _, _ in rows
+    ]
+    difficulty = np.array([
+        row[3] if ok and row[3] is not None else np.nan
+        for row, ok in zip(rows, calibrated)], dtype=np.float64)
+    discrimination = np.array([
+        row[4] if ok and row[4] is not None else np.nan
+        for row, ok in zip(rows, calibrated)], dtype=np.float64)
+    a, b = item_parameters(difficulty, discrimination)
+    return ItemBank(
+        question_ids=np.array([row[0] for row in rows], dtype=np.int64),
+        letters=[row[1] for row in rows],
+        a=a,
+        b=b,
+    )
+
+
+def get_item_bank(quiz):
+    """Return the cached item bank of a quiz."""
+    statistics_version = QuizStatistics.objects.filter(
+        quiz=quiz).values_list('computed_at', flat=True).first()
+    return _load_item_bank(quiz.pk, quiz.revision, statistics_version)
+
+
+def estimate(log_posterior):
+    """Return the (ability, standard error) of a log posterior on GRID."""
+    weights = np.exp(log_posterior - log_posterior.max())
+    weights /= weights.sum()
+    theta = weights @ GRID
+    return float(theta), float(np.sqrt(weights @ (GRID - theta) ** 2))
+
+
+def update(log_posterior, a, b, correct):
+    """Return the log posterior after one response to an (a, b) item."""
+    p = expit(D * a * (GRID - b))
+    log_posterior = log_posterior + np.log(p if correct else 1 - p)
+    return log_posterior - log_posterior.max()
+
+
+def select_next(bank, theta, answered, rng=random):
+    """
+    Return the bank index of the next question, or None if none are left.
+
+    Args:
+        bank: ItemBank of the quiz
+        theta: Current ability estimate
+        answered: Question ids already asked in this session
+    """
+    p = expit(D * bank.a * (theta - bank.b))
+    information = (D * bank.a) ** 2 * p * (1 - p)
+    if answered:
+        information[np.isin(bank.question_ids, answered)] = -1
+    available = int((information >= 0).sum())
+    if not available:
+        return None
+    pool = min(SELECTION_POOL, available)
+    best = np.argpartition(-information, pool - 1)[:pool]
+    return int(rng.choice(best.tolist()))
+
+
+class AdaptiveSession:
+    """
+    One learner's adaptive run through a quiz, kept in their session.
+
+    Only one adaptive quiz is in progress per session; starting another
+    replaces it.
+    """
+
+    SESSION_KEY = 'adaptive_quiz'
+
+    def __init__(self, session, quiz):
+        self.session = session
+        self.quiz = quiz
+        self.bank = get_item_bank(quiz)
+        state = session.get(self.SESSION_KEY)
+        if not state or state.get('quiz') != quiz.pk:
+            state = {
+                'quiz': quiz.pk,
+                'pending': None,
+                'answered': [],
+                'correct': 0,
+                'log_posterior': LOG_PRIOR.tolist(),
+            }
+        self.state = state
+
+    @property
+    def log_posterior(self):
+        return np.array(self.state['log_posterior'])
+
+    @property
+    def answered(self):
+        return self.state['answered']
+
+    @property
+    def pending(self):
+        """Return the id of the question awaiting an answer, or None."""
+        return self.state['pending']
+
+    def ability(self):
+        return estimate(self.log_posterior)
+
+    def is_done(self):
+        _, se = self.ability()
+        return (len(self.answered) >= MAX_QUESTIONS or se <= TARGET_SE
+                or len(self.answered) >= len(self.bank.question_ids))
+
+    def next_question(self):
+        """Pick, remember and return the next question id, or None."""
+        if self.pending is None and not self.is_done():
+            theta, _ = self.ability()
+            index = select_next(self.bank, theta, self.answered)
+            if index is not None:
+                self.state['pending'] = int(self.bank.question_ids[index])
+        self.save()
+        return self.pending
+
+    def answer(self, letter):
+        """
+        Grade the pending question and update the ability estimate.
+
+        Returns:
+            (correct, correct letter)
+
+        Raises:
+            ValueError: If no question is pending or it left the quiz
+        """
+        matches = np.flatnonzero(self.bank.question_ids == self.pending)
+        if self.pending is None or not len(matches):
+            raise ValueError('No question is awaiting an answer.')
+        index = matches[0]
+        correct_letter = self.bank.letters[index]
+        correct = letter == correct_letter
+        self.state['log_posterior'] = update(
+            self.log_posterior, self.bank.a[index], self.bank.b[index],
+            correct).tolist()
+        self.state['answered'].append(self.pending)
+        self.state['correct'] += correct
+        self.state['pending'] = None
+        self.save()
+        return correct, correct_letter
+
+    def summary(self):
+        """Return the progress and ability estimate as a dict."""
+        theta, se = self.ability()
+        return {
+            'answered': len(self.answered),
+            'correct': self.state['correct'],
+            'max_questions': min(MAX_QUESTIONS, len(self.bank.question_ids)),
+            'ability': round(theta, 2),
+            'standard_error': round(se, 2),
+            # Share of learners with a lower ability under the N(0, 1) prior
+            'percentile': round(float(ndtr(theta)) * 100),
+            'done': self.is_done(),
+        }
+
+    def restart(self):
+        self.session.pop(self.SESSION_KEY, None)
+        self.__init__(self.session, self.quiz)
+
+    def save(self):
+        self.session[self.SESSION_KEY] = self.state
+        self.session.modified = True
@@ -1,5 +1,133 @@
 from django.contrib import admin
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.template.response import TemplateResponse
+from django.urls import reverse
+from django.utils.functional import cached_property
 from .models import Quiz, Question, QuizAttempt, Notification
+from .tasks import (
+    purge_attempts, regenerate_quizzes, run_in_background,
+    set_quizzes_featured)
+
+# Tables estimated to hold fewer rows than this are counted exactly
+ESTIMATED_COUNT_THRESHOLD = 10000
+
+BACKGROUND_MESSAGE = (
+    '{action} the selected {items} in the background. You will get a '
+    'notification when it is done.')
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that estimates the size of large, unfiltered tables.
+
+    An exact COUNT(*) reads the whole table. On PostgreSQL an unfiltered
+    changelist uses the planner's row estimate instead, which is instant
+    and close enough to page through.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql' and not queryset.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT reltuples::bigint FROM pg_class '
+                    'WHERE oid = %s::regclass',
+                    [queryset.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+            if row and row[0] >= ESTIMATED_COUNT_THRESHOLD:
+                return row[0]
+        return super().count
+
+
+class AutocompleteFilter(admin.SimpleListFilter):
+    """
+    Sidebar filter that picks a related object with an autocomplete box.
+
+    Unlike a plain related-field filter it never loads every related row;
+    choices come from the admin autocomplete view of the related model,
+    which must define search_fields.
+    """
+
+    template = 'admin/quizzes/autocomplete_filter.html'
+    field_name = None
+
+    def __init__(self, request, params, model, model_admin):
+        self.parameter_name = f'{self.field_name}__id__exact'
+        self.model = model
+        super().__init__(request, params, model, model_admin)
+
+    def has_output(self):
+        return True
+
+    def lookups(self, request, model_admin):
+        # Only the selected object is loaded, to label the box
+        related_model = self.model._meta.get_field(
+            self.field_name).related_model
+        if self.value():
+            try:
+                selected = related_model._default_manager.filter(
+                    pk=self.value()).first()
+            except (ValueError, ValidationError):
+                selected = None
+            if selected is not None:
+                return [(str(selected.pk), str(selected))]
+        return []
+
+    def queryset(self, request, queryset):
+        if self.value():
+            try:
+                return queryset.filter(
+                    **{f'{self.field_name}_id': self.value()})
+            except (ValueError, ValidationError) as e:
+                raise IncorrectLookupParameters(e)
+        return queryset
+
+    @property
+    def autocomplete_url(self):
+        return reverse('admin:autocomplete')
+
+    @property
+    def app_label(self):
+        return self.model._meta.app_label
+
+    @property
+    def model_name(self):
+        return self.model._meta.model_name
+
+
+class QuizAutocompleteFilter(AutocompleteFilter):
+    title = 'quiz'
+    field_name = 'quiz'
+
+
+class UserAutocompleteFilter(AutocompleteFilter):
+    title = 'user'
+    field_name = 'user'
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Changelist settings for tables too big to count or list in full."""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    class Media:
+        css = {'all': (
+            'admin/css/vendor/select2/select2.css',
+            'admin/css/autocomplete.css',
+        )}
+        js = (
+            'admin/js/vendor/jquery/jquery.js',
+            'admin/js/vendor/select2/select2.full.js',
+            'admin/js/jquery.init.js',
+            'admin/js/autocomplete.js',
+            'js/admin/autocomplete-filter.js',
+        )
 
 
 class QuestionInline(admin.TabularInline):
@@ -14,26 +142,84 @@ class QuizAdmin(admin.ModelAdmin):
     list_display = ('title', 'slug', 'creator', 'is_ai_generated', 'is_featured', 'created_at')
     list_filter = ('is_ai_generated', 'is_featured', 'created_at')
     list_editable = ('is_featured',)
+    list_select_related = ('creator',)
     search_fields = ('title', 'description', 'creator__username', 'slug')
     readonly_fields = ('slug', 'created_at', 'updated_at')
     inlines = [QuestionInline]
+    actions = ['feature_quizzes', 'unfeature_quizzes', 'regenerate']
+
+    @admin.action(description='Feature selected quizzes')
+    def feature_quizzes(self, request, queryset):
+        run_in_background(
+            set_quizzes_featured, queryset, True, request.user.pk)
+        self.message_user(request, BACKGROUND_MESSAGE.format(
+            action='Featuring', items='quizzes'))
+
+    @admin.action(description='Unfeature selected quizzes')
+    def unfeature_quizzes(self, request, queryset):
+        run_in_background(
+            set_quizzes_featured, queryset, False, request.user.pk)
+        self.message_user(request, BACKGROUND_MESSAGE.format(
+            action='Unfeaturing', items='quizzes'))
+
+    @admin.action(description='Regenerate question HTML and search index')
+    def regenerate(self, request, queryset):
+        run_in_background(regenerate_quizzes, queryset, request.user.pk)
+        self.message_user(request, BACKGROUND_MESSAGE.format(
+            action='Regenerating', items='quizzes'))
 
 
 @admin.register(Question)
-class QuestionAdmin(admin.ModelAdmin):
+class QuestionAdmin(LargeTableAdmin):
     """Admin configuration for Question model."""
     list_display = ('quiz', 'text', 'correct_answer', 'order')
-    list_filter = ('quiz', 'correct_answer')
+    list_filter = (QuizAutocompleteFilter, 'correct_answer')
+    list_select_related = ('quiz',)
+    autocomplete_fields = ('quiz',)
     search_fields = ('text', 'quiz__title')
 
 
 @admin.register(QuizAttempt)
-class QuizAttemptAdmin(admin.ModelAdmin):
+class QuizAttemptAdmin(LargeTableAdmin):
     """Admin configuration for QuizAttempt model."""
     list_display = ('quiz', 'user', 'score', 'total_questions', 'started_at', 'completed_at')
-    list_filter = ('quiz', 'started_at', 'completed_at')
+    list_filter = (
+        QuizAutocompleteFilter, UserAutocompleteFilter,
+        'started_at', 'completed_at')
+    list_select_related = ('quiz', 'user')
+    autocomplete_fields = ('quiz', 'user')
     search_fields = ('quiz__title', 'user__username')
     readonly_fields = ('started_at',)
+    actions = ['purge']
+
+    def get_actions(self, request):
+        # delete_selected loads every selected attempt to confirm; purge
+        # deletes them in chunks in the background instead
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    @admin.action(
+        description='Purge selected attempts', permissions=['delete'])
+    def purge(self, request, queryset):
+        if request.POST.get('post') != 'yes':
+            context = {
+                **self.admin_site.each_context(request),
+                'title': 'Purge quiz attempts?',
+                'opts': self.model._meta,
+                'count': queryset.count(),
+                'action': 'purge',
+                'select_across': request.POST.get('select_across', '0'),
+                'selected': request.POST.getlist(
+                    admin.helpers.ACTION_CHECKBOX_NAME),
+                'action_checkbox_name': admin.helpers.ACTION_CHECKBOX_NAME,
+            }
+            return TemplateResponse(
+                request, 'admin/quizzes/purge_confirmation.html', context)
+
+        run_in_background(purge_attempts, queryset, request.user.pk)
+        self.message_user(request, BACKGROUND_MESSAGE.format(
+            action='Purging', items='attempts'))
 
 
 @admin.register(Notification)
@@ -41,5 +227,6 @@ class NotificationAdmin(admin.ModelAdmin):
     """Admin configuration for Notification model."""
     list_display = ('recipient', 'notification_type', 'is_read', 'created_at')
     list_filter = ('notification_type', 'is_read', 'created_at')
+    list_select_related = ('recipient',)
     search_fields = ('recipient__username', 'message')
     readonly_fields = ('created_at',)
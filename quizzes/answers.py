@@ -0,0 +1,55 @@
+"""
+Compact encoding of quiz attempt answers.
+
+An attempt stores one character per question, aligned to the question order
+of the QuizVersion it references, instead of a JSON dict keyed by question id.
+"""
+
+UNANSWERED = '-'
+VALID_ANSWERS = frozenset('ABCD')
+
+
+def encode_answers(question_ids, answers):
+    """
+    Encode an answers mapping as a fixed-width answer string.
+
+    Args:
+        question_ids: Question ids in quiz order
+        answers: Mapping of question id (int or str) to the chosen letter
+
+    Returns:
+        A string with one character per question, UNANSWERED for blanks
+    """
+    chars = []
+    for question_id in question_ids:
+        answer = answers.get(question_id)
+        if answer is None:
+            answer = answers.get(str(question_id), '')
+        chars.append(answer if answer in VALID_ANSWERS else UNANSWERED)
+    return ''.join(chars)
+
+
+def decode_answers(question_ids, answer_string):
+    """
+    Decode an answer string back into a {question_id: letter} dict.
+
+    Unanswered questions map to an empty string, matching what the
+    submit form posts for a skipped question.
+    """
+    return {
+        question_id: '' if char == UNANSWERED else char
+        for question_id, char in zip(question_ids, answer_string)
+    }
+
+
+def grade_answers(correct_letters, answer_string):
+    """
+    Compare an answer string with a quiz's correct letters.
+
+    Returns:
+        A list with one boolean per question, True where it was correct
+    """
+    return [
+        given == correct
+        for given, correct in zip(answer_string, correct_letters)
+    ]
@@ -0,0 +1,104 @@
+"""
+Moves old quiz attempts from the live table into cold storage.
+"""
+
+import logging
+from datetime import timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import QuizAttempt, ArchivedQuizAttempt
+
+logger = logging.getLogger(__name__)
+
+ARCHIVED_FIELDS = [
+    'id', 'quiz_id', 'user_id', 'version_id', 'session_key', 'score',
+    'total_questions', 'answer_string', 'answers', 'started_at',
+    'completed_at',
+]
+
+
+def archive_cutoff(days=None):
+    """Return the datetime before which attempts are archived."""
+    if days is None:
+        days = settings.ATTEMPT_ARCHIVE_AFTER_DAYS
+    return timezone.now() - timedelta(days=days)
+
+
+def _month_start(value):
+    """Return the first instant of the month containing value."""
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _next_month(value):
+    """Return the first instant of the month after value."""
+    if value.month == 12:
+        return value.replace(year=value.year + 1, month=1)
+    return value.replace(month=value.month + 1)
+
+
+def ensure_partitions(started_at_values):
+    """
+    Create the monthly archive partitions needed for started_at_values.
+
+    Partitions only exist on PostgreSQL; other databases use a single
+    archive table and this is a no-op.
+    """
+    if connection.vendor != 'postgresql':
+        return
+
+    table = ArchivedQuizAttempt._meta.db_table
+    months = {
+        _month_start(value.astimezone(dt_timezone.utc))
+        for value in started_at_values
+    }
+    with connection.cursor() as cursor:
+        for month in sorted(months):
+            partition = f'{table}_y{month.year}m{month.month:02d}'
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS {partition} '
+                f'PARTITION OF {table} FOR VALUES FROM (%s) TO (%s)',
+                [month, _next_month(month)],
+            )
+
+
+def archive_attempts(before, batch_size=1000, progress=None):
+    """
+    Move attempts that started before `before` into the archive table.
+
+    Each batch is copied and deleted in its own short transaction so the
+    live table is never locked for long.
+
+    Args:
+        before: Attempts with started_at earlier than this are archived
+        batch_size: Number of attempts moved per transaction
+        progress: Optional callable receiving the running total
+
+    Returns:
+        The number of attempts archived
+    """
+    moved = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                QuizAttempt.objects.filter(started_at__lt=before)
+                .order_by('started_at', 'pk')
+                .values(*ARCHIVED_FIELDS)[:batch_size]
+            )
+            if not rows:
+                break
+
+            ensure_partitions(row['started_at'] for row in rows)
+            ArchivedQuizAttempt.objects.bulk_create(
+                ArchivedQuizAttempt(**row) for row in rows)
+            QuizAttempt.objects.filter(
+                pk__in=[row['id'] for row in rows]).delete()
+
+        moved += len(rows)
+        if progress:
+            progress(moved)
+
+    logger.info('Archived %s quiz attempts started before %s', moved, before)
+    return moved
@@ -0,0 +1,126 @@
+"""
+Cache helpers for quiz data that is identical for every visitor.
+"""
+
+import json
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .models import Quiz, QuizVersion
+
+HOMEPAGE_KEY = 'home:featured'
+HOMEPAGE_VERSION_KEY = 'home:version'
+FEATURED_LIMIT = 6
+ANSWER_KEY_TIMEOUT = 60 * 60 * 24
+QUIZ_DOCUMENT_SCHEMA = 1
+QUIZ_DOCUMENT_TIMEOUT = 60 * 60 * 24
+
+# Question ids in quiz order, their correct letters as one string, and the
+# QuizVersion attempts against this question order are stored with
+AnswerKey = namedtuple('AnswerKey', ['version_id', 'question_ids', 'letters'])
+
+
+def get_homepage_quizzes():
+    """
+    Return the homepage quizzes and their rendered cards.
+
+    Featured quizzes come first, topped up with the most recent ones. On a
+    cache miss both are built from a single query.
+
+    Returns:
+        Tuple of (list of quizzes, rendered card HTML)
+    """
+    cached = cache.get(HOMEPAGE_KEY)
+    if cached is None:
+        quizzes = list(
+            Quiz.objects.annotate(num_questions=Count('questions'))
+            .order_by('-is_featured', '-created_at')[:FEATURED_LIMIT]
+        )
+        cards_html = render_to_string(
+            'quizzes/featured_cards.html', {'featured_quizzes': quizzes})
+        cached = (quizzes, cards_html)
+        cache.set(HOMEPAGE_KEY, cached, settings.HOMEPAGE_CACHE_TIMEOUT)
+    return cached
+
+
+def homepage_shows(quiz_id):
+    """Return True if the cached homepage includes the given quiz."""
+    cached = cache.get(HOMEPAGE_KEY)
+    return cached is not None and any(
+        quiz.id == quiz_id for quiz in cached[0])
+
+
+def get_homepage_version():
+    """
+    Return when the current homepage contents were first served.
+
+    The value is kept in the cache alongside the homepage and replaced
+    whenever the homepage is invalidated, so it validates conditional
+    requests without a database query.
+    """
+    return cache.get_or_set(
+        HOMEPAGE_VERSION_KEY, timezone.now, settings.HOMEPAGE_CACHE_TIMEOUT)
+
+
+def invalidate_homepage():
+    """Drop the cached homepage so the next visitor rebuilds it."""
+    cache.delete_many([HOMEPAGE_KEY, HOMEPAGE_VERSION_KEY])
+
+
+def get_answer_key(quiz):
+    """
+    Return the cached answer key for grading a quiz.
+
+    Keys include the quiz's updated_at, which changes whenever the quiz or
+    one of its questions is edited, so an edit never grades with an old key.
+    """
+    key = f'answer-key:{quiz.pk}:{quiz.updated_at.timestamp()}'
+    answer_key = cache.get(key)
+    if answer_key is None:
+        rows = list(quiz.questions.values_list('id', 'correct_answer'))
+        question_ids = tuple(question_id for question_id, _ in rows)
+        version = QuizVersion.objects.for_questions(quiz, question_ids)
+        answer_key = AnswerKey(
+            version.pk, question_ids, ''.join(letter for _, letter in rows))
+        cache.set(key, answer_key, ANSWER_KEY_TIMEOUT)
+    return answer_key
+
+
+def get_quiz_document(quiz):
+    """
+    Return the JSON document the quiz page renders its questions from.
+
+    The document holds each question's pre-rendered HTML but never the
+    correct answers. It is cached per quiz revision and returned already
+    serialized, so a warm request does no question queries or encoding.
+    """
+    key = f'quiz-document:{quiz.pk}:{quiz.revision}'
+    document = cache.get(key)
+    if document is None:
+        document = json.dumps({
+            'schema': QUIZ_DOCUMENT_SCHEMA,
+            'id': quiz.pk,
+            'slug': quiz.slug,
+            'title': quiz.title,
+            'revision': quiz.revision,
+            'questions': [
+                {
+                    'id': question.id,
+                    'text': question.text_html,
+                    'options': [
+                        question.option_a_html,
+                        question.option_b_html,
+                        question.option_c_html,
+                        question.option_d_html,
+                    ],
+                }
+                for question in quiz.questions.rendered()
+            ],
+        }, separators=(',', ':'))
+        cache.set(key, document, QUIZ_DOCUMENT_TIMEOUT)
+    return document
@@ -0,0 +1,53 @@
+"""
+View decorators for pages that are identical for every anonymous visitor.
+"""
+
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+
+def is_public_request(request):
+    """
+    Return True if the request carries no session or messages cookie.
+
+    Such a visitor is anonymous and has nothing personal to show, which is
+    decided from the cookies alone so the session is never loaded.
+    """
+    return (
+        settings.SESSION_COOKIE_NAME not in request.COOKIES
+        and CookieStorage.cookie_name not in request.COOKIES
+    )
+
+
+def public_page(etag_func=None, last_modified_func=None):
+    """
+    Serve public requests with validators and shared Cache-Control headers.
+
+    Public requests get ETag/Last-Modified handling (including 304 Not
+    Modified) through Django's condition decorator and may be stored by a
+    shared cache. Every other response is marked private.
+    """
+    def decorator(view):
+        conditional_view = condition(
+            etag_func=etag_func, last_modified_func=last_modified_func
+        )(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not is_public_request(request):
+                response = view(request, *args, **kwargs)
+                patch_cache_control(response, private=True)
+                return response
+
+            response = conditional_view(request, *args, **kwargs)
+            patch_cache_control(
+                response, public=True, max_age=settings.PUBLIC_PAGE_MAX_AGE)
+            # Visitors with cookies must never be sent the shared copy
+            patch_vary_headers(response, ['Cookie'])
+            return response
+        return wrapper
+    return decorator
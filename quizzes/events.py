@@ -0,0 +1,237 @@
+"""
+Live notification events for open pages, over server-sent events.
+
+NotificationBroker is an in-process publish/subscribe hub standing in for
+Redis pub/sub. Each open event stream subscribes with an asyncio queue on
+the server's event loop, and publish() may be called from any thread (a
+request or background task saving a Notification), handing events to the
+loop with call_soon_threadsafe. Idle streams are just a queue and a
+suspended coroutine, so a process can hold thousands of them without a
+thread each.
+
+Events only reach streams in the process that published them. Streams are
+therefore closed after settings.NOTIFICATION_STREAM_TIMEOUT seconds and
+the browser reconnects with the id of the last notification it saw; the
+stream starts by replaying newer notifications from the database, so
+events published by other workers arrive late rather than not at all. A
+stream that falls too far behind is closed in the same way.
+
+Django runs each ASGI request in its own ThreadSensitiveContext, whose sync
+thread, and the database connection opened on it, lives until the response
+ends. EventStreamASGIHandler serves event streams outside one, so their
+brief database work shares the process-wide sync thread instead.
+"""
+
+import asyncio
+import json
+import threading
+from collections import defaultdict, namedtuple
+
+from django.core.handlers.asgi import ASGIHandler
+from django.urls import reverse
+
+from .models import Notification
+
+# Events a slow stream may have waiting before it is dropped
+QUEUE_SIZE = 100
+# Seconds between keep-alive comments on an idle stream
+HEARTBEAT = 20
+# Notifications replayed to a stream that reconnects
+REPLAY_LIMIT = 50
+# Milliseconds the browser waits before reconnecting
+RETRY = 5000
+
+
+class Event(namedtuple('Event', ['name', 'data', 'id'])):
+    """One server-sent event; id is the latest notification id, if any."""
+
+    def encode(self):
+        lines = [f'event: {self.name}']
+        if self.id is not None:
+            lines.append(f'id: {self.id}')
+        lines.append(f'data: {json.dumps(self.data)}')
+        return '\n'.join(lines) + '\n\n'
+
+
+class Subscription:
+    """The queue of events waiting for one open stream."""
+
+    def __init__(self, user_id, loop):
+        self.user_id = user_id
+        self.loop = loop
+        self.queue = asyncio.Queue(QUEUE_SIZE)
+        self.overflowed = False
+
+    def put(self, event):
+        """Queue an event; runs on the subscriber's event loop."""
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    async def get(self, timeout):
+        """Return the next event, or None after timeout seconds."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class NotificationBroker:
+    """In-process pub/sub of notification events, keyed by user."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def subscribe(self, user_id):
+        """Subscribe the running event loop to a user's events."""
+        subscription = Subscription(user_id, asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscribers.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscribers[subscription.user_id]
+
+    def has_subscribers(self, user_id):
+        return user_id in self._subscribers
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(map(len, self._subscribers.values()))
+
+    def publish(self, user_id, event):
+        """Send an event to every stream of a user; safe from any thread."""
+        with self._lock:
+            subscriptions = list(self._subscribers.get(user_id, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(
+                    subscription.put, event)
+            except RuntimeError:
+                # The stream's event loop has closed
+                self.unsubscribe(subscription)
+
+
+broker = NotificationBroker()
+
+
+def notification_data(notification, quiz_slug=None):
+    """Return the JSON payload of a notification event."""
+    return {
+        'id': notification.pk,
+        'type': notification.notification_type,
+        'message': notification.message,
+        'created_at': notification.created_at.isoformat(),
+        'quiz_url': (reverse('quizzes:detail', kwargs={'slug': quiz_slug})
+                     if quiz_slug else None),
+        'mark_read_url': reverse(
+            'accounts:notification_mark_read',
+            kwargs={'notification_id': notification.pk}),
+    }
+
+
+def unread_event(unread_count, latest_id=None):
+    return Event('unread', {'count': unread_count}, latest_id)
+
+
+def publish_unread_count(user_id):
+    """Send a user's open streams their current unread count."""
+    if broker.has_subscribers(user_id):
+        broker.publish(user_id, unread_event(Notification.objects.filter(
+            recipient_id=user_id, is_read=False).count()))
+
+
+def publish_notification(notification_id):
+    """Send a new notification and the unread count to its recipient."""
+    notification = Notification.objects.filter(
+        pk=notification_id).select_related('related_quiz').first()
+    if notification is None or not broker.has_subscribers(
+            notification.recipient_id):
+        return
+    quiz = notification.related_quiz
+    broker.publish(notification.recipient_id, Event(
+        'notification',
+        notification_data(notification, quiz.slug if quiz else None),
+        notification.pk))
+    publish_unread_count(notification.recipient_id)
+
+
+async def _snapshot(user_id, last_event_id):
+    """Return the notifications to replay and the opening unread event."""
+    notifications = Notification.objects.filter(recipient_id=user_id)
+    latest_id = await notifications.order_by('-pk').values_list(
+        'pk', flat=True).afirst()
+    replay = []
+    if last_event_id is not None:
+        replay = [
+            Event('notification',
+                  notification_data(notification, quiz_slug),
+                  notification.pk)
+            async for notification, quiz_slug in _with_slugs(
+                notifications.filter(pk__gt=last_event_id).select_related(
+                    'related_quiz').order_by('-pk')[:REPLAY_LIMIT])
+        ][::-1]
+    unread_count = await notifications.filter(is_read=False).acount()
+    return replay, unread_event(unread_count, latest_id or 0)
+
+
+async def _with_slugs(queryset):
+    async for notification in queryset:
+        quiz = notification.related_quiz
+        yield notification, quiz.slug if quiz else None
+
+
+async def event_stream(user_id, last_event_id, timeout):
+    """
+    Yield the text of a user's notification event stream.
+
+    Starts with any notifications newer than last_event_id and the unread
+    count, then forwards published events, with keep-alive comments in
+    between, until timeout seconds have passed.
+    """
+    loop = asyncio.get_running_loop()
+    # Subscribe before reading the snapshot so nothing falls in between
+    subscription = broker.subscribe(user_id)
+    try:
+        replay, unread = await _snapshot(user_id, last_event_id)
+        yield f'retry: {RETRY}\n\n'
+        seen_id = unread.id
+        for event in replay:
+            yield event.encode()
+        yield unread.encode()
+
+        deadline = loop.time() + timeout
+        while not subscription.overflowed:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            event = await subscription.get(min(HEARTBEAT, remaining))
+            if event is None:
+                yield ': keep-alive\n\n'
+            elif event.id is None or event.id > seen_id:
+                # Skip notifications the snapshot already covered
+                seen_id = max(seen_id, event.id or 0)
+                yield event.encode()
+    finally:
+        broker.unsubscribe(subscription)
+
+
+class EventStreamASGIHandler(ASGIHandler):
+    """ASGI handler that keeps no thread per open event stream."""
+
+    def __init__(self):
+        super().__init__()
+        self.stream_paths = {reverse('accounts:notification_stream')}
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http' and scope['path'] in self.stream_paths:
+            await self.handle(scope, receive, send)
+        else:
+            await super().__call__(scope, receive, send)
@@ -0,0 +1,107 @@
+"""
+Streaming exports of a quiz's attempts for its creator.
+
+Rows are read with iterator(chunk_size=...), which uses a server-side
+cursor on PostgreSQL, and encoded one at a time as the response is sent,
+so memory use does not grow with the number of attempts.
+"""
+
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .answers import decode_answers
+from .models import ArchivedQuizAttempt, QuizAttempt, QuizVersion
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+EXPORT_CHUNK_SIZE = 2000
+
+ATTEMPT_FIELDS = (
+    'id', 'user__username', 'score', 'total_questions', 'started_at',
+    'completed_at', 'version_id', 'answer_string', 'answers')
+CSV_COLUMNS = (
+    'attempt_id', 'user', 'score', 'total_questions', 'started_at',
+    'completed_at')
+
+
+class Echo:
+    """File-like object whose write returns the line instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def attempt_rows(quiz):
+    """
+    Yield every live and archived attempt at a quiz as a dict.
+
+    Answers are a {question_id: letter} dict, with an empty string for a
+    skipped question.
+    """
+    versions = {
+        version.pk: version.get_question_ids()
+        for version in QuizVersion.objects.filter(quiz=quiz)
+    }
+    for model in (ArchivedQuizAttempt, QuizAttempt):
+        rows = model.objects.filter(quiz=quiz).order_by('started_at').values(
+            *ATTEMPT_FIELDS)
+        for row in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            if row['version_id'] in versions:
+                answers = decode_answers(
+                    versions[row['version_id']], row['answer_string'])
+            else:
+                answers = {
+                    int(question_id): answer
+                    for question_id, answer in (row['answers'] or {}).items()
+                }
+            yield {
+                'attempt_id': row['id'],
+                'user': row['user__username'],
+                'score': row['score'],
+                'total_questions': row['total_questions'],
+                'started_at': row['started_at'],
+                'completed_at': row['completed_at'],
+                'answers': answers,
+            }
+
+
+def csv_lines(quiz):
+    """
+    Yield the attempts as CSV lines, one answer column per question.
+
+    Columns follow the quiz's current questions; answers to questions
+    since removed are only included in the NDJSON export.
+    """
+    question_ids = list(quiz.questions.values_list('id', flat=True))
+    writer = csv.writer(Echo())
+    yield writer.writerow([
+        *CSV_COLUMNS,
+        *(f'question_{question_id}' for question_id in question_ids),
+    ])
+    for row in attempt_rows(quiz):
+        answers = row['answers']
+        yield writer.writerow([
+            row['attempt_id'],
+            row['user'] or '',
+            row['score'],
+            row['total_questions'],
+            row['started_at'].isoformat(),
+            row['completed_at'].isoformat() if row['completed_at'] else '',
+            *(answers.get(question_id, '') for question_id in question_ids),
+        ])
+
+
+def ndjson_lines(quiz):
+    """Yield the attempts as newline-delimited JSON objects."""
+    for row in attempt_rows(quiz):
+        yield json.dumps(row, cls=DjangoJSONEncoder) + '\n'
+
+
+EXPORT_WRITERS = {
+    'csv': csv_lines,
+    'ndjson': ndjson_lines,
+}
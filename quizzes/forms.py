@@ -1,5 +1,8 @@
 from django import forms
+from django.conf import settings
+from django.template.defaultfilters import filesizeformat
 from .models import Quiz, Question
+from .quiz_bank import detect_format
 
 
 class QuizForm(forms.ModelForm):
@@ -102,3 +105,41 @@ QuestionFormSet = forms.inlineformset_factory(
     min_num=1,
     validate_min=True,
 )
+
+
+class QuizImportForm(forms.Form):
+    """Form for uploading a bank of quizzes in NDJSON or GIFT."""
+
+    file = forms.FileField(
+        widget=forms.ClearableFileInput(attrs={
+            'class': 'form-control',
+            'accept': '.ndjson,.jsonl,.gift,.txt',
+        }),
+        help_text='NDJSON (.ndjson, .jsonl) or GIFT (.gift, .txt)',
+    )
+    file_format = forms.ChoiceField(
+        choices=[
+            ('', 'Detect from file name'),
+            ('ndjson', 'NDJSON'),
+            ('gift', 'GIFT'),
+        ],
+        required=False,
+        label='Format',
+        widget=forms.Select(attrs={'class': 'form-select'}),
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        upload = cleaned_data.get('file')
+        if upload is None:
+            return cleaned_data
+        if upload.size > settings.QUIZ_IMPORT_MAX_UPLOAD_SIZE:
+            raise forms.ValidationError(
+                'Files over %s must be imported by an administrator.'
+                % filesizeformat(settings.QUIZ_IMPORT_MAX_UPLOAD_SIZE))
+        if not cleaned_data.get('file_format'):
+            cleaned_data['file_format'] = detect_format(upload.name)
+            if cleaned_data['file_format'] is None:
+                raise forms.ValidationError(
+                    'Cannot tell the file format; please choose one.')
+        return cleaned_data
@@ -0,0 +1,238 @@
+"""
+Weekly, monthly and all-time leaderboards, global and per quiz.
+
+Every board is a set of LeaderboardEntry rows sharing period, period_start
+and quiz. Submitting an attempt updates the user's six entries in place
+(three periods, global and quiz), so a page view never aggregates
+attempts: the top of a board is a short scan of leaderboard_rank_idx and a
+user's rank counts the entries above theirs on the same index.
+
+Quiz boards keep each user's best score in the period, and global boards
+add up those best scores over every quiz, so retaking a quiz only counts
+when it beats the earlier score. Ties rank by who reached the score first.
+"""
+
+import heapq
+from datetime import date
+from itertools import groupby
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Value
+from django.db.models.functions import TruncMonth, TruncWeek
+from django.utils import timezone
+
+from .models import ArchivedQuizAttempt, LeaderboardEntry, QuizAttempt
+
+Period = LeaderboardEntry.Period
+
+TOP_SIZE = 100
+
+# period_start shared by every all-time entry
+ALL_TIME_START = date(2000, 1, 1)
+
+PERIOD_TRUNCATIONS = {
+    Period.WEEK: TruncWeek,
+    Period.MONTH: TruncMonth,
+}
+
+
+def period_start(period, day):
+    """Return the first day of the period containing day."""
+    if period == Period.WEEK:
+        return date.fromordinal(day.toordinal() - day.weekday())
+    if period == Period.MONTH:
+        return day.replace(day=1)
+    return ALL_TIME_START
+
+
+def _raise_best(period, start, quiz_id, user_id, score, completed_at):
+    """
+    Add one attempt to a user's quiz entry, keeping their best score.
+
+    Returns how much the best score rose, which is what the attempt adds
+    to the user's global entry for the same period.
+    """
+    entries = LeaderboardEntry.objects.filter(
+        period=period, period_start=start, quiz_id=quiz_id, user_id=user_id)
+    with transaction.atomic():
+        entry = entries.select_for_update().first()
+        if entry is None:
+            try:
+                with transaction.atomic():
+                    LeaderboardEntry.objects.create(
+                        period=period, period_start=start, quiz_id=quiz_id,
+                        user_id=user_id, score=score, attempts=1,
+                        updated_at=completed_at)
+                return score
+            except IntegrityError:
+                # A concurrent submit created this entry first
+                entry = entries.select_for_update().get()
+        gain = max(score - entry.score, 0)
+        changes = {'attempts': F('attempts') + 1}
+        if gain:
+            changes.update(score=score, updated_at=completed_at)
+        entries.update(**changes)
+    return gain
+
+
+def _add_gain(period, start, user_id, gain, completed_at):
+    """Add a best-score gain to a user's global entry."""
+    entries = LeaderboardEntry.objects.filter(
+        period=period, period_start=start, quiz_id=None, user_id=user_id)
+    changes = {'attempts': F('attempts') + 1}
+    if gain:
+        changes.update(
+            score=F('score') + gain, updated_at=Value(completed_at))
+    if entries.update(**changes):
+        return
+
+    try:
+        with transaction.atomic():
+            LeaderboardEntry.objects.create(
+                period=period, period_start=start, user_id=user_id,
+                score=gain, attempts=1, updated_at=completed_at)
+    except IntegrityError:
+        # A concurrent submit created this entry first
+        entries.update(**changes)
+
+
+def record_attempt(user_id, quiz_id, score, completed_at):
+    """Add a completed attempt to every leaderboard it counts towards."""
+    day = timezone.localdate(completed_at)
+    for period in Period.values:
+        start = period_start(period, day)
+        gain = _raise_best(
+            period, start, quiz_id, user_id, score, completed_at)
+        _add_gain(period, start, user_id, gain, completed_at)
+
+
+def board_entries(period, quiz_id=None, day=None):
+    """Return the entries of one board for the period containing day."""
+    start = period_start(period, day or timezone.localdate())
+    return LeaderboardEntry.objects.filter(
+        period=period, period_start=start, quiz_id=quiz_id)
+
+
+def top_entries(period, quiz_id=None, limit=TOP_SIZE, day=None):
+    """
+    Return the top entries of a board, best first.
+
+    Each entry carries its rank; tied scores share a rank.
+    """
+    entries = list(
+        board_entries(period, quiz_id, day).select_related('user').order_by(
+            '-score', 'updated_at')[:limit])
+    for position, entry in enumerate(entries):
+        previous = entries[position - 1] if position else None
+        if previous is not None and previous.score == entry.score:
+            entry.rank = previous.rank
+        else:
+            entry.rank = position + 1
+    return entries
+
+
+def user_rank(user_id, period, quiz_id=None, day=None):
+    """
+    Return a user's entry on a board with its rank, or None if absent.
+
+    The rank is one more than the number of entries with a higher score.
+    """
+    entries = board_entries(period, quiz_id, day)
+    entry = entries.filter(user_id=user_id).first()
+    if entry is not None:
+        entry.rank = entries.filter(score__gt=entry.score).count() + 1
+    return entry
+
+
+def _aggregate(attempts, period):
+    """
+    Return each user's best score per quiz from an attempt queryset.
+
+    Rows are (period_start, user_id, quiz_id, score, attempts, updated_at)
+    ordered by their key so that several sources can be merged.
+    """
+    attempts = attempts.filter(
+        user__isnull=False, completed_at__isnull=False)
+    if period in PERIOD_TRUNCATIONS:
+        attempts = attempts.annotate(start=PERIOD_TRUNCATIONS[period](
+            'completed_at', tzinfo=timezone.get_current_timezone()))
+    else:
+        attempts = attempts.annotate(start=Value(ALL_TIME_START))
+    keys = ['start', 'user_id', 'quiz_id']
+    rows = attempts.values(*keys).annotate(
+        best=Max('score'),
+        count=Count('id'),
+        last=Max('completed_at'),
+    ).order_by(*keys).values_list(*keys, 'best', 'count', 'last')
+
+    for row in rows.iterator(chunk_size=2000):
+        start = row[0].date() if hasattr(row[0], 'date') else row[0]
+        yield (start, *row[1:])
+
+
+def rebuild_leaderboards(batch_size=2000, progress=None):
+    """
+    Recompute every leaderboard from live and archived attempts.
+
+    Tie order after a rebuild follows each user's latest attempt rather
+    than when their best score was first reached.
+
+    Args:
+        batch_size: Number of entries inserted per statement
+        progress: Optional callable receiving the running total
+
+    Returns:
+        The number of entries written
+    """
+    written = 0
+    batch = []
+
+    def add(entry):
+        nonlocal written, batch
+        batch.append(entry)
+        if len(batch) >= batch_size:
+            LeaderboardEntry.objects.bulk_create(batch)
+            written += len(batch)
+            batch = []
+            if progress:
+                progress(written)
+
+    with transaction.atomic():
+        LeaderboardEntry.objects.all().delete()
+        for period in Period.values:
+            rows = heapq.merge(
+                _aggregate(QuizAttempt.objects, period),
+                _aggregate(ArchivedQuizAttempt.objects, period),
+                key=lambda row: row[:3],
+            )
+            for (start, user_id), user_rows in groupby(
+                    rows, key=lambda row: row[:2]):
+                quiz_entries = []
+                for (_, _, quiz_id), group in groupby(
+                        user_rows, key=lambda row: row[:3]):
+                    group = list(group)
+                    quiz_entries.append(LeaderboardEntry(
+                        period=period,
+                        period_start=start,
+                        quiz_id=quiz_id,
+                        user_id=user_id,
+                        score=max(row[3] for row in group),
+                        attempts=sum(row[4] for row in group),
+                        updated_at=max(row[5] for row in group),
+                    ))
+                for entry in quiz_entries:
+                    add(entry)
+                add(LeaderboardEntry(
+                    period=period,
+                    period_start=start,
+                    user_id=user_id,
+                    score=sum(entry.score for entry in quiz_entries),
+                    attempts=sum(entry.attempts for entry in quiz_entries),
+                    updated_at=max(
+                        entry.updated_at for entry in quiz_entries),
+                ))
+        LeaderboardEntry.objects.bulk_create(batch)
+        written += len(batch)
+    if progress:
+        progress(written)
+    return written
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from quizzes.archive import archive_attempts, archive_cutoff
+
+
+class Command(BaseCommand):
+    help = 'Move quiz attempts older than the archive horizon to cold storage.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            help='Archive attempts older than this many days '
+                 '(default: ATTEMPT_ARCHIVE_AFTER_DAYS).',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of attempts moved per transaction.',
+        )
+
+    def handle(self, *args, **options):
+        before = archive_cutoff(options['days'])
+        self.stdout.write(f'Archiving attempts started before {before:%Y-%m-%d}...')
+
+        moved = archive_attempts(
+            before,
+            batch_size=options['batch_size'],
+            progress=lambda total: self.stdout.write(f'  {total} moved'),
+        )
+        self.stdout.write(self.style.SUCCESS(f'Archived {moved} attempts.'))
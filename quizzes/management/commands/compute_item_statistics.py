@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from quizzes.psychometrics import compute_item_statistics
+
+
+class Command(BaseCommand):
+    help = ('Recompute question difficulty, discrimination, distractor '
+            'and reliability statistics from quiz attempts.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=2000,
+            help='Number of rows inserted per statement.',
+        )
+
+    def handle(self, *args, **options):
+        quizzes, attempts = compute_item_statistics(
+            batch_size=options['batch_size'],
+            progress=lambda total: self.stdout.write(
+                f'  {total} quizzes analysed'),
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Analysed {attempts} attempts at {quizzes} quizzes.'))
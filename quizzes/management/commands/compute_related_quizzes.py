@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from quizzes.recommendations import (
+    MIN_CO_ATTEMPTS, TOP_K, compute_related_quizzes)
+
+
+class Command(BaseCommand):
+    help = 'Recompute the related quizzes shown after each quiz.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top-k',
+            type=int,
+            default=TOP_K,
+            help='Number of related quizzes stored per quiz.',
+        )
+        parser.add_argument(
+            '--min-co-attempts',
+            type=int,
+            default=MIN_CO_ATTEMPTS,
+            help='Fewest users two quizzes must share to be related.',
+        )
+
+    def handle(self, *args, **options):
+        written = compute_related_quizzes(
+            top_k=options['top_k'],
+            min_co_attempts=options['min_co_attempts'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Stored {written} related quiz links.'))
@@ -0,0 +1,56 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from quizzes.models import Question, Quiz
+from quizzes.quiz_bank import EXPORTERS, FORMATS, detect_format
+
+
+class Command(BaseCommand):
+    help = 'Export quizzes and their questions as NDJSON or GIFT.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='File to write, or - for standard output.')
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            help='File format; guessed from the extension if omitted.',
+        )
+        parser.add_argument(
+            '--creator',
+            help='Only export quizzes created by this username.',
+        )
+        parser.add_argument(
+            '--quiz',
+            action='append',
+            default=[],
+            metavar='SLUG',
+            help='Only export this quiz; may be repeated.',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or (
+            'ndjson' if path == '-' else detect_format(path))
+        if file_format is None:
+            raise CommandError(
+                'Cannot tell the file format; pass --format.')
+
+        quizzes = Quiz.objects.all()
+        if options['creator']:
+            quizzes = quizzes.filter(creator__username=options['creator'])
+        if options['quiz']:
+            quizzes = quizzes.filter(slug__in=options['quiz'])
+
+        if path == '-':
+            sys.stdout.writelines(EXPORTERS[file_format](quizzes))
+            return
+        try:
+            with open(path, 'w', encoding='utf-8') as output:
+                output.writelines(EXPORTERS[file_format](quizzes))
+        except OSError as e:
+            raise CommandError(e)
+        questions = Question.objects.filter(quiz__in=quizzes).count()
+        self.stdout.write(self.style.SUCCESS(
+            f'Exported {questions} questions to {path}.'))
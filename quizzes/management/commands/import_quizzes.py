@@ -0,0 +1,58 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from quizzes.quiz_bank import FORMATS, detect_format, import_quizzes
+
+
+class Command(BaseCommand):
+    help = 'Import quizzes from an NDJSON or GIFT file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import.')
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            help='File format; guessed from the extension if omitted.',
+        )
+        parser.add_argument(
+            '--creator',
+            help='Username to set as creator of the imported quizzes.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of questions written per transaction.',
+        )
+
+    def handle(self, *args, **options):
+        file_format = options['format'] or detect_format(options['path'])
+        if file_format is None:
+            raise CommandError(
+                'Cannot tell the file format; pass --format.')
+        creator = None
+        if options['creator']:
+            creator = User.objects.filter(
+                username=options['creator']).first()
+            if creator is None:
+                raise CommandError(f'No user named {options["creator"]}.')
+
+        try:
+            with open(options['path'], encoding='utf-8') as lines:
+                result = import_quizzes(
+                    lines, file_format, creator=creator,
+                    batch_size=options['batch_size'],
+                    progress=lambda total: self.stdout.write(
+                        f'  {total} questions imported'),
+                )
+        except OSError as e:
+            raise CommandError(e)
+
+        for error in result.errors:
+            self.stderr.write(error)
+        if result.error_count > len(result.errors):
+            self.stderr.write(
+                f'... and {result.error_count - len(result.errors)} more')
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {result.questions} questions in {result.quizzes} '
+            f'quizzes, skipped {result.error_count} invalid records.'))
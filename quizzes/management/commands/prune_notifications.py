@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+
+from quizzes.retention import NotificationRetentionPolicy
+
+
+class Command(BaseCommand):
+    help = (
+        'Apply the notification retention policy: delete old read '
+        'notifications, roll up old unread ones and cap each user\'s total.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--keep-last', type=int,
+            help='Notifications kept per user (default: settings).')
+        parser.add_argument(
+            '--read-days', type=int,
+            help='Delete read notifications older than this many days.')
+        parser.add_argument(
+            '--rollup-days', type=int,
+            help='Summarise unread notifications older than this many days.')
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Rows deleted per statement.')
+        parser.add_argument(
+            '--pause', type=float, default=0,
+            help='Seconds to sleep between batches to spread the load.')
+
+    def handle(self, *args, **options):
+        policy = NotificationRetentionPolicy(
+            keep_last=options['keep_last'],
+            delete_read_after_days=options['read_days'],
+            rollup_after_days=options['rollup_days'],
+            batch_size=options['batch_size'],
+            pause=options['pause'],
+        )
+        metrics = policy.apply()
+
+        for label, key in (
+            ('Read notifications deleted', 'read_deleted'),
+            ('Notifications rolled up', 'rolled_up'),
+            ('Summaries created', 'summaries_created'),
+            ('Over-limit rows deleted', 'over_limit_deleted'),
+        ):
+            self.stdout.write(f'{label + ":":<29}{metrics[key]}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Reclaimed {metrics["rows_reclaimed"]} rows '
+            f'in {metrics["seconds"]}s.'))
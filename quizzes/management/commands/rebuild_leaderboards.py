@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from quizzes.leaderboards import rebuild_leaderboards
+
+
+class Command(BaseCommand):
+    help = 'Recompute every leaderboard from live and archived attempts.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=2000,
+            help='Number of entries inserted per statement.',
+        )
+
+    def handle(self, *args, **options):
+        written = rebuild_leaderboards(
+            batch_size=options['batch_size'],
+            progress=lambda total: self.stdout.write(f'  {total} written'),
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {written} leaderboard entries.'))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from quizzes.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search documents of every quiz.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of quizzes indexed per batch.',
+        )
+
+    def handle(self, *args, **options):
+        indexed = rebuild_index(
+            batch_size=options['batch_size'],
+            progress=lambda total: self.stdout.write(f'  {total} indexed'),
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Indexed {indexed} quizzes for search.'))
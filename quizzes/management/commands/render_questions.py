@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+
+from quizzes.models import Question
+from quizzes.rendering import HTML_FIELDS, RENDERER_VERSION, render_question
+
+
+class Command(BaseCommand):
+    help = 'Store rendered HTML for questions from an older renderer.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Re-render every question, not only stale ones.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of questions rendered per query.',
+        )
+
+    def handle(self, *args, **options):
+        questions = Question.objects.select_related('quiz').order_by('pk')
+        if not options['all']:
+            questions = questions.exclude(render_version=RENDERER_VERSION)
+
+        rendered = last_pk = 0
+        while True:
+            batch = list(
+                questions.filter(pk__gt=last_pk)[:options['batch_size']])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+
+            for question in batch:
+                render_question(question)
+            Question.objects.bulk_update(
+                batch, [*HTML_FIELDS, 'render_version'])
+            rendered += len(batch)
+            self.stdout.write(f'  {rendered} rendered')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rendered {rendered} questions with renderer '
+            f'v{RENDERER_VERSION}.'))
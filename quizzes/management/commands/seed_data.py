@@ -0,0 +1,104 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from quizzes.leaderboards import rebuild_leaderboards
+from quizzes.models import Quiz
+from quizzes.recommendations import compute_related_quizzes
+from quizzes.search import rebuild_index
+from quizzes.seeding import (
+    BASE_COUNTS, QUESTIONS_PER_QUIZ, SAVED_PER_USER, scaled_counts,
+    seed_dataset)
+
+
+class Command(BaseCommand):
+    help = ('Fill the database with a reproducible synthetic dataset for '
+            'benchmarking.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale',
+            type=float,
+            default=1,
+            help='Multiplier for every table size; scale 1 creates '
+                 + ', '.join(f'{count} {name}'
+                             for name, count in BASE_COUNTS.items()) + '.',
+        )
+        for name in BASE_COUNTS:
+            parser.add_argument(
+                f'--{name}',
+                type=int,
+                help=f'Number of {name}, overriding --scale.',
+            )
+        parser.add_argument(
+            '--questions-per-quiz',
+            type=int,
+            default=QUESTIONS_PER_QUIZ,
+        )
+        parser.add_argument(
+            '--saved-per-user',
+            type=float,
+            default=SAVED_PER_USER,
+            help='Average number of quizzes saved by each user.',
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=180,
+            help='Spread attempts and notifications over this many days.',
+        )
+        parser.add_argument(
+            '--prefix',
+            default='seed',
+            help='Prefix of the seeded usernames and quiz slugs.',
+        )
+        parser.add_argument(
+            '--password',
+            default='password',
+            help='Password of every seeded user.',
+        )
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10_000,
+            help='Number of rows inserted per transaction.',
+        )
+        parser.add_argument(
+            '--no-derived',
+            action='store_true',
+            help='Skip rebuilding the search index, leaderboards and '
+                 'related quizzes afterwards.',
+        )
+
+    def handle(self, *args, **options):
+        counts = scaled_counts(options['scale'], **{
+            name: options[name] for name in BASE_COUNTS})
+        start = time.monotonic()
+        try:
+            created = seed_dataset(
+                counts,
+                questions_per_quiz=options['questions_per_quiz'],
+                saved_per_user=options['saved_per_user'],
+                days=options['days'],
+                prefix=options['prefix'],
+                password=options['password'],
+                seed=options['seed'],
+                batch_size=options['batch_size'],
+                progress=lambda label, total: self.stdout.write(
+                    f'  {total} {label}'),
+            )
+        except ValueError as e:
+            raise CommandError(e)
+
+        if not options['no_derived']:
+            self.stdout.write('Rebuilding derived data...')
+            rebuild_index(Quiz.objects.filter(
+                slug__startswith=f'{options["prefix"]}-quiz-'))
+            rebuild_leaderboards()
+            compute_related_quizzes()
+
+        self.stdout.write(self.style.SUCCESS(
+            'Created ' + ', '.join(
+                f'{count} {name}' for name, count in created.items())
+            + f' in {time.monotonic() - start:.0f} s.'))
@@ -0,0 +1,91 @@
+"""
+Per-user question mastery and spaced-repetition review sessions.
+
+Each answered question moves through Leitner boxes 1-5: a correct answer
+moves it up one box and schedules the next review REVIEW_INTERVAL_DAYS
+later, a wrong or skipped answer sends it back to box 1, due at once.
+Review sessions read the due questions from mastery_user_due_idx rather
+than replaying the user's attempt history.
+"""
+
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import Question, QuestionMastery
+
+# Days until the next review for a question in box 1, 2, ... 5
+REVIEW_INTERVAL_DAYS = (1, 3, 7, 14, 30)
+MAX_BOX = len(REVIEW_INTERVAL_DAYS)
+
+REVIEW_SESSION_SIZE = 10
+
+UPDATE_FIELDS = [
+    'box', 'streak', 'times_seen', 'times_correct', 'last_seen', 'due_at']
+
+
+def schedule(mastery, correct, seen_at):
+    """Apply one answer to a mastery row and set its next due date."""
+    mastery.times_seen += 1
+    mastery.last_seen = seen_at
+    if correct:
+        mastery.box = min(mastery.box + 1, MAX_BOX)
+        mastery.streak += 1
+        mastery.times_correct += 1
+        mastery.due_at = seen_at + timedelta(
+            days=REVIEW_INTERVAL_DAYS[mastery.box - 1])
+    else:
+        mastery.box = 1
+        mastery.streak = 0
+        mastery.due_at = seen_at
+
+
+def record_answers(user_id, graded, seen_at):
+    """
+    Update a user's mastery of the questions they just answered.
+
+    Args:
+        user_id: The user who answered
+        graded: Dict of {question_id: answered correctly}
+        seen_at: When the answers were given
+    """
+    existing = {
+        mastery.question_id: mastery
+        for mastery in QuestionMastery.objects.filter(
+            user_id=user_id, question_id__in=graded)
+    }
+    new_rows = []
+    for question_id, correct in graded.items():
+        mastery = existing.get(question_id)
+        if mastery is None:
+            mastery = QuestionMastery(
+                user_id=user_id, question_id=question_id)
+            new_rows.append(mastery)
+        schedule(mastery, correct, seen_at)
+    QuestionMastery.objects.bulk_update(existing.values(), UPDATE_FIELDS)
+    # A concurrent submit may have created some rows since they were read
+    QuestionMastery.objects.bulk_create(
+        new_rows, update_conflicts=True, unique_fields=['user', 'question'],
+        update_fields=UPDATE_FIELDS)
+
+
+def due_mastery(user, now=None):
+    """Return the user's mastery rows due for review, most overdue first."""
+    return QuestionMastery.objects.filter(
+        user=user, due_at__lte=now or timezone.now()).order_by('due_at')
+
+
+def due_questions(user, limit=REVIEW_SESSION_SIZE):
+    """Return the rendered questions of the user's next review session."""
+    question_ids = list(
+        due_mastery(user).values_list('question_id', flat=True)[:limit])
+    questions = Question.objects.filter(pk__in=question_ids).select_related(
+        'quiz').rendered()
+    position = {question_id: i for i, question_id in enumerate(question_ids)}
+    return sorted(questions, key=lambda question: position[question.pk])
+
+
+def next_due(user):
+    """Return when the user's next question falls due, or None."""
+    return QuestionMastery.objects.filter(user=user).order_by(
+        'due_at').values_list('due_at', flat=True).first()
@@ -0,0 +1,43 @@
+"""
+Server-Timing header for load tests and browser dev tools.
+
+Reports the time a request spent in Django and in database queries, e.g.
+"Server-Timing: app;dur=12.4, db;dur=3.1". A client subtracting app from
+its own latency sees how long the request queued for a worker. Only
+installed when settings.SERVER_TIMING is on, since the header reveals
+timings to anyone.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+
+class ServerTimingMiddleware:
+    """Add app and database durations to every response."""
+
+    def __init__(self, get_response):
+        if not settings.SERVER_TIMING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        db_time = 0.0
+
+        def timed_query(execute, sql, params, many, context):
+            nonlocal db_time
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                db_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        with connection.execute_wrapper(timed_query):
+            response = self.get_response(request)
+        app_time = time.perf_counter() - start
+        response['Server-Timing'] = (
+            f'app;dur={app_time * 1000:.1f}, db;dur={db_time * 1000:.1f}')
+        return response
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.8 on 2026-10-19 11:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0005_add_related_quiz_to_notification'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='question',
+            options={'ordering': ['order', 'id']},
+        ),
+        migrations.AddField(
+            model_name='quizattempt',
+            name='answer_string',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AlterField(
+            model_name='quizattempt',
+            name='answers',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='QuizVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveIntegerField()),
+                ('question_ids', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('quiz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='versions', to='quizzes.quiz')),
+            ],
+            options={
+                'ordering': ['quiz', '-number'],
+            },
+        ),
+        migrations.AddField(
+            model_name='quizattempt',
+            name='version',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='attempts', to='quizzes.quizversion'),
+        ),
+        migrations.AddConstraint(
+            model_name='quizversion',
+            constraint=models.UniqueConstraint(fields=('quiz', 'number'), name='unique_quiz_version_number'),
+        ),
+    ]
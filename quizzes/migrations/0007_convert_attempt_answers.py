@@ -0,0 +1,112 @@
+"""
+Convert legacy JSON attempt answers to the compact answer string.
+
+Rows are processed in primary key order in small batches, each in its own
+transaction, so the conversion never holds a long lock on the attempts table.
+Attempts whose answers reference questions that no longer exist keep their
+JSON answers and are read through the legacy path.
+"""
+
+from django.db import migrations, transaction
+
+from quizzes.answers import decode_answers, encode_answers
+
+BATCH_SIZE = 1000
+
+
+def _version_for(apps, quiz_id, versions):
+    """Return (and memoize) version 1 of a quiz built from its questions."""
+    if quiz_id not in versions:
+        Question = apps.get_model('quizzes', 'Question')
+        QuizVersion = apps.get_model('quizzes', 'QuizVersion')
+        question_ids = list(
+            Question.objects.filter(quiz_id=quiz_id)
+            .order_by('order', 'id')
+            .values_list('id', flat=True)
+        )
+        version = QuizVersion.objects.filter(
+            quiz_id=quiz_id).order_by('-number').first()
+        if version is None:
+            version = QuizVersion.objects.create(
+                quiz_id=quiz_id,
+                number=1,
+                question_ids=','.join(map(str, question_ids)),
+            )
+        version.ids = [int(i) for i in version.question_ids.split(',') if i]
+        versions[quiz_id] = version
+    return versions[quiz_id]
+
+
+def compact_answers(apps, schema_editor):
+    QuizAttempt = apps.get_model('quizzes', 'QuizAttempt')
+    pending = QuizAttempt.objects.filter(
+        version__isnull=True, answers__isnull=False).order_by('pk')
+    versions = {}
+    last_pk = 0
+
+    while True:
+        batch = list(
+            pending.filter(pk__gt=last_pk)
+            .only('pk', 'quiz_id', 'answers')[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        last_pk = batch[-1].pk
+
+        converted = []
+        for attempt in batch:
+            version = _version_for(apps, attempt.quiz_id, versions)
+            answered_ids = {int(key) for key in attempt.answers}
+            if not answered_ids.issubset(version.ids):
+                continue
+            attempt.version_id = version.pk
+            attempt.answer_string = encode_answers(
+                version.ids, attempt.answers)
+            attempt.answers = None
+            converted.append(attempt)
+
+        with transaction.atomic():
+            QuizAttempt.objects.bulk_update(
+                converted, ['version', 'answer_string', 'answers'])
+
+
+def expand_answers(apps, schema_editor):
+    QuizAttempt = apps.get_model('quizzes', 'QuizAttempt')
+    pending = QuizAttempt.objects.filter(
+        version__isnull=False).select_related('version').order_by('pk')
+    last_pk = 0
+
+    while True:
+        batch = list(pending.filter(pk__gt=last_pk)[:BATCH_SIZE])
+        if not batch:
+            break
+        last_pk = batch[-1].pk
+
+        for attempt in batch:
+            question_ids = [
+                int(i) for i in attempt.version.question_ids.split(',') if i
+            ]
+            attempt.answers = {
+                str(question_id): answer
+                for question_id, answer in decode_answers(
+                    question_ids, attempt.answer_string).items()
+            }
+            attempt.version = None
+            attempt.answer_string = ''
+
+        with transaction.atomic():
+            QuizAttempt.objects.bulk_update(
+                batch, ['version', 'answer_string', 'answers'])
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('quizzes', '0006_compact_attempt_answers'),
+    ]
+
+    operations = [
+        migrations.RunPython(compact_answers, expand_answers),
+    ]
@@ -0,0 +1,101 @@
+# Generated by Django 5.2.8 on 2026-10-19 11:08
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# PostgreSQL stores archived attempts in a table range-partitioned by month.
+# The primary key has to include the partition key, so it is (id, started_at)
+# in the database while Django keeps treating id as the primary key.
+POSTGRES_CREATE_ARCHIVE = """
+CREATE TABLE quizzes_archivedquizattempt (
+    id bigint NOT NULL,
+    session_key varchar(40) NOT NULL,
+    score integer NOT NULL CHECK (score >= 0),
+    total_questions integer NOT NULL CHECK (total_questions >= 0),
+    answer_string text NOT NULL,
+    answers jsonb NULL,
+    completed_at timestamp with time zone NULL,
+    started_at timestamp with time zone NOT NULL,
+    archived_at timestamp with time zone NOT NULL,
+    quiz_id bigint NOT NULL
+        REFERENCES quizzes_quiz (id) DEFERRABLE INITIALLY DEFERRED,
+    user_id integer NULL
+        REFERENCES auth_user (id) DEFERRABLE INITIALLY DEFERRED,
+    version_id bigint NULL
+        REFERENCES quizzes_quizversion (id) DEFERRABLE INITIALLY DEFERRED,
+    PRIMARY KEY (id, started_at)
+) PARTITION BY RANGE (started_at);
+CREATE TABLE quizzes_archivedquizattempt_default
+    PARTITION OF quizzes_archivedquizattempt DEFAULT;
+CREATE INDEX archived_attempt_user_idx
+    ON quizzes_archivedquizattempt (user_id, started_at DESC);
+CREATE INDEX archived_attempt_quiz_idx
+    ON quizzes_archivedquizattempt (quiz_id);
+CREATE INDEX archived_attempt_version_idx
+    ON quizzes_archivedquizattempt (version_id);
+"""
+
+
+def create_archive_table(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(POSTGRES_CREATE_ARCHIVE)
+    else:
+        schema_editor.create_model(
+            apps.get_model('quizzes', 'ArchivedQuizAttempt'))
+
+
+def drop_archive_table(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        # Dropping the parent drops every monthly partition with it
+        schema_editor.execute(
+            'DROP TABLE IF EXISTS quizzes_archivedquizattempt CASCADE')
+    else:
+        schema_editor.delete_model(
+            apps.get_model('quizzes', 'ArchivedQuizAttempt'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0007_convert_attempt_answers'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='quizattempt',
+            index=models.Index(fields=['user', '-started_at'], name='attempt_user_started_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quizattempt',
+            index=models.Index(fields=['started_at'], name='attempt_started_idx'),
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='ArchivedQuizAttempt',
+                    fields=[
+                        ('session_key', models.CharField(blank=True, max_length=40)),
+                        ('score', models.PositiveIntegerField(default=0)),
+                        ('total_questions', models.PositiveIntegerField(default=0)),
+                        ('answer_string', models.TextField(blank=True)),
+                        ('answers', models.JSONField(blank=True, null=True)),
+                        ('completed_at', models.DateTimeField(blank=True, null=True)),
+                        ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                        ('started_at', models.DateTimeField()),
+                        ('archived_at', models.DateTimeField(auto_now_add=True)),
+                        ('quiz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_attempts', to='quizzes.quiz')),
+                        ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='archived_quiz_attempts', to=settings.AUTH_USER_MODEL)),
+                        ('version', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='archived_attempts', to='quizzes.quizversion')),
+                    ],
+                    options={
+                        'ordering': ['-started_at'],
+                        'abstract': False,
+                        'indexes': [models.Index(fields=['user', '-started_at'], name='archived_attempt_user_idx')],
+                    },
+                ),
+            ],
+        ),
+        migrations.RunPython(create_archive_table, drop_archive_table),
+    ]
@@ -0,0 +1,103 @@
+# Generated by Django 5.2.8 on 2026-10-19 11:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# PostgreSQL derives a weighted search vector from each document in a stored
+# generated column, so saving the row is all it takes to keep it indexed.
+POSTGRES_CREATE_INDEX = """
+ALTER TABLE quizzes_quizsearchdocument
+    ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', title), 'A')
+        || setweight(to_tsvector('english', body), 'B')
+    ) STORED;
+CREATE INDEX quiz_search_vector_idx
+    ON quizzes_quizsearchdocument USING GIN (search_vector);
+"""
+
+POSTGRES_DROP_INDEX = """
+DROP INDEX IF EXISTS quiz_search_vector_idx;
+ALTER TABLE quizzes_quizsearchdocument DROP COLUMN IF EXISTS search_vector;
+"""
+
+# SQLite mirrors the documents into an external-content FTS5 table, kept in
+# step by triggers on the document table.
+SQLITE_CREATE_INDEX = [
+    """
+    CREATE VIRTUAL TABLE quizzes_quizsearch_fts USING fts5(
+        title, body,
+        content='quizzes_quizsearchdocument', content_rowid='quiz_id',
+        tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER quizzes_quizsearch_ai
+    AFTER INSERT ON quizzes_quizsearchdocument BEGIN
+        INSERT INTO quizzes_quizsearch_fts (rowid, title, body)
+        VALUES (new.quiz_id, new.title, new.body);
+    END
+    """,
+    """
+    CREATE TRIGGER quizzes_quizsearch_ad
+    AFTER DELETE ON quizzes_quizsearchdocument BEGIN
+        INSERT INTO quizzes_quizsearch_fts (
+            quizzes_quizsearch_fts, rowid, title, body)
+        VALUES ('delete', old.quiz_id, old.title, old.body);
+    END
+    """,
+    """
+    CREATE TRIGGER quizzes_quizsearch_au
+    AFTER UPDATE ON quizzes_quizsearchdocument BEGIN
+        INSERT INTO quizzes_quizsearch_fts (
+            quizzes_quizsearch_fts, rowid, title, body)
+        VALUES ('delete', old.quiz_id, old.title, old.body);
+        INSERT INTO quizzes_quizsearch_fts (rowid, title, body)
+        VALUES (new.quiz_id, new.title, new.body);
+    END
+    """,
+]
+
+SQLITE_DROP_INDEX = [
+    'DROP TRIGGER IF EXISTS quizzes_quizsearch_ai',
+    'DROP TRIGGER IF EXISTS quizzes_quizsearch_ad',
+    'DROP TRIGGER IF EXISTS quizzes_quizsearch_au',
+    'DROP TABLE IF EXISTS quizzes_quizsearch_fts',
+]
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(POSTGRES_CREATE_INDEX)
+    elif vendor == 'sqlite':
+        for statement in SQLITE_CREATE_INDEX:
+            schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(POSTGRES_DROP_INDEX)
+    elif vendor == 'sqlite':
+        for statement in SQLITE_DROP_INDEX:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0010_question_rendered_html'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuizSearchDocument',
+            fields=[
+                ('quiz', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='quizzes.quiz')),
+                ('title', models.CharField(max_length=200)),
+                ('body', models.TextField(blank=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
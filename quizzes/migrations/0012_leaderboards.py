@@ -0,0 +1,34 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:03
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0011_quiz_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('week', 'This week'), ('month', 'This month'), ('all', 'All time')], max_length=5)),
+                ('period_start', models.DateField()),
+                ('score', models.PositiveIntegerField(default=0)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField()),
+                ('quiz', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to='quizzes.quiz')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Leaderboard entries',
+                'indexes': [models.Index(fields=['period', 'period_start', 'quiz', '-score', 'updated_at'], name='leaderboard_rank_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('quiz__isnull', True)), fields=('period', 'period_start', 'user'), name='unique_global_leaderboard_entry'), models.UniqueConstraint(condition=models.Q(('quiz__isnull', False)), fields=('period', 'period_start', 'quiz', 'user'), name='unique_quiz_leaderboard_entry')],
+            },
+        ),
+    ]
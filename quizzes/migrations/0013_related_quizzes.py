@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0012_leaderboards'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedQuiz',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+                ('quiz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_links', to='quizzes.quiz')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='quizzes.quiz')),
+            ],
+            options={
+                'ordering': ['quiz', 'rank'],
+                'constraints': [models.UniqueConstraint(fields=('quiz', 'rank'), name='unique_related_quiz_rank')],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:14
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0013_related_quizzes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionMastery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('box', models.PositiveSmallIntegerField(default=0)),
+                ('streak', models.PositiveIntegerField(default=0)),
+                ('times_seen', models.PositiveIntegerField(default=0)),
+                ('times_correct', models.PositiveIntegerField(default=0)),
+                ('last_seen', models.DateTimeField()),
+                ('due_at', models.DateTimeField()),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mastery', to='quizzes.question')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='question_mastery', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Question mastery',
+                'indexes': [models.Index(fields=['user', 'due_at'], name='mastery_user_due_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'question'), name='unique_user_question_mastery')],
+            },
+        ),
+    ]
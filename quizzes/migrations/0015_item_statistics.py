@@ -0,0 +1,44 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0014_question_mastery'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionStatistics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('responses', models.PositiveIntegerField()),
+                ('difficulty', models.FloatField()),
+                ('discrimination', models.FloatField(null=True)),
+                ('choice_rates', models.JSONField()),
+                ('choice_discrimination', models.JSONField()),
+                ('question', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='statistics', to='quizzes.question')),
+            ],
+            options={
+                'verbose_name_plural': 'Question statistics',
+            },
+        ),
+        migrations.CreateModel(
+            name='QuizStatistics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attempts', models.PositiveIntegerField()),
+                ('mean_score', models.FloatField()),
+                ('score_sd', models.FloatField()),
+                ('kr20', models.FloatField(null=True)),
+                ('computed_at', models.DateTimeField()),
+                ('quiz', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='statistics', to='quizzes.quiz')),
+            ],
+            options={
+                'verbose_name_plural': 'Quiz statistics',
+            },
+        ),
+    ]
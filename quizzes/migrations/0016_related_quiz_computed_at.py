@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:16
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0015_item_statistics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='relatedquiz',
+            name='computed_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
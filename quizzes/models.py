@@ -1,6 +1,9 @@
-from django.db import models
+from django.db import models, transaction, IntegrityError
 from django.contrib.auth.models import User
+from django.utils import timezone
 from django.utils.text import slugify
+from .answers import decode_answers
+from .rendering import HTML_FIELDS, RENDERER_VERSION, render_question
 
 
 class Quiz(models.Model):
@@ -33,6 +36,12 @@ class Quiz(models.Model):
     def __str__(self):
         return self.title
 
+    @property
+    def revision(self):
+        """Return a token that changes whenever the quiz or a question does."""
+        updated = self.updated_at
+        return str(int(updated.timestamp()) * 1_000_000 + updated.microsecond)
+
     def save(self, *args, **kwargs):
         if not self.slug:
             base_slug = slugify(self.title)
@@ -45,6 +54,28 @@ class Quiz(models.Model):
         super().save(*args, **kwargs)
 
 
+class QuestionQuerySet(models.QuerySet):
+    """QuerySet that keeps the stored question HTML up to date."""
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """Render each question before inserting them all at once."""
+        objs = list(objs)
+        for question in objs:
+            render_question(question)
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def rendered(self):
+        """Return the questions, re-rendering any from an older renderer."""
+        questions = list(self)
+        stale = [q for q in questions if q.render_version != RENDERER_VERSION]
+        if stale:
+            for question in stale:
+                render_question(question)
+            self.model.objects.bulk_update(
+                stale, [*HTML_FIELDS, 'render_version'])
+        return questions
+
+
 class Question(models.Model):
     """Multiple choice question with 4 options."""
 
@@ -71,36 +102,106 @@ class Question(models.Model):
     explanation = models.TextField(blank=True)
     order = models.PositiveIntegerField(default=0)
 
+    # Rendered HTML, refreshed on save and when render_version is stale
+    text_html = models.TextField(blank=True, editable=False)
+    option_a_html = models.TextField(blank=True, editable=False)
+    option_b_html = models.TextField(blank=True, editable=False)
+    option_c_html = models.TextField(blank=True, editable=False)
+    option_d_html = models.TextField(blank=True, editable=False)
+    explanation_html = models.TextField(blank=True, editable=False)
+    render_version = models.PositiveSmallIntegerField(
+        default=0, editable=False)
+
+    objects = QuestionQuerySet.as_manager()
+
     class Meta:
-        ordering = ['order']
+        ordering = ['order', 'id']
 
     def __str__(self):
         return f"Q{self.order}: {self.text[:50]}..."
 
+    def save(self, *args, **kwargs):
+        render_question(self)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {
+                *update_fields, *HTML_FIELDS, 'render_version'}
+        super().save(*args, **kwargs)
+
+
+class QuizVersionManager(models.Manager):
+    """Manager for looking up the version matching a question order."""
+
+    def for_questions(self, quiz, question_ids):
+        """Return the quiz version for question_ids, creating it if new."""
+        question_ids = [int(question_id) for question_id in question_ids]
+        latest = self.filter(quiz=quiz).order_by('-number').first()
+        if latest and latest.get_question_ids() == question_ids:
+            return latest
+
+        number = latest.number + 1 if latest else 1
+        try:
+            with transaction.atomic():
+                return self.create(
+                    quiz=quiz,
+                    number=number,
+                    question_ids=','.join(map(str, question_ids)),
+                )
+        except IntegrityError:
+            # A concurrent submit created this version first
+            return self.get(quiz=quiz, number=number)
 
-class QuizAttempt(models.Model):
-    """Records a user's attempt at a quiz."""
+
+class QuizVersion(models.Model):
+    """Snapshot of a quiz's question order, shared by compact attempts."""
 
     quiz = models.ForeignKey(
         Quiz,
         on_delete=models.CASCADE,
-        related_name='attempts'
-    )
-    user = models.ForeignKey(
-        User,
-        on_delete=models.CASCADE,
-        null=True,
-        blank=True,
-        related_name='quiz_attempts'
+        related_name='versions'
     )
+    number = models.PositiveIntegerField()
+    question_ids = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = QuizVersionManager()
+
+    class Meta:
+        ordering = ['quiz', '-number']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['quiz', 'number'],
+                name='unique_quiz_version_number'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.quiz.title} v{self.number}"
+
+    def get_question_ids(self):
+        """Return the question ids of this version in quiz order."""
+        if not hasattr(self, '_question_ids'):
+            self._question_ids = [
+                int(question_id)
+                for question_id in self.question_ids.split(',') if question_id
+            ]
+        return self._question_ids
+
+
+class BaseQuizAttempt(models.Model):
+    """Fields and helpers shared by live and archived quiz attempts."""
+
     session_key = models.CharField(max_length=40, blank=True)
     score = models.PositiveIntegerField(default=0)
     total_questions = models.PositiveIntegerField(default=0)
-    answers = models.JSONField(default=dict)
-    started_at = models.DateTimeField(auto_now_add=True)
+    answer_string = models.TextField(blank=True)
+    # Legacy per-question JSON answers, only kept for attempts that could
+    # not be mapped onto a quiz version
+    answers = models.JSONField(null=True, blank=True)
     completed_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
+        abstract = True
         ordering = ['-started_at']
 
     def __str__(self):
@@ -114,6 +215,90 @@ class QuizAttempt(models.Model):
             return 0
         return round((self.score / self.total_questions) * 100, 1)
 
+    def get_answers(self):
+        """Return the user's answers as a {question_id: letter} dict."""
+        if self.version_id:
+            return decode_answers(
+                self.version.get_question_ids(), self.answer_string)
+        return {
+            int(question_id): answer
+            for question_id, answer in (self.answers or {}).items()
+        }
+
+
+class QuizAttempt(BaseQuizAttempt):
+    """Records a user's attempt at a quiz."""
+
+    quiz = models.ForeignKey(
+        Quiz,
+        on_delete=models.CASCADE,
+        related_name='attempts'
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='quiz_attempts'
+    )
+    version = models.ForeignKey(
+        QuizVersion,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='attempts'
+    )
+    started_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta(BaseQuizAttempt.Meta):
+        indexes = [
+            models.Index(
+                fields=['user', '-started_at'],
+                name='attempt_user_started_idx'
+            ),
+            models.Index(fields=['started_at'], name='attempt_started_idx'),
+        ]
+
+
+class ArchivedQuizAttempt(BaseQuizAttempt):
+    """
+    Cold storage for attempts older than the archive horizon.
+
+    Rows keep the id of the attempt they were moved from. On PostgreSQL the
+    table is range-partitioned by month on started_at (see migration 0008).
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    quiz = models.ForeignKey(
+        Quiz,
+        on_delete=models.CASCADE,
+        related_name='archived_attempts'
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='archived_quiz_attempts'
+    )
+    version = models.ForeignKey(
+        QuizVersion,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='archived_attempts'
+    )
+    started_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta(BaseQuizAttempt.Meta):
+        indexes = [
+            models.Index(
+                fields=['user', '-started_at'],
+                name='archived_attempt_user_idx'
+            ),
+        ]
+
 
 class Notification(models.Model):
     """User notifications for quiz completions and updates."""
@@ -146,6 +331,250 @@ class Notification(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(
+                fields=['recipient', '-created_at'],
+                name='notification_recipient_idx'
+            ),
+            models.Index(
+                fields=['recipient', 'is_read'],
+                name='notification_unread_idx'
+            ),
+            models.Index(
+                fields=['is_read', 'created_at'],
+                name='notification_retention_idx'
+            ),
+        ]
 
     def __str__(self):
         return f"{self.recipient.username}: {self.message[:30]}..."
+
+
+class QuizSearchDocument(models.Model):
+    """
+    Plain-text copy of a quiz that the full-text search index is built on.
+
+    PostgreSQL keeps a weighted search vector of each row in a generated,
+    GIN-indexed column; SQLite mirrors the rows into an FTS5 table through
+    triggers. Both are created by migration 0011 and queried in search.py.
+    """
+
+    quiz = models.OneToOneField(
+        Quiz,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='search_document'
+    )
+    title = models.CharField(max_length=200)
+    body = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Search document for {self.quiz_id}"
+
+
+class LeaderboardEntry(models.Model):
+    """
+    A user's running score on one leaderboard.
+
+    Boards are identified by period, period_start and quiz: quiz boards
+    keep the user's best score on that quiz, and global boards have no quiz
+    and sum the user's best score on each quiz. Rows are updated as attempts
+    are submitted; see leaderboards.py.
+    """
+
+    class Period(models.TextChoices):
+        WEEK = 'week', 'This week'
+        MONTH = 'month', 'This month'
+        ALL_TIME = 'all', 'All time'
+
+    period = models.CharField(max_length=5, choices=Period.choices)
+    period_start = models.DateField()
+    quiz = models.ForeignKey(
+        Quiz,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='leaderboard_entries'
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='leaderboard_entries'
+    )
+    score = models.PositiveIntegerField(default=0)
+    attempts = models.PositiveIntegerField(default=0)
+    # When the score last improved; earlier achievers rank first on ties
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name_plural = 'Leaderboard entries'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['period', 'period_start', 'user'],
+                condition=models.Q(quiz__isnull=True),
+                name='unique_global_leaderboard_entry'
+            ),
+            models.UniqueConstraint(
+                fields=['period', 'period_start', 'quiz', 'user'],
+                condition=models.Q(quiz__isnull=False),
+                name='unique_quiz_leaderboard_entry'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['period', 'period_start', 'quiz', '-score',
+                        'updated_at'],
+                name='leaderboard_rank_idx'
+            ),
+        ]
+
+    def __str__(self):
+        board = self.quiz_id or 'global'
+        return f"{self.user_id} on {board} {self.period} board: {self.score}"
+
+
+class RelatedQuiz(models.Model):
+    """
+    A quiz recommended after another, ranked by co-attempt similarity.
+
+    Rows are recomputed in bulk by the compute_related_quizzes command;
+    see recommendations.py.
+    """
+
+    quiz = models.ForeignKey(
+        Quiz,
+        on_delete=models.CASCADE,
+        related_name='related_links'
+    )
+    related = models.ForeignKey(
+        Quiz,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+    # When the batch job stored the row; part of quiz page ETags
+    computed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['quiz', 'rank']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['quiz', 'rank'],
+                name='unique_related_quiz_rank'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.quiz_id} -> {self.related_id} (#{self.rank})"
+
+
+class QuestionMastery(models.Model):
+    """
+    How well a user knows one question, scheduled Leitner-style.
+
+    Correct answers move the question up a box and push its next review
+    further out; a wrong answer sends it back to box 1 and makes it due
+    at once. Rows are updated as attempts are submitted; see mastery.py.
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='question_mastery'
+    )
+    question = models.ForeignKey(
+        Question,
+        on_delete=models.CASCADE,
+        related_name='mastery'
+    )
+    box = models.PositiveSmallIntegerField(default=0)
+    streak = models.PositiveIntegerField(default=0)
+    times_seen = models.PositiveIntegerField(default=0)
+    times_correct = models.PositiveIntegerField(default=0)
+    last_seen = models.DateTimeField()
+    due_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name_plural = 'Question mastery'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'question'],
+                name='unique_user_question_mastery'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', 'due_at'],
+                name='mastery_user_due_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} on question {self.question_id}: box {self.box}"
+
+
+class QuizStatistics(models.Model):
+    """
+    Reliability of a quiz's score, from its attempts.
+
+    Recomputed in bulk with QuestionStatistics by the
+    compute_item_statistics command; see psychometrics.py.
+    """
+
+    quiz = models.OneToOneField(
+        Quiz,
+        on_delete=models.CASCADE,
+        related_name='statistics'
+    )
+    attempts = models.PositiveIntegerField()
+    mean_score = models.FloatField()
+    score_sd = models.FloatField()
+    # Kuder-Richardson 20; None when too few complete attempts
+    kr20 = models.FloatField(null=True)
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name_plural = 'Quiz statistics'
+
+    def __str__(self):
+        return f"{self.quiz_id}: {self.attempts} attempts, KR-20 {self.kr20}"
+
+
+class QuestionStatistics(models.Model):
+    """
+    Difficulty, discrimination and distractor analysis of one question.
+
+    choice_rates holds the share of responses per letter, with '-' for
+    skipped, and choice_discrimination the point-biserial correlation of
+    picking each letter with the rest of the score.
+    """
+
+    question = models.OneToOneField(
+        Question,
+        on_delete=models.CASCADE,
+        related_name='statistics'
+    )
+    responses = models.PositiveIntegerField()
+    # Classical p-value: share of responses that were correct
+    difficulty = models.FloatField()
+    # Corrected point-biserial correlation with the rest of the score
+    discrimination = models.FloatField(null=True)
+    choice_rates = models.JSONField()
+    choice_discrimination = models.JSONField()
+
+    class Meta:
+        verbose_name_plural = 'Question statistics'
+
+    def __str__(self):
+        return (f"Question {self.question_id}: p={self.difficulty:.2f}, "
+                f"r={self.discrimination}")
+
+    def choice_rows(self):
+        """Return (letter, share, discrimination) for A-D and skipped."""
+        return [
+            (choice, self.choice_rates.get(choice, 0),
+             self.choice_discrimination.get(choice))
+            for choice in self.choice_rates
+        ]
@@ -0,0 +1,250 @@
+"""
+Classical item analysis of quizzes, computed in batch from their attempts.
+
+For every quiz the answers of all live and archived attempts are loaded
+into an attempts x questions array of answer letters, and these are
+computed with array operations rather than per-attempt loops:
+
+- difficulty: the share of responses to a question that were correct
+  (its p-value; higher means easier);
+- discrimination: the point-biserial correlation between answering a
+  question correctly and the rest of the score, i.e. the total without
+  that question, so the item is not correlated with itself;
+- distractor analysis: for each option, the share of responses choosing
+  it and its correlation with the rest of the score. A working distractor
+  is picked by some attempts and correlates negatively;
+- reliability: Kuder-Richardson 20 over the attempts that were shown
+  every current question.
+
+Attempts are mapped onto the quiz's current questions through their
+QuizVersion, so questions added later count as not presented.
+"""
+
+import heapq
+from itertools import groupby
+
+import numpy as np
+
+from django.db import transaction
+from django.utils import timezone
+
+from .answers import UNANSWERED, encode_answers
+from .models import (
+    ArchivedQuizAttempt, Question, QuestionStatistics, QuizAttempt,
+    QuizStatistics, QuizVersion)
+
+CHOICES = 'ABCD' + UNANSWERED
+NOT_PRESENTED = 0
+LOAD_CHUNK_SIZE = 10000
+
+
+def _attempt_rows(model):
+    return model.objects.order_by('quiz_id').values_list(
+        'quiz_id', 'version_id', 'answer_string', 'answers').iterator(
+            chunk_size=LOAD_CHUNK_SIZE)
+
+
+def response_matrix(question_ids, versions, rows):
+    """
+    Return the answers of a quiz's attempts as a uint8 array.
+
+    Args:
+        question_ids: The quiz's current question ids, in order
+        versions: Dict of {version id: question ids} of the quiz
+        rows: (version_id, answer_string, legacy answers) per attempt
+
+    Returns:
+        An attempts x questions array of answer letter codes, with
+        ord(UNANSWERED) for skipped and NOT_PRESENTED where the attempt's
+        version did not have the question
+    """
+    column = {question_id: i for i, question_id in enumerate(question_ids)}
+    by_version = {}
+    for version_id, answer_string, answers in rows:
+        if version_id not in versions:
+            # Legacy JSON answers are laid out in current question order
+            version_id = None
+            answer_string = encode_answers(question_ids, answers or {})
+        by_version.setdefault(version_id, []).append(answer_string)
+
+    blocks = []
+    for version_id, answer_strings in by_version.items():
+        version_ids = (question_ids if version_id is None
+                       else versions[version_id])
+        width = len(version_ids)
+        codes = np.frombuffer(''.join(
+            answer.ljust(width, UNANSWERED)[:width]
+            for answer in answer_strings
+        ).encode('ascii', 'replace'), dtype=np.uint8).reshape(-1, width)
+        block = np.full(
+            (len(answer_strings), len(question_ids)), NOT_PRESENTED,
+            dtype=np.uint8)
+        kept = [(j, column[question_id])
+                for j, question_id in enumerate(version_ids)
+                if question_id in column]
+        if kept:
+            source, target = map(list, zip(*kept))
+            block[:, target] = codes[:, source]
+        blocks.append(block)
+    if not blocks:
+        return np.empty((0, len(question_ids)), dtype=np.uint8)
+    return np.concatenate(blocks)
+
+
+def _point_biserial(indicator, correct, presented, total):
+    """
+    Correlate indicator columns with the rest score, per question.
+
+    The rest score of an attempt for question j is its total minus its
+    own mark on j; only attempts that were shown question j count.
+    Returns NaN where either side has no variance.
+    """
+    presented = presented.astype(np.float64)
+    indicator = indicator.astype(np.float64)
+    correct = correct.astype(np.float64)
+    n = presented.sum(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sum_correct = correct.sum(axis=0)
+        rest = total @ presented - sum_correct
+        rest_sq = ((total ** 2) @ presented - 2 * (total @ correct)
+                   + sum_correct)
+        y = indicator.sum(axis=0)
+        rest_y = total @ indicator - (indicator * correct).sum(axis=0)
+
+        mean_rest, mean_y = rest / n, y / n
+        covariance = rest_y / n - mean_rest * mean_y
+        var_rest = rest_sq / n - mean_rest ** 2
+        var_y = mean_y * (1 - mean_y)
+        r = covariance / np.sqrt(var_rest * var_y)
+    # Rounding can leave a tiny negative variance where there is none
+    r[~((var_rest > 1e-12) & (var_y > 1e-12))] = np.nan
+    return r
+
+
+def item_statistics(responses, key):
+    """
+    Compute item and test statistics from a response matrix.
+
+    Args:
+        responses: Array from response_matrix
+        key: Array of the correct letter code of each question
+
+    Returns:
+        (question rows, quiz row): a list with one dict of
+        QuestionStatistics fields per question and a dict of
+        QuizStatistics fields
+    """
+    presented = responses != NOT_PRESENTED
+    correct = responses == key[None, :]
+    total = correct.sum(axis=1).astype(np.float64)
+    counts = presented.sum(axis=0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        difficulty = correct.sum(axis=0) / counts
+    discrimination = _point_biserial(correct, correct, presented, total)
+    rates, choice_r = {}, {}
+    for choice in CHOICES:
+        chose = responses == ord(choice)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rates[choice] = chose.sum(axis=0) / counts
+        choice_r[choice] = _point_biserial(chose, correct, presented, total)
+
+    questions = [
+        {
+            'responses': int(counts[j]),
+            'difficulty': _float(difficulty[j]) or 0.0,
+            'discrimination': _float(discrimination[j]),
+            'choice_rates': {
+                choice: _float(rates[choice][j]) or 0.0
+                for choice in CHOICES},
+            'choice_discrimination': {
+                choice: _float(choice_r[choice][j]) for choice in CHOICES},
+        }
+        for j in range(responses.shape[1])
+    ]
+
+    # KR-20 needs every attempt to have been shown the same questions
+    complete = correct[presented.all(axis=1)]
+    k = responses.shape[1]
+    kr20 = None
+    if len(complete) > 1 and k > 1:
+        p = complete.mean(axis=0)
+        variance = complete.sum(axis=1).var(ddof=1)
+        if variance > 0:
+            kr20 = float(k / (k - 1) * (1 - (p * (1 - p)).sum() / variance))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        shares = total / presented.sum(axis=1)
+    shares = shares[np.isfinite(shares)]
+    quiz = {
+        'attempts': len(responses),
+        'mean_score': float(shares.mean()) if len(shares) else 0.0,
+        'score_sd': float(shares.std()) if len(shares) else 0.0,
+        'kr20': kr20,
+    }
+    return questions, quiz
+
+
+def _float(value):
+    return None if np.isnan(value) else round(float(value), 4)
+
+
+def compute_item_statistics(batch_size=2000, progress=None):
+    """
+    Recompute the statistics of every attempted quiz and its questions.
+
+    Args:
+        batch_size: Number of rows inserted per statement
+        progress: Optional callable receiving the number of quizzes done
+
+    Returns:
+        A (quizzes, attempts) tuple of what was analysed
+    """
+    versions = {}
+    for version in QuizVersion.objects.only('id', 'quiz_id', 'question_ids'):
+        versions.setdefault(version.quiz_id, {})[
+            version.pk] = version.get_question_ids()
+
+    quizzes = analysed = 0
+    question_rows, quiz_rows = [], []
+    now = timezone.now()
+
+    def flush():
+        QuestionStatistics.objects.bulk_create(
+            question_rows, batch_size=batch_size)
+        QuizStatistics.objects.bulk_create(quiz_rows, batch_size=batch_size)
+        question_rows.clear()
+        quiz_rows.clear()
+        if progress:
+            progress(quizzes)
+
+    rows = heapq.merge(
+        _attempt_rows(ArchivedQuizAttempt), _attempt_rows(QuizAttempt),
+        key=lambda row: row[0])
+    with transaction.atomic():
+        QuestionStatistics.objects.all().delete()
+        QuizStatistics.objects.all().delete()
+        for quiz_id, group in groupby(rows, key=lambda row: row[0]):
+            questions = list(Question.objects.filter(
+                quiz_id=quiz_id).values_list('id', 'correct_answer'))
+            if not questions:
+                continue
+            question_ids = [question_id for question_id, _ in questions]
+            responses = response_matrix(
+                question_ids, versions.get(quiz_id, {}),
+                (row[1:] for row in group))
+            key = np.frombuffer(''.join(
+                answer for _, answer in questions).encode(), dtype=np.uint8)
+            question_stats, quiz_stats = item_statistics(responses, key)
+
+            question_rows += [
+                QuestionStatistics(question_id=question_id, **fields)
+                for question_id, fields in zip(question_ids, question_stats)
+            ]
+            quiz_rows.append(QuizStatistics(
+                quiz_id=quiz_id, computed_at=now, **quiz_stats))
+            quizzes += 1
+            analysed += quiz_stats['attempts']
+            if len(question_rows) >= batch_size:
+                flush()
+        flush()
+    return quizzes, analysed
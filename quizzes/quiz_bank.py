@@ -0,0 +1,336 @@
+"""
+Bulk import and export of quizzes in NDJSON and GIFT.
+
+NDJSON files hold one object per line: a quiz header followed by its
+questions.
+
+    {"quiz": "Python Basics", "description": "Warm-up questions"}
+    {"text": "2 + 2?", "options": ["4", "3", "5", "22"], "answer": "A",
+     "explanation": ""}
+
+GIFT is Moodle's plain-text format; only multiple-choice questions with
+four options are supported, and $CATEGORY lines start a new quiz.
+
+Files are parsed line by line and questions are written with bulk_create in
+transactions of batch_size rows, so memory use does not grow with the size
+of the file. Each quiz's search document is built once, after its last
+question is written, and so is bounded by the largest quiz rather than the
+file.
+"""
+
+import json
+import re
+from collections import namedtuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import invalidate_homepage
+from .models import Question, Quiz
+from .search import rebuild_index
+
+FORMATS = ('ndjson', 'gift')
+LETTERS = 'ABCD'
+DEFAULT_TITLE = 'Imported questions'
+EXPORT_CHUNK_SIZE = 2000
+MAX_REPORTED_ERRORS = 20
+
+TITLE_MAX_LENGTH = Quiz._meta.get_field('title').max_length
+OPTION_MAX_LENGTH = Question._meta.get_field('option_a').max_length
+
+GIFT_SPECIAL = '\\~=#{}:'
+GIFT_ESCAPE_RE = re.compile(r'\\(.)')
+GIFT_NAME_RE = re.compile(r'\s*::(.*?)(?<!\\)::', re.S)
+GIFT_FORMAT_RE = re.compile(r'\s*\[\w+\]')
+GIFT_OPEN_RE = re.compile(r'(?<!\\)\{')
+GIFT_CLOSE_RE = re.compile(r'(?<!\\)\}')
+GIFT_MARKER_RE = re.compile(r'(?<!\\)(####|[~=#])')
+
+ImportResult = namedtuple(
+    'ImportResult', ['quizzes', 'questions', 'error_count', 'errors'])
+
+
+def question_fields(text, options, answer, explanation=''):
+    """
+    Validate one imported question and return its model fields.
+
+    Raises:
+        ValueError: If the question cannot be stored
+    """
+    if not isinstance(text, str) or not text.strip():
+        raise ValueError('question text is missing')
+    if (not isinstance(options, list) or len(options) != len(LETTERS)
+            or not all(isinstance(option, str) and option.strip()
+                       for option in options)):
+        raise ValueError('a question needs exactly four non-empty options')
+    if any(len(option) > OPTION_MAX_LENGTH for option in options):
+        raise ValueError(
+            f'options are limited to {OPTION_MAX_LENGTH} characters')
+    if answer not in tuple(LETTERS):
+        raise ValueError('answer must be one of A, B, C or D')
+    fields = {
+        f'option_{letter.lower()}': option.strip()
+        for letter, option in zip(LETTERS, options)
+    }
+    fields.update(
+        text=text.strip(),
+        correct_answer=answer,
+        explanation=(explanation or '').strip(),
+    )
+    return fields
+
+
+def parse_ndjson(lines):
+    """Yield (line number, kind, data) records from NDJSON lines."""
+    for line_number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield line_number, 'error', 'invalid JSON'
+            continue
+        if not isinstance(record, dict):
+            yield line_number, 'error', 'expected a JSON object'
+        elif 'quiz' in record:
+            yield line_number, 'quiz', {
+                'title': str(record['quiz']),
+                'description': str(record.get('description') or ''),
+            }
+        else:
+            try:
+                yield line_number, 'question', question_fields(
+                    record.get('text'), record.get('options'),
+                    record.get('answer'), record.get('explanation'))
+            except ValueError as e:
+                yield line_number, 'error', str(e)
+
+
+def _gift_unescape(text):
+    return GIFT_ESCAPE_RE.sub(
+        lambda m: '\n' if m.group(1) == 'n' else m.group(1), text).strip()
+
+
+def _gift_escape(text):
+    text = ''.join(f'\\{char}' if char in GIFT_SPECIAL else char
+                   for char in text)
+    return text.replace('\r\n', '\n').replace('\n', '\\n')
+
+
+def _parse_gift_question(block):
+    """Return the model fields of one GIFT question block."""
+    name = GIFT_NAME_RE.match(block)
+    if name:
+        block = block[name.end():]
+    format_tag = GIFT_FORMAT_RE.match(block)
+    if format_tag:
+        block = block[format_tag.end():]
+
+    opening = GIFT_OPEN_RE.search(block)
+    closings = list(GIFT_CLOSE_RE.finditer(block))
+    if opening is None or not closings:
+        raise ValueError('question has no {answer} block')
+    body = block[opening.end():closings[-1].start()]
+
+    parts = GIFT_MARKER_RE.split(body)
+    if parts[0].strip():
+        raise ValueError('unsupported question type')
+    options, answer, explanation = [], None, ''
+    for marker, value in zip(parts[1::2], parts[2::2]):
+        if marker == '####':
+            explanation = _gift_unescape(value)
+        elif marker == '#':
+            continue  # Per-answer feedback has nowhere to go
+        else:
+            if marker == '=':
+                if answer is not None:
+                    raise ValueError('only one answer may be correct')
+                answer = LETTERS[len(options)] if len(options) < 4 else None
+            options.append(_gift_unescape(value))
+    return question_fields(
+        _gift_unescape(block[:opening.start()]), options, answer,
+        explanation)
+
+
+def parse_gift(lines):
+    """Yield (line number, kind, data) records from GIFT lines."""
+    block, start = [], None
+
+    def finish():
+        try:
+            return start, 'question', _parse_gift_question('\n'.join(block))
+        except ValueError as e:
+            return start, 'error', str(e)
+
+    for line_number, line in enumerate(lines, 1):
+        line = line.rstrip('\r\n')
+        stripped = line.strip()
+        if not block and stripped.startswith('$CATEGORY:'):
+            path = stripped[len('$CATEGORY:'):].strip()
+            segments = [s for s in path.split('/') if s and s[0] != '$']
+            yield line_number, 'quiz', {
+                'title': segments[-1] if segments else path,
+                'description': '',
+            }
+        elif not block and (not stripped or stripped.startswith('//')):
+            continue
+        elif not stripped:
+            yield finish()
+            block = []
+        else:
+            if not block:
+                start = line_number
+            block.append(line)
+    if block:
+        yield finish()
+
+
+PARSERS = {
+    'ndjson': parse_ndjson,
+    'gift': parse_gift,
+}
+
+
+def import_quizzes(lines, file_format, creator=None, batch_size=1000,
+                   progress=None):
+    """
+    Import quizzes from an iterable of text lines.
+
+    Invalid records are skipped and reported; everything else is stored.
+    Questions before the first quiz header go into a quiz named
+    DEFAULT_TITLE, and headers without valid questions create no quiz.
+
+    Args:
+        lines: Iterable of lines, e.g. an open text file
+        file_format: 'ndjson' or 'gift'
+        creator: Optional user set as creator of the new quizzes
+        batch_size: Number of questions written per transaction
+        progress: Optional callable receiving the running question total
+
+    Returns:
+        An ImportResult with the first MAX_REPORTED_ERRORS errors
+    """
+    quizzes = questions = error_count = 0
+    errors = []
+    batch = []
+    # Quizzes whose last question is in the batch, indexed when it is written
+    finished = []
+    quiz = None
+
+    def create_quiz(title, description):
+        nonlocal quizzes
+        quizzes += 1
+        return Quiz.objects.create(
+            title=title.strip()[:TITLE_MAX_LENGTH] or DEFAULT_TITLE,
+            description=description.strip(),
+            creator=creator,
+        )
+
+    def flush():
+        nonlocal questions
+        if not batch and not finished:
+            return
+        with transaction.atomic():
+            Question.objects.bulk_create(batch)
+            if finished:
+                # bulk_create sends no signals, so the search documents of
+                # the quizzes just completed are built here, and their
+                # revision moves so cached answer keys and pages showing
+                # fewer questions refresh
+                completed = Quiz.objects.filter(pk__in=finished)
+                rebuild_index(completed)
+                completed.update(updated_at=timezone.now())
+        invalidate_homepage()
+        finished.clear()
+        if batch:
+            questions += len(batch)
+            batch.clear()
+            if progress:
+                progress(questions)
+
+    # Quizzes are only created once they have a valid question
+    header = {'title': DEFAULT_TITLE, 'description': ''}
+    order = 0
+    for line_number, kind, data in PARSERS[file_format](lines):
+        if kind == 'error':
+            error_count += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append(f'line {line_number}: {data}')
+        elif kind == 'quiz':
+            if quiz is not None:
+                finished.append(quiz.pk)
+            header, quiz, order = data, None, 0
+        else:
+            if quiz is None:
+                quiz = create_quiz(header['title'], header['description'])
+            order += 1
+            batch.append(Question(quiz=quiz, order=order, **data))
+            if len(batch) >= batch_size:
+                flush()
+    if quiz is not None:
+        finished.append(quiz.pk)
+    flush()
+    return ImportResult(quizzes, questions, error_count, errors)
+
+
+def _question_rows(quizzes):
+    return Question.objects.filter(quiz__in=quizzes).order_by(
+        'quiz_id', 'order', 'id').values_list(
+            'quiz_id', 'quiz__title', 'quiz__description', 'text',
+            'option_a', 'option_b', 'option_c', 'option_d',
+            'correct_answer', 'explanation',
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def export_ndjson(quizzes):
+    """Yield the quizzes and their questions as NDJSON lines."""
+    current = None
+    for (quiz_id, title, description, text, *options, answer,
+         explanation) in _question_rows(quizzes):
+        if quiz_id != current:
+            current = quiz_id
+            yield json.dumps(
+                {'quiz': title, 'description': description}) + '\n'
+        yield json.dumps({
+            'text': text,
+            'options': options,
+            'answer': answer,
+            'explanation': explanation,
+        }) + '\n'
+
+
+def export_gift(quizzes):
+    """Yield the quizzes and their questions as GIFT text."""
+    current = None
+    number = 0
+    for (quiz_id, title, description, text, *options, answer,
+         explanation) in _question_rows(quizzes):
+        if quiz_id != current:
+            current, number = quiz_id, 0
+            yield f'$CATEGORY: {title.replace("/", "-")}\n\n'
+            if description:
+                yield f'// {" ".join(description.split())}\n\n'
+        number += 1
+        lines = [f'::Q{number}:: {_gift_escape(text)} {{']
+        lines += [
+            f'{"=" if letter == answer else "~"}{_gift_escape(option)}'
+            for letter, option in zip(LETTERS, options)
+        ]
+        if explanation:
+            lines.append(f'####{_gift_escape(explanation)}')
+        lines.append('}')
+        yield '\n'.join(lines) + '\n\n'
+
+
+EXPORTERS = {
+    'ndjson': export_ndjson,
+    'gift': export_gift,
+}
+
+
+def detect_format(filename):
+    """Return the format matching a file name's extension, or None."""
+    extension = filename.rsplit('.', 1)[-1].lower()
+    return {'ndjson': 'ndjson', 'jsonl': 'ndjson', 'gift': 'gift',
+            'txt': 'gift'}.get(extension)
@@ -0,0 +1,137 @@
+"""
+"Related quizzes" recommendations computed in batch from quiz attempts.
+
+Logged-in attempts form a sparse user x quiz matrix with a 1 wherever a
+user has attempted a quiz. Two quizzes are related when many of the same
+users attempted both: their similarity is the cosine of their columns,
+co-attempts / sqrt(attempts of one * attempts of the other). The top K
+related quizzes of every quiz are stored as RelatedQuiz rows so pages read
+them with one indexed query.
+"""
+
+from itertools import chain
+
+import numpy as np
+from scipy import sparse
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import QuizAttempt, RelatedQuiz
+
+TOP_K = 6
+
+# Pairs attempted together by fewer users are too noisy to recommend
+MIN_CO_ATTEMPTS = 2
+
+# Upper bound on the cells of each dense block of similarities
+BLOCK_CELLS = 8_000_000
+
+
+def load_attempt_pairs():
+    """
+    Return the (user_id, quiz_id) pairs of every logged-in attempt.
+
+    Returns:
+        Two int64 arrays of equal length; repeated attempts repeat the pair
+    """
+    rows = QuizAttempt.objects.filter(user__isnull=False).values_list(
+        'user_id', 'quiz_id')
+    pairs = np.fromiter(
+        chain.from_iterable(rows.iterator(chunk_size=10000)), dtype=np.int64)
+    pairs = pairs.reshape(-1, 2)
+    return pairs[:, 0], pairs[:, 1]
+
+
+def related_quizzes(user_ids, quiz_ids, top_k=TOP_K,
+                    min_co_attempts=MIN_CO_ATTEMPTS):
+    """
+    Compute the top_k most similar quizzes of every attempted quiz.
+
+    Args:
+        user_ids: Array of the user of each attempt
+        quiz_ids: Array of the quiz of each attempt
+        top_k: Number of related quizzes kept per quiz
+        min_co_attempts: Fewest users two quizzes must share to be related
+
+    Returns:
+        Arrays (quiz_ids, related_ids, ranks, scores), one item per link,
+        ranked from 1 within each quiz
+    """
+    empty = (np.empty(0, np.int64), np.empty(0, np.int64),
+             np.empty(0, np.int16), np.empty(0, np.float32))
+    quizzes, quiz_index = np.unique(quiz_ids, return_inverse=True)
+    users, user_index = np.unique(user_ids, return_inverse=True)
+    n_quizzes = len(quizzes)
+    top_k = min(top_k, n_quizzes - 1)
+    if top_k < 1:
+        return empty
+
+    attempted = sparse.csr_matrix(
+        (np.ones(len(quiz_index), dtype=np.float32),
+         (user_index, quiz_index)),
+        shape=(len(users), n_quizzes))
+    # Repeated attempts are summed by the constructor; count each user once
+    attempted.data[:] = 1
+    by_quiz = attempted.T.tocsr()
+    norms = np.sqrt(np.asarray(by_quiz.sum(axis=1)).ravel())
+
+    block_size = max(1, BLOCK_CELLS // n_quizzes)
+    results = []
+    for start in range(0, n_quizzes, block_size):
+        stop = min(start + block_size, n_quizzes)
+        rows = np.arange(stop - start)
+        # Co-attempt counts of this block of quizzes with every quiz
+        similarity = (by_quiz[start:stop] @ attempted).toarray()
+        similarity[similarity < min_co_attempts] = 0
+        similarity /= norms[start:stop, None]
+        similarity /= norms[None, :]
+        similarity[rows, rows + start] = 0
+
+        top = np.argpartition(-similarity, top_k - 1, axis=1)[:, :top_k]
+        scores = np.take_along_axis(similarity, top, axis=1)
+        order = np.argsort(-scores, axis=1, kind='stable')
+        top = np.take_along_axis(top, order, axis=1)
+        scores = np.take_along_axis(scores, order, axis=1)
+
+        keep = scores > 0
+        sources = np.broadcast_to((rows + start)[:, None], top.shape)
+        ranks = np.broadcast_to(
+            np.arange(1, top_k + 1, dtype=np.int16), top.shape)
+        results.append((
+            quizzes[sources[keep]], quizzes[top[keep]], ranks[keep],
+            scores[keep]))
+
+    if not results:
+        return empty
+    return tuple(np.concatenate(parts) for parts in zip(*results))
+
+
+def compute_related_quizzes(top_k=TOP_K, min_co_attempts=MIN_CO_ATTEMPTS,
+                            batch_size=5000):
+    """
+    Recompute and store the related quizzes of every quiz.
+
+    Archived attempts are left out so recommendations follow recent
+    activity.
+
+    Returns:
+        The number of RelatedQuiz rows written
+    """
+    links = related_quizzes(
+        *load_attempt_pairs(), top_k=top_k, min_co_attempts=min_co_attempts)
+    # Moves the ETag of every quiz page showing related quizzes
+    now = timezone.now()
+    with transaction.atomic():
+        RelatedQuiz.objects.all().delete()
+        RelatedQuiz.objects.bulk_create(
+            (
+                RelatedQuiz(
+                    quiz_id=quiz_id, related_id=related_id, rank=rank,
+                    score=score, computed_at=now)
+                for quiz_id, related_id, rank, score in zip(
+                    *(column.tolist() for column in links))
+            ),
+            batch_size=batch_size,
+        )
+    return len(links[0])
@@ -0,0 +1,108 @@
+"""
+Rendering of question markup to stored HTML.
+
+Question text, options and explanations are rendered when a question is
+saved and stored alongside it, so reads never run the markup filter. Code
+blocks are syntax highlighted with Pygments. Bump RENDERER_VERSION whenever
+the output changes; stale rows are re-rendered the next time they are read
+or by the render_questions management command.
+"""
+
+import html
+import re
+from functools import lru_cache
+
+from pygments import highlight
+from pygments.formatters import HtmlFormatter
+from pygments.lexers import get_lexer_by_name
+
+from .templatetags.quiz_filters import render_code
+
+RENDERER_VERSION = 2
+
+RENDERED_FIELDS = (
+    'text', 'option_a', 'option_b', 'option_c', 'option_d', 'explanation',
+)
+HTML_FIELDS = tuple(f'{field}_html' for field in RENDERED_FIELDS)
+
+# Language names as they appear after a code fence, mapped to Pygments lexers
+LANGUAGES = {
+    'python': 'python', 'py': 'python', 'django': 'python',
+    'javascript': 'javascript', 'js': 'javascript', 'node': 'javascript',
+    'typescript': 'typescript', 'ts': 'typescript',
+    'java': 'java', 'kotlin': 'kotlin', 'swift': 'swift',
+    'c': 'c', 'c++': 'cpp', 'cpp': 'cpp', 'c#': 'csharp', 'csharp': 'csharp',
+    'go': 'go', 'golang': 'go', 'rust': 'rust', 'ruby': 'ruby', 'php': 'php',
+    'sql': 'sql', 'html': 'html', 'css': 'css',
+    'bash': 'bash', 'shell': 'bash',
+}
+# Names that are also everyday words or letters ("Go Further", "Grade C"),
+# so a quiz title naming them says nothing about its code
+AMBIGUOUS_NAMES = {'c', 'go', 'swift', 'shell', 'node', 'py', 'js', 'ts'}
+TITLE_LANGUAGES = {
+    name: lexer for name, lexer in LANGUAGES.items()
+    if name not in AMBIGUOUS_NAMES
+}
+
+WORD_RE = re.compile(r'[\w#+]+')
+FENCE_LANGUAGE_RE = re.compile(r'```(\w+)')
+CODE_BLOCK_RE = re.compile(r'<pre><code class="code-block">([^<]*)</code></pre>')
+FORMATTER = HtmlFormatter(nowrap=True)
+
+
+@lru_cache(maxsize=256)
+def language_for(text):
+    """
+    Return the first language a quiz title names unambiguously, or None.
+
+    Only whole words listed in TITLE_LANGUAGES count; without one, code
+    blocks are left as plain text unless they name their own language.
+    """
+    for word in WORD_RE.findall(text.lower()):
+        if word in TITLE_LANGUAGES:
+            return TITLE_LANGUAGES[word]
+    return None
+
+
+def render_markup(text, language=None):
+    """
+    Render markup to HTML, highlighting code blocks.
+
+    Args:
+        text: Question markup
+        language: Pygments lexer name for code blocks, if known
+
+    Returns:
+        The rendered HTML as a string
+    """
+    if not text:
+        return ''
+    rendered = str(render_code(text))
+
+    fence = FENCE_LANGUAGE_RE.search(text)
+    if fence and fence.group(1).lower() in LANGUAGES:
+        language = LANGUAGES[fence.group(1).lower()]
+    if not language or '<pre>' not in rendered:
+        return rendered
+
+    lexer = get_lexer_by_name(language, stripnl=False, ensurenl=False)
+
+    def highlight_block(match):
+        code = html.unescape(match.group(1))
+        highlighted = highlight(code, lexer, FORMATTER).replace('`', '&#96;')
+        return (
+            f'<pre><code class="code-block highlight">{highlighted}'
+            '</code></pre>'
+        )
+
+    # Blocks containing other tags (crossing markup) are left as they are
+    return CODE_BLOCK_RE.sub(highlight_block, rendered)
+
+
+def render_question(question):
+    """Render every displayed field of a question onto its HTML fields."""
+    language = language_for(question.quiz.title) if question.quiz_id else None
+    for field in RENDERED_FIELDS:
+        setattr(question, f'{field}_html',
+                render_markup(getattr(question, field), language))
+    question.render_version = RENDERER_VERSION
@@ -0,0 +1,184 @@
+"""
+Retention policy for notifications.
+
+Rules are applied in small batches so that no single DELETE holds locks on
+the notifications table for long, even when millions of rows qualify.
+"""
+
+import logging
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import Notification
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationRetentionPolicy:
+    """Apply the notification retention rules and report rows reclaimed."""
+
+    def __init__(
+        self,
+        keep_last=None,
+        delete_read_after_days=None,
+        rollup_after_days=None,
+        batch_size=500,
+        pause=0,
+    ):
+        defaults = settings.NOTIFICATION_RETENTION
+        self.keep_last = (
+            keep_last if keep_last is not None else defaults['KEEP_LAST'])
+        self.delete_read_after_days = (
+            delete_read_after_days if delete_read_after_days is not None
+            else defaults['DELETE_READ_AFTER_DAYS'])
+        self.rollup_after_days = (
+            rollup_after_days if rollup_after_days is not None
+            else defaults['ROLLUP_AFTER_DAYS'])
+        self.batch_size = batch_size
+        self.pause = pause
+        if self.keep_last < 1:
+            raise ValueError('keep_last must be at least 1')
+
+    def apply(self):
+        """
+        Run every rule in turn.
+
+        Returns:
+            Dictionary with the number of rows reclaimed per rule
+        """
+        started = time.monotonic()
+        metrics = {
+            'read_deleted': self.delete_old_read(),
+            'rolled_up': 0,
+            'summaries_created': 0,
+            'over_limit_deleted': 0,
+        }
+        metrics['rolled_up'], metrics['summaries_created'] = self.roll_up_old()
+        metrics['over_limit_deleted'] = self.enforce_keep_last()
+        metrics['rows_reclaimed'] = (
+            metrics['read_deleted']
+            + metrics['rolled_up'] - metrics['summaries_created']
+            + metrics['over_limit_deleted']
+        )
+        metrics['seconds'] = round(time.monotonic() - started, 2)
+        logger.info('Notification retention finished: %s', metrics)
+        return metrics
+
+    def delete_old_read(self):
+        """Delete read notifications older than the read horizon."""
+        cutoff = timezone.now() - timedelta(days=self.delete_read_after_days)
+        return self._delete_in_batches(
+            Notification.objects.filter(is_read=True, created_at__lt=cutoff))
+
+    def roll_up_old(self):
+        """
+        Replace each user's old unread notifications with one summary.
+
+        The summary is created with the first deleted batch and updated with
+        each later one, in the same transaction, so it always covers exactly
+        the rows deleted so far. A run stopped part way leaves a summary of
+        what it deleted, and the next run summarises the rest separately.
+
+        Returns:
+            Tuple of (notifications rolled up, summaries created)
+        """
+        cutoff = timezone.now() - timedelta(days=self.rollup_after_days)
+        old = Notification.objects.filter(
+            is_read=False, created_at__lt=cutoff
+        ).exclude(notification_type=Notification.NotificationType.SYSTEM)
+
+        rolled_up = summaries = 0
+        recipients = list(
+            old.values_list('recipient_id', flat=True).distinct().order_by())
+        for recipient_id in recipients:
+            user_old = old.filter(
+                recipient_id=recipient_id).order_by('pk').values_list(
+                    'pk', 'notification_type', 'created_at')
+            counts = Counter()
+            latest = summary = None
+            while True:
+                rows = list(user_old[:self.batch_size])
+                if not rows:
+                    break
+                for _, notification_type, created_at in rows:
+                    counts[notification_type] += 1
+                    latest = max(latest or created_at, created_at)
+
+                with transaction.atomic():
+                    count, _ = Notification.objects.filter(
+                        pk__in=[row[0] for row in rows]).delete()
+                    if summary is None:
+                        summary = Notification.objects.create(
+                            recipient_id=recipient_id,
+                            notification_type=(
+                                Notification.NotificationType.SYSTEM),
+                            message=self._summary_message(counts),
+                        )
+                        summaries += 1
+                    # Sort the summary where the rows it replaces were
+                    Notification.objects.filter(pk=summary.pk).update(
+                        message=self._summary_message(counts),
+                        created_at=latest)
+                rolled_up += count
+                if len(rows) < self.batch_size:
+                    break
+                if self.pause:
+                    time.sleep(self.pause)
+        return rolled_up, summaries
+
+    def enforce_keep_last(self):
+        """Delete everything beyond each user's newest keep_last rows."""
+        over_limit = list(
+            Notification.objects.values('recipient_id')
+            .annotate(total=Count('id'))
+            .filter(total__gt=self.keep_last)
+            .values_list('recipient_id', flat=True)
+            .order_by()
+        )
+        deleted = 0
+        for recipient_id in over_limit:
+            user_rows = Notification.objects.filter(
+                recipient_id=recipient_id).order_by('-created_at', '-id')
+            boundary = user_rows.values_list(
+                'created_at', 'id')[self.keep_last - 1]
+            created_at, pk = boundary
+            older = Notification.objects.filter(
+                recipient_id=recipient_id, created_at__lte=created_at
+            ).exclude(created_at=created_at, id__gte=pk)
+            deleted += self._delete_in_batches(older)
+        return deleted
+
+    def _delete_in_batches(self, queryset):
+        """Delete queryset rows batch_size at a time, returning the total."""
+        deleted = 0
+        while True:
+            ids = list(queryset.values_list('pk', flat=True)[:self.batch_size])
+            if not ids:
+                return deleted
+            count, _ = Notification.objects.filter(pk__in=ids).delete()
+            deleted += count
+            if self.pause:
+                time.sleep(self.pause)
+
+    @staticmethod
+    def _summary_message(counts):
+        """Build the text of a roll-up summary notification."""
+        labels = {
+            Notification.NotificationType.QUIZ_COMPLETED: 'quiz completion',
+            Notification.NotificationType.QUIZ_SAVED: 'quiz save',
+        }
+        parts = []
+        for notification_type, total in sorted(counts.items()):
+            label = labels.get(notification_type, 'update')
+            parts.append(f'{total} {label}{"s" if total != 1 else ""}')
+        total = sum(counts.values())
+        return (
+            f'You had {total} older notification'
+            f'{"s" if total != 1 else ""}: {", ".join(parts)}.'
+        )
@@ -0,0 +1,196 @@
+"""
+Full-text search over quizzes and their questions.
+
+Each quiz has one QuizSearchDocument holding its title and a plain-text body
+built from the description and question texts. The database indexes those
+rows itself: a GIN-indexed tsvector column on PostgreSQL and an FTS5 table
+on SQLite (see migration 0011). Other databases fall back to icontains.
+"""
+
+import re
+from collections import namedtuple
+
+from django.db import connection
+from django.db.models import Count, Q
+from django.utils.html import escape
+
+from .models import Quiz, Question, QuizSearchDocument
+
+MAX_QUERY_LENGTH = 200
+SNIPPET_WORDS = 24
+
+# Highlight delimiters are control characters so the snippet can be escaped
+# as a whole before they are turned into <mark> tags
+HIGHLIGHT_START = '\x02'
+HIGHLIGHT_END = '\x03'
+
+MARKUP_RE = re.compile(r'\[/?code(?:block)?\]|```\w*')
+TERM_RE = re.compile(r'\w+')
+
+SearchHit = namedtuple('SearchHit', ['quiz_id', 'rank', 'snippet'])
+
+
+def document_body(description, question_texts):
+    """Return the searchable text of a quiz with code markup removed."""
+    return MARKUP_RE.sub(' ', '\n'.join([description, *question_texts]))
+
+
+def index_quiz(quiz_id):
+    """Create, refresh or drop the search document of one quiz."""
+    quiz = Quiz.objects.filter(pk=quiz_id).values(
+        'title', 'description').first()
+    if quiz is None:
+        QuizSearchDocument.objects.filter(pk=quiz_id).delete()
+        return
+    texts = Question.objects.filter(quiz_id=quiz_id).values_list(
+        'text', flat=True)
+    QuizSearchDocument.objects.update_or_create(
+        quiz_id=quiz_id,
+        defaults={
+            'title': quiz['title'],
+            'body': document_body(quiz['description'], texts),
+        },
+    )
+
+
+def rebuild_index(quizzes=None, batch_size=500, progress=None):
+    """
+    Rebuild search documents, batch_size quizzes at a time.
+
+    Args:
+        quizzes: Optional Quiz queryset to rebuild; defaults to every quiz
+        batch_size: Number of quizzes indexed per batch
+        progress: Optional callable receiving the running total
+
+    Returns:
+        The number of quizzes indexed
+    """
+    if quizzes is None:
+        quizzes = Quiz.objects.all()
+    quizzes = quizzes.order_by('pk').values('pk', 'title', 'description')
+    indexed = last_pk = 0
+    while True:
+        batch = list(quizzes.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            break
+        last_pk = batch[-1]['pk']
+
+        texts = {quiz['pk']: [] for quiz in batch}
+        rows = Question.objects.filter(quiz_id__in=texts).order_by(
+            'quiz_id', 'order', 'id').values_list('quiz_id', 'text')
+        for quiz_id, text in rows:
+            texts[quiz_id].append(text)
+
+        QuizSearchDocument.objects.filter(quiz_id__in=texts).delete()
+        QuizSearchDocument.objects.bulk_create(
+            QuizSearchDocument(
+                quiz_id=quiz['pk'],
+                title=quiz['title'],
+                body=document_body(quiz['description'], texts[quiz['pk']]),
+            )
+            for quiz in batch
+        )
+        indexed += len(batch)
+        if progress:
+            progress(indexed)
+    return indexed
+
+
+def _highlight(snippet):
+    """Escape a snippet and turn the highlight delimiters into <mark>."""
+    return escape(snippet).replace(
+        HIGHLIGHT_START, '<mark>').replace(HIGHLIGHT_END, '</mark>')
+
+
+def _search_postgresql(query, limit, offset):
+    # Only the page of hits is passed to ts_headline, which is expensive
+    sql = f"""
+        WITH q AS (SELECT websearch_to_tsquery('english', %s) AS query),
+        hits AS (
+            SELECT d.quiz_id, d.body,
+                   ts_rank_cd(d.search_vector, q.query) AS rank
+            FROM quizzes_quizsearchdocument d, q
+            WHERE d.search_vector @@ q.query
+            ORDER BY rank DESC, d.quiz_id DESC
+            LIMIT %s OFFSET %s
+        )
+        SELECT hits.quiz_id, hits.rank, ts_headline(
+            'english', hits.body, q.query,
+            'StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_END}, '
+            'MaxWords={SNIPPET_WORDS}, MinWords=8, MaxFragments=1')
+        FROM hits, q
+        ORDER BY hits.rank DESC, hits.quiz_id DESC
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [query, limit, offset])
+        return cursor.fetchall()
+
+
+def _search_sqlite(query, limit, offset):
+    # Quote every term so user input cannot use FTS5 query syntax; the last
+    # term is a prefix so partial words still match
+    terms = TERM_RE.findall(query)
+    if not terms:
+        return []
+    match = ' '.join(f'"{term}"' for term in terms) + '*'
+    sql = f"""
+        SELECT rowid, -bm25(quizzes_quizsearch_fts, 10.0, 1.0) AS rank,
+               snippet(quizzes_quizsearch_fts, 1, char(2), char(3), '…',
+                       {SNIPPET_WORDS})
+        FROM quizzes_quizsearch_fts
+        WHERE quizzes_quizsearch_fts MATCH %s
+        ORDER BY rank DESC, rowid DESC
+        LIMIT %s OFFSET %s
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [match, limit, offset])
+        return cursor.fetchall()
+
+
+def _search_fallback(query, limit, offset):
+    documents = QuizSearchDocument.objects.filter(
+        Q(title__icontains=query) | Q(body__icontains=query)
+    ).order_by('-quiz_id').values_list('quiz_id', 'body')
+    documents = documents[offset:offset + limit]
+    return [(quiz_id, 0, body[:200]) for quiz_id, body in documents]
+
+
+def search_hits(query, limit=20, offset=0):
+    """
+    Return ranked search hits for a free-text query.
+
+    Returns:
+        List of SearchHit, best match first, with snippets as safe HTML
+    """
+    query = query.strip()[:MAX_QUERY_LENGTH]
+    if not query:
+        return []
+    search = {
+        'postgresql': _search_postgresql,
+        'sqlite': _search_sqlite,
+    }.get(connection.vendor, _search_fallback)
+    return [
+        SearchHit(quiz_id, rank, _highlight(snippet))
+        for quiz_id, rank, snippet in search(query, limit, offset)
+    ]
+
+
+def search_quizzes(query, limit=20, offset=0):
+    """
+    Return the quizzes matching a query, best match first.
+
+    Each quiz carries the search rank, an HTML snippet with the matched
+    terms in <mark> tags, and its question count.
+    """
+    hits = search_hits(query, limit, offset)
+    quizzes = Quiz.objects.select_related('creator').annotate(
+        num_questions=Count('questions')).in_bulk(
+            [hit.quiz_id for hit in hits])
+    results = []
+    for hit in hits:
+        quiz = quizzes.get(hit.quiz_id)
+        if quiz is not None:
+            quiz.rank = hit.rank
+            quiz.snippet = hit.snippet
+            results.append(quiz)
+    return results
@@ -0,0 +1,460 @@
+"""
+Reproducible synthetic datasets at benchmark scale.
+
+seed_dataset creates users with profiles, quizzes with code-heavy
+questions, quiz attempts, notifications and saved-quiz links. Everything
+comes from one seed, so the same arguments always build the same data.
+
+Users, quizzes and questions go through bulk_create, which renders the
+questions. The large tables are generated with NumPy in batches and
+written with COPY on PostgreSQL and executemany elsewhere, skipping model
+instances altogether.
+"""
+
+import io
+import random
+import numpy as np
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.utils import timezone
+
+from accounts.models import Profile
+from .answers import UNANSWERED
+from .cache import invalidate_homepage
+from .models import Notification, Question, Quiz, QuizAttempt, QuizVersion
+
+# Rows created at scale 1; every count is multiplied by the scale factor
+BASE_COUNTS = {
+    'users': 10_000,
+    'quizzes': 2_000,
+    'attempts': 1_000_000,
+    'notifications': 200_000,
+}
+QUESTIONS_PER_QUIZ = 10
+SAVED_PER_USER = 5
+CREATOR_SHARE = 0.1
+SKIP_RATE = 0.03
+
+LETTERS = np.frombuffer(b'ABCD', dtype=np.uint8)
+
+TOPICS = ['Python', 'JavaScript', 'SQL', 'CSS', 'Django', 'Git']
+LEVELS = ['Basics', 'Essentials', 'Deep Dive', 'Challenge', 'Gotchas']
+
+
+def _python_question(rng):
+    n = rng.randint(2, 9)
+    return (
+        'What does this Python code print?\n'
+        f'```python\ntotal = 0\nfor i in range({n}):\n    total += i\n'
+        'print(total)\n```',
+        [str(n * (n - 1) // 2), str(n * (n + 1) // 2), str(n), '0'],
+        f'[code]range({n})[/code] stops before {n}, so the last i is '
+        f'{n - 1}.',
+    )
+
+
+def _javascript_question(rng):
+    n = rng.randint(2, 6)
+    return (
+        'What is logged?\n'
+        f'```javascript\nconst xs = Array.from({{length: {n}}}, (_, i) => i);\n'
+        'console.log(xs.map(x => x * 2).filter(x => x > 2).length);\n```',
+        [str(max(n - 2, 0)), str(n), str(n - 1), 'undefined'],
+        '[code]map[/code] doubles each item and [code]filter[/code] keeps '
+        'those above 2.',
+    )
+
+
+def _sql_question(rng):
+    n = rng.randint(10, 99)
+    return (
+        'Which query returns the number of orders per customer with more '
+        f'than {n} orders?',
+        [f'[code]SELECT customer_id, COUNT(*) FROM orders GROUP BY '
+         f'customer_id HAVING COUNT(*) > {n}[/code]',
+         f'[code]SELECT customer_id, COUNT(*) FROM orders WHERE COUNT(*) > '
+         f'{n}[/code]',
+         f'[code]SELECT COUNT(customer_id > {n}) FROM orders[/code]',
+         f'[code]SELECT customer_id FROM orders LIMIT {n}[/code]'],
+        'Aggregates are filtered with [code]HAVING[/code], not '
+        '[code]WHERE[/code].',
+    )
+
+
+def _css_question(rng):
+    n = rng.randint(1, 4)
+    return (
+        f'Which selector has the highest specificity when {n} class '
+        'selector(s) are involved?\n'
+        f'```css\n#nav{" .item" * n} {{ color: red; }}\n```',
+        ['An id selector', 'A type selector', 'The universal selector',
+         'A pseudo-element'],
+        'Ids outrank classes, which outrank type selectors.',
+    )
+
+
+def _django_question(rng):
+    n = rng.randint(2, 20)
+    return (
+        'How many queries does this loop run?\n'
+        f'```python\nfor quiz in Quiz.objects.all()[:{n}]:\n'
+        '    print(quiz.creator.username)\n```',
+        [str(n + 1), '1', str(n), '2'],
+        'Each [code]quiz.creator[/code] is a separate query unless '
+        '[code]select_related[/code] is used.',
+    )
+
+
+def _git_question(rng):
+    n = rng.randint(1, 5)
+    return (
+        f'Which command undoes the last {n} commit(s) but keeps the '
+        'changes staged?',
+        [f'[code]git reset --soft HEAD~{n}[/code]',
+         f'[code]git reset --hard HEAD~{n}[/code]',
+         f'[code]git revert HEAD~{n}[/code]',
+         '[code]git stash[/code]'],
+        '[code]--soft[/code] moves the branch but leaves the index alone.',
+    )
+
+
+QUESTION_TEMPLATES = {
+    'Python': _python_question,
+    'JavaScript': _javascript_question,
+    'SQL': _sql_question,
+    'CSS': _css_question,
+    'Django': _django_question,
+    'Git': _git_question,
+}
+
+
+def scaled_counts(scale=1, **overrides):
+    """Return BASE_COUNTS multiplied by scale, with explicit overrides."""
+    counts = {name: int(count * scale) for name, count in BASE_COUNTS.items()}
+    counts.update(
+        (name, value) for name, value in overrides.items()
+        if value is not None)
+    return counts
+
+
+def _copy_value(value):
+    """Format one value for PostgreSQL's COPY text format."""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace(
+        '\n', '\\n').replace('\r', '\\r')
+
+
+def bulk_insert(model, fields, rows):
+    """
+    Insert rows of raw values into a model's table without model instances.
+
+    Args:
+        model: Model whose table receives the rows
+        fields: Field names, in the order of each row's values
+        rows: Iterable of tuples; datetimes as strings from _timestamps
+    """
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    columns = ', '.join(
+        quote(model._meta.get_field(field).column) for field in fields)
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            buffer = io.StringIO()
+            for row in rows:
+                buffer.write('\t'.join(map(_copy_value, row)) + '\n')
+            buffer.seek(0)
+            cursor.cursor.copy_expert(
+                f'COPY {table} ({columns}) FROM STDIN', buffer)
+        else:
+            placeholders = ', '.join(['%s'] * len(fields))
+            cursor.executemany(
+                f'INSERT INTO {table} ({columns}) VALUES ({placeholders})',
+                list(rows))
+
+
+def _timestamps(values):
+    """Return datetime64[us] UTC values as strings the database accepts."""
+    text = np.datetime_as_string(values, unit='us')
+    if connection.vendor == 'postgresql':
+        return [f'{value}+00:00' for value in text.tolist()]
+    # Stored naive in UTC with a space, like Django's SQLite backend
+    return [value.replace('T', ' ') for value in text.tolist()]
+
+
+def _zipf(n, exponent, rng):
+    """Return shuffled Zipf probabilities for n items."""
+    weights = 1 / np.arange(1, n + 1) ** exponent
+    rng.shuffle(weights)
+    return weights / weights.sum()
+
+
+class Seeder:
+    """Builds one dataset; see seed_dataset."""
+
+    def __init__(self, counts, questions_per_quiz, saved_per_user, days,
+                 prefix, password, seed, batch_size, progress):
+        self.counts = counts
+        self.questions_per_quiz = questions_per_quiz
+        self.saved_per_user = saved_per_user
+        self.days = days
+        self.prefix = prefix
+        self.password = password
+        self.batch_size = batch_size
+        self.progress = progress or (lambda label, total: None)
+        self.random = random.Random(seed)
+        self.rng = np.random.default_rng(seed)
+        self.now = np.datetime64(
+            timezone.now().replace(tzinfo=None), 'us')
+
+    def _offsets(self, size):
+        """Return random instants within the last self.days days."""
+        seconds = self.rng.random(size) * self.days * 86400
+        return self.now - (seconds * 1e6).astype('timedelta64[us]')
+
+    def create_users(self):
+        """Create the users and their profiles."""
+        password = make_password(self.password)
+        self.user_ids = []
+        self.usernames = []
+        profile_ids = []
+        total = self.counts['users']
+        for start in range(0, total, self.batch_size):
+            stop = min(start + self.batch_size, total)
+            with transaction.atomic():
+                users = User.objects.bulk_create(
+                    User(
+                        username=f'{self.prefix}_{i}',
+                        email=f'{self.prefix}_{i}@example.com',
+                        password=password,
+                    )
+                    for i in range(start, stop)
+                )
+                # bulk_create sends no post_save, so profiles are added here
+                profiles = Profile.objects.bulk_create(
+                    Profile(
+                        user=user,
+                        avatar=self.random.choice(['male', 'female']),
+                        bio=self.random.choice(
+                            ['', '', 'Learning to code one quiz at a time.',
+                             'Backend developer.', 'CS student.']),
+                    )
+                    for user in users
+                )
+            self.user_ids += [user.pk for user in users]
+            self.usernames += [user.username for user in users]
+            profile_ids += [profile.pk for profile in profiles]
+            self.progress('users', stop)
+        self.user_ids = np.array(self.user_ids)
+        self.profile_ids = np.array(profile_ids)
+        self.skill = self.rng.beta(5, 3, len(self.user_ids))
+        self.activity = _zipf(len(self.user_ids), 0.6, self.rng)
+
+    def create_quizzes(self):
+        """Create the quizzes, their questions and question-order versions."""
+        creators = self.rng.choice(
+            self.user_ids, max(1, int(len(self.user_ids) * CREATOR_SHARE)),
+            replace=False).tolist()
+        total = self.counts['quizzes']
+        per_quiz = self.questions_per_quiz
+        self.quiz_ids, self.titles, self.creator_ids = [], [], []
+        self.answer_keys = np.empty((total, per_quiz), dtype=np.uint8)
+        self.version_ids = []
+        batch_size = max(1, self.batch_size // per_quiz)
+        for start in range(0, total, batch_size):
+            stop = min(start + batch_size, total)
+            with transaction.atomic():
+                quizzes = Quiz.objects.bulk_create(
+                    self._quiz(i, creators) for i in range(start, stop))
+                questions = Question.objects.bulk_create(
+                    self._question(quiz, order)
+                    for quiz in quizzes for order in range(1, per_quiz + 1))
+                versions = QuizVersion.objects.bulk_create(
+                    QuizVersion(
+                        quiz=quiz, number=1, question_ids=','.join(
+                            str(question.pk) for question in
+                            questions[i * per_quiz:(i + 1) * per_quiz]))
+                    for i, quiz in enumerate(quizzes)
+                )
+            letters = np.frombuffer(''.join(
+                question.correct_answer for question in questions
+            ).encode(), dtype=np.uint8).reshape(-1, per_quiz)
+            self.answer_keys[start:stop] = letters - ord('A')
+            self.quiz_ids += [quiz.pk for quiz in quizzes]
+            self.titles += [quiz.title for quiz in quizzes]
+            self.creator_ids += [quiz.creator_id for quiz in quizzes]
+            self.version_ids += [version.pk for version in versions]
+            self.progress('quizzes', stop)
+        self.quiz_ids = np.array(self.quiz_ids)
+        self.version_ids = np.array(self.version_ids)
+        self.popularity = _zipf(total, 0.8, self.rng)
+
+    def _quiz(self, i, creators):
+        topic = self.random.choice(TOPICS)
+        return Quiz(
+            title=f'{topic} {self.random.choice(LEVELS)} {i}',
+            slug=f'{self.prefix}-quiz-{i}',
+            description=f'{self.questions_per_quiz} questions on {topic}.',
+            creator_id=self.random.choice(creators),
+            is_ai_generated=self.random.random() < 0.7,
+            is_featured=i < 6,
+        )
+
+    def _question(self, quiz, order):
+        topic = quiz.title.split(' ')[0]
+        text, options, explanation = QUESTION_TEMPLATES[topic](self.random)
+        # Templates list the right answer first; shuffle it into place
+        correct = self.random.randrange(4)
+        options[0], options[correct] = options[correct], options[0]
+        return Question(
+            quiz=quiz, text=text, option_a=options[0], option_b=options[1],
+            option_c=options[2], option_d=options[3],
+            correct_answer='ABCD'[correct], explanation=explanation,
+            order=order,
+        )
+
+    def create_attempts(self):
+        """Create the attempts with answers drawn from each user's skill."""
+        total = self.counts['attempts']
+        per_quiz = self.questions_per_quiz
+        fields = ['quiz_id', 'user_id', 'version_id', 'session_key', 'score',
+                  'total_questions', 'answer_string', 'started_at',
+                  'completed_at']
+        for start in range(0, total, self.batch_size):
+            size = min(self.batch_size, total - start)
+            users = self.rng.choice(
+                len(self.user_ids), size, p=self.activity)
+            quizzes = self.rng.choice(
+                len(self.quiz_ids), size, p=self.popularity)
+            keys = self.answer_keys[quizzes]
+            correct = (
+                self.rng.random((size, per_quiz)) < self.skill[users, None])
+            wrong = (keys + self.rng.integers(1, 4, (size, per_quiz))) % 4
+            codes = LETTERS[np.where(correct, keys, wrong)]
+            skipped = self.rng.random((size, per_quiz)) < SKIP_RATE
+            codes[skipped] = ord(UNANSWERED)
+            scores = (correct & ~skipped).sum(axis=1)
+            answers = codes.view(f'S{per_quiz}').ravel().astype(str)
+            started = self._offsets(size)
+            completed = started + (
+                self.rng.integers(60, 900, size) * 1_000_000
+            ).astype('timedelta64[us]')
+
+            with transaction.atomic():
+                bulk_insert(QuizAttempt, fields, zip(
+                    self.quiz_ids[quizzes].tolist(),
+                    self.user_ids[users].tolist(),
+                    self.version_ids[quizzes].tolist(),
+                    [''] * size,
+                    scores.tolist(),
+                    [per_quiz] * size,
+                    answers.tolist(),
+                    _timestamps(started),
+                    _timestamps(completed),
+                ))
+            self.progress('attempts', start + size)
+
+    def create_notifications(self):
+        """Create completion, save and system notifications for creators."""
+        total = self.counts['notifications']
+        fields = ['recipient_id', 'notification_type', 'message',
+                  'related_quiz_id', 'is_read', 'created_at']
+        types = Notification.NotificationType
+        for start in range(0, total, self.batch_size):
+            size = min(self.batch_size, total - start)
+            quizzes = self.rng.choice(
+                len(self.quiz_ids), size, p=self.popularity).tolist()
+            senders = self.rng.choice(len(self.usernames), size).tolist()
+            kinds = self.rng.choice(
+                [0, 1, 2], size, p=[0.8, 0.15, 0.05]).tolist()
+            scores = self.rng.integers(0, 101, size).tolist()
+            read = (self.rng.random(size) < 0.6).tolist()
+            created = _timestamps(self._offsets(size))
+            rows = []
+            for i in range(size):
+                quiz = quizzes[i]
+                title = self.titles[quiz]
+                username = self.usernames[senders[i]]
+                if kinds[i] == 0:
+                    kind, message = types.QUIZ_COMPLETED, (
+                        f'{username} completed your quiz "{title}" with a '
+                        f'score of {scores[i]}%')
+                elif kinds[i] == 1:
+                    kind, message = types.QUIZ_SAVED, (
+                        f'{username} saved your quiz "{title}"')
+                else:
+                    kind, message = types.SYSTEM, (
+                        f'Your quiz "{title}" was featured this week.')
+                rows.append((
+                    self.creator_ids[quiz], kind.value, message,
+                    self.quiz_ids[quiz].item(), read[i], created[i]))
+            with transaction.atomic():
+                bulk_insert(Notification, fields, rows)
+            self.progress('notifications', start + size)
+
+    def create_saved_quizzes(self):
+        """Save a few popular quizzes to each user's profile."""
+        through = Profile.saved_quizzes.through
+        per_user = self.rng.poisson(self.saved_per_user, len(self.profile_ids))
+        profiles = np.repeat(np.arange(len(self.profile_ids)), per_user)
+        quizzes = self.rng.choice(
+            len(self.quiz_ids), len(profiles), p=self.popularity)
+        # A quiz is saved once per profile
+        pairs = np.unique(profiles * len(self.quiz_ids) + quizzes)
+        profiles, quizzes = np.divmod(pairs, len(self.quiz_ids))
+        for start in range(0, len(pairs), self.batch_size):
+            stop = start + self.batch_size
+            with transaction.atomic():
+                bulk_insert(through, ['profile_id', 'quiz_id'], zip(
+                    self.profile_ids[profiles[start:stop]].tolist(),
+                    self.quiz_ids[quizzes[start:stop]].tolist()))
+            self.progress('saved quizzes', min(stop, len(pairs)))
+        return len(pairs)
+
+
+def seed_dataset(counts, questions_per_quiz=QUESTIONS_PER_QUIZ,
+                 saved_per_user=SAVED_PER_USER, days=180, prefix='seed',
+                 password='password', seed=42, batch_size=10_000,
+                 progress=None):
+    """
+    Build a synthetic dataset.
+
+    Args:
+        counts: Dict of users, quizzes, attempts and notifications to create
+        questions_per_quiz: Questions in every quiz
+        saved_per_user: Average number of quizzes each user saves
+        days: Attempts and notifications are spread over this many days
+        prefix: Prefix of the usernames and quiz slugs
+        password: Password of every seeded user
+        seed: Random seed; the same seed builds the same data
+        batch_size: Rows generated and inserted per transaction
+        progress: Optional callable receiving a table label and its total
+
+    Returns:
+        Dict of the number of rows created per table
+
+    Raises:
+        ValueError: If data with this prefix already exists
+    """
+    if User.objects.filter(username__startswith=f'{prefix}_').exists():
+        raise ValueError(f'Users named {prefix}_* already exist.')
+    if counts['users'] < 1 or counts['quizzes'] < 1:
+        raise ValueError('At least one user and one quiz are needed.')
+
+    seeder = Seeder(counts, questions_per_quiz, saved_per_user, days, prefix,
+                    password, seed, batch_size, progress)
+    seeder.create_users()
+    seeder.create_quizzes()
+    seeder.create_attempts()
+    seeder.create_notifications()
+    saved = seeder.create_saved_quizzes()
+    invalidate_homepage()
+    return {
+        **counts,
+        'questions': counts['quizzes'] * questions_per_quiz,
+        'saved quizzes': saved,
+    }
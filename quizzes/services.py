@@ -84,6 +84,8 @@ class QuizGeneratorService:
         self.token = os.environ.get("GITHUB_TOKEN")
         if not self.token:
             raise ValueError("GITHUB_TOKEN environment variable not set")
+        # Load tests point this at benchmarks/mock_llm.py
+        self.api_url = os.environ.get("QUIZ_GENERATOR_API_URL", self.API_URL)
 
     def is_valid_topic(self, topic: str) -> bool:
         """
@@ -158,7 +160,7 @@ class QuizGeneratorService:
 
         try:
             req = urllib.request.Request(
-                self.API_URL,
+                self.api_url,
                 data=json.dumps(data).encode(),
                 headers=headers,
             )
@@ -0,0 +1,106 @@
+"""
+Signal receivers that keep cached quiz data in sync with the database
+and push new notifications to open pages.
+"""
+
+from functools import partial
+
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import homepage_shows, invalidate_homepage
+from .events import broker, publish_notification, publish_unread_count
+from .models import Notification, Quiz, Question
+from .rendering import language_for
+from .search import index_quiz
+
+
+class _QuizIndexQueue:
+    """Quiz ids whose search documents are rebuilt once the commit lands."""
+
+    def __init__(self):
+        self.quiz_ids = set()
+        self.done = False
+
+    def __call__(self):
+        self.done = True
+        for quiz_id in sorted(self.quiz_ids):
+            index_quiz(quiz_id)
+
+
+def _index_on_commit(quiz_id):
+    """
+    Rebuild a quiz's search document after the current transaction.
+
+    Each transaction queues one _QuizIndexQueue, so saving every question of
+    a quiz in one request reindexes the quiz once rather than per question.
+    """
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        index_quiz(quiz_id)
+        return
+    queue = next(
+        (func for _, func, _ in connection.run_on_commit
+         if isinstance(func, _QuizIndexQueue) and not func.done), None)
+    if queue is None:
+        queue = _QuizIndexQueue()
+        transaction.on_commit(queue)
+    queue.quiz_ids.add(quiz_id)
+
+
+def _deleted_with_quiz(origin):
+    """Return True if a deletion started from deleting the quiz itself."""
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return model is Quiz
+
+
+@receiver(pre_save, sender=Quiz)
+def quiz_renaming(sender, instance, update_fields=None, **kwargs):
+    """Mark questions stale when a new title names another language."""
+    if instance.pk is None or (
+            update_fields is not None and 'title' not in update_fields):
+        return
+    old_title = Quiz.objects.filter(pk=instance.pk).values_list(
+        'title', flat=True).first()
+    if old_title is not None and (
+            language_for(old_title) != language_for(instance.title)):
+        # Re-rendered with the new language the next time they are read
+        Question.objects.filter(quiz_id=instance.pk).update(render_version=0)
+
+
+@receiver(post_save, sender=Quiz)
+@receiver(post_delete, sender=Quiz)
+def quiz_changed(sender, instance, **kwargs):
+    """Rebuild the homepage when a quiz is created, edited or deleted."""
+    invalidate_homepage()
+    if kwargs['signal'] is post_save:
+        _index_on_commit(instance.pk)
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def question_changed(sender, instance, origin=None, **kwargs):
+    """Mark the quiz as modified and refresh the caches that show it."""
+    if homepage_shows(instance.quiz_id):
+        invalidate_homepage()
+    Quiz.objects.filter(pk=instance.quiz_id).update(
+        updated_at=timezone.now())
+    # The search document goes with the quiz, so it is not rebuilt while
+    # the quiz's questions are deleted along with it
+    if origin is None or not _deleted_with_quiz(origin):
+        _index_on_commit(instance.quiz_id)
+
+
+@receiver(post_save, sender=Notification)
+def notification_saved(sender, instance, created, **kwargs):
+    """Push new notifications and read changes to open pages."""
+    if not broker.has_subscribers(instance.recipient_id):
+        return
+    if created:
+        transaction.on_commit(partial(publish_notification, instance.pk))
+    else:
+        transaction.on_commit(
+            partial(publish_unread_count, instance.recipient_id))
@@ -0,0 +1,122 @@
+"""
+Background tasks that should not delay the response.
+
+Tasks run on a small in-process thread pool once the current transaction
+commits. Set BACKGROUND_TASKS_EAGER to run them inline instead, e.g. in
+tests.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .cache import invalidate_homepage
+from .models import Notification, Question, Quiz, QuizAttempt
+from .rendering import HTML_FIELDS, RENDERER_VERSION, render_question
+from .search import rebuild_index
+
+logger = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='tasks')
+
+# Rows changed per statement by the bulk admin tasks
+CHUNK_SIZE = 1000
+
+
+def _run(func, args, kwargs):
+    """Run a task in a worker thread with its own database connection."""
+    close_old_connections()
+    try:
+        func(*args, **kwargs)
+    except Exception:
+        logger.exception('Background task %s failed', func.__name__)
+    finally:
+        close_old_connections()
+
+
+def run_in_background(func, *args, **kwargs):
+    """Run func(*args, **kwargs) after the current transaction commits."""
+    def submit():
+        if settings.BACKGROUND_TASKS_EAGER:
+            func(*args, **kwargs)
+        else:
+            _executor.submit(_run, func, args, kwargs)
+
+    transaction.on_commit(submit)
+
+
+def notify_quiz_saved(quiz_id, creator_id, username, title):
+    """Tell a quiz creator that someone saved their quiz."""
+    Notification.objects.create(
+        recipient_id=creator_id,
+        notification_type=Notification.NotificationType.QUIZ_SAVED,
+        message=f'{username} saved your quiz "{title}"',
+        related_quiz_id=quiz_id,
+    )
+
+
+def _chunked_pks(queryset, chunk_size):
+    """Yield the primary keys of queryset in ascending chunks."""
+    pks = queryset.order_by('pk').values_list('pk', flat=True)
+    last_pk = None
+    while True:
+        chunk = pks if last_pk is None else pks.filter(pk__gt=last_pk)
+        chunk = list(chunk[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        last_pk = chunk[-1]
+
+
+def _notify_done(user_id, message):
+    """Tell the admin who started a bulk task that it has finished."""
+    Notification.objects.create(
+        recipient_id=user_id,
+        notification_type=Notification.NotificationType.SYSTEM,
+        message=message,
+    )
+
+
+def set_quizzes_featured(queryset, featured, user_id, chunk_size=CHUNK_SIZE):
+    """Feature or unfeature the quizzes in queryset, chunk by chunk."""
+    updated = 0
+    for pks in _chunked_pks(queryset, chunk_size):
+        updated += Quiz.objects.filter(pk__in=pks).update(
+            is_featured=featured)
+    # update() sends no signals, so the homepage is refreshed here
+    invalidate_homepage()
+    action = 'Featured' if featured else 'Unfeatured'
+    _notify_done(user_id, f'{action} {updated} quizzes.')
+
+
+def purge_attempts(queryset, user_id, chunk_size=CHUNK_SIZE):
+    """Delete the quiz attempts in queryset, chunk by chunk."""
+    deleted = 0
+    for pks in _chunked_pks(queryset, chunk_size):
+        count, _ = QuizAttempt.objects.filter(pk__in=pks).delete()
+        deleted += count
+    _notify_done(user_id, f'Deleted {deleted} quiz attempts.')
+
+
+def regenerate_quizzes(queryset, user_id, chunk_size=100):
+    """Re-render the questions and search documents of quizzes."""
+    regenerated = 0
+    for pks in _chunked_pks(queryset, chunk_size):
+        questions = list(
+            Question.objects.filter(quiz_id__in=pks).select_related('quiz'))
+        for question in questions:
+            render_question(question)
+        Question.objects.bulk_update(
+            questions, [*HTML_FIELDS, 'render_version'], batch_size=500)
+        rebuild_index(Quiz.objects.filter(pk__in=pks))
+        # Moves the quizzes' revision so cached pages and documents refresh
+        Quiz.objects.filter(pk__in=pks).update(updated_at=timezone.now())
+        regenerated += len(pks)
+    invalidate_homepage()
+    _notify_done(
+        user_id,
+        f'Regenerated {regenerated} quizzes with renderer '
+        f'v{RENDERER_VERSION}.')
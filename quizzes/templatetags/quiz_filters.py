@@ -3,12 +3,111 @@ Custom template filters for quiz display.
 """
 
 import re
+from functools import lru_cache
 from django import template
 from django.utils.safestring import mark_safe
 from django.utils.html import escape
 
 register = template.Library()
 
+# Markup delimiters. Fences and tags never overlap, so splitting on one and
+# then the other yields the same tokens as a single alternation, but each
+# pattern starts with a literal and is scanned much faster.
+FENCE_RE = re.compile(r'(```\w*\n?)')
+TAG_RE = re.compile(r'(\[/?code(?:block)?\])')
+
+# Stray punctuation that AI sometimes adds after a closing code tag
+TRAILING_PUNCTUATION_RE = re.compile(r'\[/code(block)?\]\s*[?;:]\s*$')
+
+FENCE = '```'
+CODEBLOCK = '[codeblock]'
+CODE = '[code]'
+OPEN_HTML = {
+    FENCE: '<pre><code class="code-block">',
+    CODEBLOCK: '<pre><code class="code-block">',
+    CODE: '<code class="code-inline">',
+}
+CLOSE_HTML = {
+    FENCE: '</code></pre>',
+    CODEBLOCK: '</code></pre>',
+    CODE: '</code>',
+}
+CLOSING_TAGS = {'[/codeblock]': CODEBLOCK, '[/code]': CODE}
+
+
+@lru_cache(maxsize=1024)
+def _render(text):
+    """
+    Render escaped markup in one pass over its delimiters.
+
+    Each kind of block pairs independently: an opener matches the first
+    closer of its kind after it, and openers without a closer are shown as
+    text. Blocks of different kinds may therefore cross, in which case
+    the tags are emitted in the order their delimiters appear. Newlines are
+    kept between a <pre> and the next </pre> and become <br> elsewhere.
+    """
+    text = escape(text)
+
+    # Convert literal \n to actual newlines (AI sometimes sends these)
+    text = text.replace('\\n', '\n')
+    if text.rstrip().endswith(('?', ';', ':')):
+        text = TRAILING_PUNCTUATION_RE.sub(r'[/code\1]', text)
+
+    # Text and delimiters alternate, with delimiters at odd indexes
+    pieces = FENCE_RE.split(text)
+    parts = TAG_RE.split(pieces[0])
+    for index in range(1, len(pieces), 2):
+        parts.append(pieces[index])
+        parts.extend(TAG_RE.split(pieces[index + 1]))
+    if len(parts) == 1:
+        return mark_safe(text.replace('\n', '<br>').replace('`', '&#96;'))
+
+    # Any fence can close a block, so find the last closer of each kind
+    last_closer = {}
+    for index in range(len(parts) - 2, 0, -2):
+        token = parts[index]
+        kind = FENCE if token[0] == '`' else CLOSING_TAGS.get(token)
+        if kind and kind not in last_closer:
+            last_closer[kind] = index
+            if len(last_closer) == 3:
+                break
+
+    result = [parts[0].replace('\n', '<br>')]
+    append = result.append
+    is_open = dict.fromkeys(OPEN_HTML, False)
+    in_pre = False
+    for index in range(1, len(parts), 2):
+        token = parts[index]
+        if token[0] == '`':
+            kind = FENCE
+            closing = is_open[FENCE]
+        else:
+            kind = CLOSING_TAGS.get(token)
+            closing = kind is not None
+            if not closing:
+                kind = token
+
+        if closing:
+            if is_open[kind]:
+                append(CLOSE_HTML[kind])
+                is_open[kind] = False
+                if kind != CODE:
+                    in_pre = False
+                # A closing fence never takes a language name or newline
+                token = token[3:] if kind == FENCE else ''
+        elif not is_open[kind] and last_closer.get(kind, 0) > index:
+            append(OPEN_HTML[kind])
+            is_open[kind] = True
+            if kind != CODE:
+                in_pre = True
+            token = ''
+
+        text = token + parts[index + 1]
+        append(text if in_pre else text.replace('\n', '<br>'))
+
+    # Backticks stay visible (for template literals) rather than styling
+    return mark_safe(''.join(result).replace('`', '&#96;'))
+
 
 @register.filter(name='render_code')
 def render_code(text):
@@ -22,68 +121,10 @@ def render_code(text):
     - Literal \\n characters converted to line breaks
     - Backticks displayed as visible characters (for template literals)
 
+    Results for recent inputs are memoized.
+
     Usage: {{ question.text|render_code }}
     """
     if not text:
         return text
-
-    # First escape HTML to prevent XSS
-    text = escape(text)
-
-    # Convert literal \n to actual newlines (AI sometimes sends these)
-    text = text.replace('\\n', '\n')
-
-    # Remove stray punctuation that AI sometimes adds after code blocks
-    text = re.sub(r'\[/code\]\s*[?;:]\s*$', '[/code]', text)
-    text = re.sub(r'\[/codeblock\]\s*[?;:]\s*$', '[/codeblock]', text)
-
-    # Handle triple backtick code blocks (```...```)
-    text = re.sub(
-        r'```(?:\w+)?\n?(.*?)```',
-        r'<pre><code class="code-block">\1</code></pre>',
-        text,
-        flags=re.DOTALL
-    )
-
-    # Handle [codeblock]...[/codeblock] tags for multi-line code
-    # First, protect backticks inside codeblock by replacing with placeholder
-    def protect_backticks_codeblock(match):
-        content = match.group(1).replace('`', '&#96;')
-        return f'<pre><code class="code-block">{content}</code></pre>'
-    
-    text = re.sub(
-        r'\[codeblock\](.*?)\[/codeblock\]',
-        protect_backticks_codeblock,
-        text,
-        flags=re.DOTALL
-    )
-
-    # Handle [code]...[/code] tags for inline code
-    # Also protect backticks inside code tags
-    def protect_backticks_code(match):
-        content = match.group(1).replace('`', '&#96;')
-        return f'<code class="code-inline">{content}</code>'
-    
-    text = re.sub(
-        r'\[code\](.*?)\[/code\]',
-        protect_backticks_code,
-        text,
-        flags=re.DOTALL
-    )
-
-    # Convert any remaining backticks to visible HTML entity (not code styling)
-    # This ensures template literal backticks are visible
-    text = text.replace('`', '&#96;')
-
-    # Convert remaining newlines to <br> for display (outside of pre tags)
-    # But preserve newlines inside <pre> tags
-    parts = re.split(r'(<pre>.*?</pre>)', text, flags=re.DOTALL)
-    result = []
-    for part in parts:
-        if part.startswith('<pre>'):
-            result.append(part)
-        else:
-            result.append(part.replace('\n', '<br>'))
-    text = ''.join(result)
-
-    return mark_safe(text)
+    return _render(str(text))
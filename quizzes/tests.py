@@ -2,10 +2,48 @@
 Tests for the quizzes app.
 Tests cover models, views, and templates.
 """
-from django.test import TestCase, Client
+import json
+import tracemalloc
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock, skipUnless
+import numpy as np
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.contrib.auth.models import User
-from .models import Quiz, Question, QuizAttempt, Notification
+from datetime import timedelta
+from django.core.cache import cache
+from django.core.cache.backends.db import DatabaseCache
+from django.core.management import call_command
+from django.utils import timezone
+from accounts.models import Profile
+from .models import (
+    Quiz, Question, QuizAttempt, QuizVersion, ArchivedQuizAttempt,
+    Notification, QuizSearchDocument, LeaderboardEntry, RelatedQuiz,
+    QuestionMastery, QuestionStatistics, QuizStatistics)
+from .adaptive import (
+    GRID, LOG_PRIOR, MAX_QUESTIONS, ItemBank, _load_item_bank, estimate,
+    item_parameters, select_next, update)
+from .admin import EstimatedCountPaginator
+from .archive import archive_attempts
+from .cache import get_answer_key, get_homepage_quizzes
+from .leaderboards import (
+    period_start, record_attempt, top_entries, user_rank)
+from .mastery import MAX_BOX, record_answers, schedule
+from .psychometrics import compute_item_statistics
+from .quiz_bank import export_gift, import_quizzes, parse_gift
+from .recommendations import related_quizzes
+from .rendering import RENDERER_VERSION, language_for
+from .retention import NotificationRetentionPolicy
+from .search import rebuild_index, search_hits, search_quizzes
+from .seeding import seed_dataset
+from .answers import encode_answers, decode_answers
+from .templatetags.quiz_filters import render_code, _render
 
 
 class QuizModelTest(TestCase):
@@ -177,6 +215,127 @@ class QuizAttemptModelTest(TestCase):
         self.assertIn('Guest', str(attempt))
 
 
+class CompactAnswersTest(TestCase):
+    """Test cases for the compact attempt answer encoding."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.quiz = Quiz.objects.create(title='Test Quiz')
+        self.questions = [
+            Question.objects.create(
+                quiz=self.quiz, text=f'Q{i}', option_a='A', option_b='B',
+                option_c='C', option_d='D', correct_answer='A', order=i
+            )
+            for i in range(1, 4)
+        ]
+        self.question_ids = [q.id for q in self.questions]
+
+    def test_encode_answers_aligns_to_question_order(self):
+        """Test that answers are encoded one character per question."""
+        answers = {self.question_ids[0]: 'B', self.question_ids[2]: 'D'}
+        self.assertEqual(encode_answers(self.question_ids, answers), 'B-D')
+
+    def test_decode_answers_round_trip(self):
+        """Test that decoding restores the answers dict."""
+        decoded = decode_answers(self.question_ids, 'B-D')
+        self.assertEqual(decoded, {
+            self.question_ids[0]: 'B',
+            self.question_ids[1]: '',
+            self.question_ids[2]: 'D',
+        })
+
+    def test_version_reused_for_same_question_order(self):
+        """Test that an unchanged quiz reuses its latest version."""
+        first = QuizVersion.objects.for_questions(self.quiz, self.question_ids)
+        second = QuizVersion.objects.for_questions(
+            self.quiz, self.question_ids)
+        self.assertEqual(first, second)
+        self.assertEqual(first.number, 1)
+
+    def test_new_version_when_questions_change(self):
+        """Test that editing the question set creates a new version."""
+        QuizVersion.objects.for_questions(self.quiz, self.question_ids)
+        version = QuizVersion.objects.for_questions(
+            self.quiz, self.question_ids[:2])
+        self.assertEqual(version.number, 2)
+        self.assertEqual(version.get_question_ids(), self.question_ids[:2])
+
+    def test_submit_stores_compact_answers(self):
+        """Test that a submitted attempt stores an answer string."""
+        self.client.login(username='testuser', password='testpass123')
+        self.client.post(
+            reverse('quizzes:submit', kwargs={'slug': self.quiz.slug}),
+            {f'question_{self.question_ids[0]}': 'A',
+             f'question_{self.question_ids[2]}': 'C'}
+        )
+        attempt = QuizAttempt.objects.get(user=self.user)
+        self.assertEqual(attempt.answer_string, 'A-C')
+        self.assertIsNone(attempt.answers)
+        self.assertEqual(attempt.get_answers()[self.question_ids[2]], 'C')
+
+    def test_legacy_json_answers_still_readable(self):
+        """Test that attempts without a version fall back to JSON."""
+        attempt = QuizAttempt.objects.create(
+            quiz=self.quiz,
+            user=self.user,
+            answers={str(self.question_ids[0]): 'D'}
+        )
+        self.assertEqual(attempt.get_answers(), {self.question_ids[0]: 'D'})
+
+
+class AttemptArchiveTest(TestCase):
+    """Test cases for moving old attempts into cold storage."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.quiz = Quiz.objects.create(title='Test Quiz')
+        self.old_attempts = [
+            QuizAttempt.objects.create(
+                quiz=self.quiz, user=self.user, score=i, total_questions=5,
+                answer_string='ABCD-'
+            )
+            for i in range(3)
+        ]
+        QuizAttempt.objects.filter(
+            pk__in=[a.pk for a in self.old_attempts]
+        ).update(started_at=timezone.now() - timedelta(days=400))
+        self.recent = QuizAttempt.objects.create(
+            quiz=self.quiz, user=self.user, score=5, total_questions=5)
+
+    def test_archive_moves_only_old_attempts(self):
+        """Test that attempts past the horizon are moved in batches."""
+        moved = archive_attempts(
+            timezone.now() - timedelta(days=365), batch_size=2)
+        self.assertEqual(moved, 3)
+        self.assertEqual(
+            list(QuizAttempt.objects.values_list('pk', flat=True)),
+            [self.recent.pk])
+        self.assertEqual(ArchivedQuizAttempt.objects.count(), 3)
+
+    def test_archive_keeps_attempt_ids_and_data(self):
+        """Test that archived rows keep their id and answers."""
+        archive_attempts(timezone.now() - timedelta(days=365))
+        archived = ArchivedQuizAttempt.objects.get(pk=self.old_attempts[1].pk)
+        self.assertEqual(archived.score, 1)
+        self.assertEqual(archived.answer_string, 'ABCD-')
+        self.assertEqual(archived.user, self.user)
+
+    def test_archive_command_uses_days_option(self):
+        """Test the archive_attempts management command."""
+        call_command('archive_attempts', days=500, stdout=StringIO())
+        self.assertEqual(ArchivedQuizAttempt.objects.count(), 0)
+        call_command('archive_attempts', days=30, stdout=StringIO())
+        self.assertEqual(ArchivedQuizAttempt.objects.count(), 3)
+
+
 class NotificationModelTest(TestCase):
     """Test cases for the Notification model."""
 
@@ -216,11 +375,95 @@ class NotificationModelTest(TestCase):
         self.assertEqual(notification.notification_type, 'system')
 
 
+class NotificationRetentionTest(TestCase):
+    """Test cases for the notification retention policy."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+
+    def _notify(self, days_ago, is_read=False, notification_type='quiz_saved'):
+        """Create a notification backdated by days_ago."""
+        notification = Notification.objects.create(
+            recipient=self.user,
+            notification_type=notification_type,
+            message='Test notification',
+            is_read=is_read
+        )
+        Notification.objects.filter(pk=notification.pk).update(
+            created_at=timezone.now() - timedelta(days=days_ago))
+        return notification
+
+    def test_old_read_notifications_deleted(self):
+        """Test that read notifications past the horizon are deleted."""
+        self._notify(40, is_read=True)
+        recent = self._notify(1, is_read=True)
+        policy = NotificationRetentionPolicy(delete_read_after_days=30)
+        self.assertEqual(policy.delete_old_read(), 1)
+        self.assertEqual(
+            list(Notification.objects.values_list('pk', flat=True)),
+            [recent.pk])
+
+    def test_old_unread_notifications_rolled_up(self):
+        """Test that old unread notifications become one summary."""
+        self._notify(100)
+        self._notify(120)
+        self._notify(110, notification_type='quiz_completed')
+        self._notify(1)
+        policy = NotificationRetentionPolicy(rollup_after_days=90)
+        rolled_up, summaries = policy.roll_up_old()
+        self.assertEqual((rolled_up, summaries), (3, 1))
+        summary = Notification.objects.get(notification_type='system')
+        self.assertIn('3 older notifications', summary.message)
+        self.assertIn('1 quiz completion,', summary.message)
+        self.assertEqual(Notification.objects.count(), 2)
+
+    def test_interrupted_roll_up_counts_each_row_once(self):
+        """Test that a run stopped between batches is not summarised twice."""
+        for days in (100, 110, 120):
+            self._notify(days)
+        policy = NotificationRetentionPolicy(
+            rollup_after_days=90, batch_size=2, pause=1)
+        with mock.patch('quizzes.retention.time.sleep',
+                        side_effect=KeyboardInterrupt):
+            with self.assertRaises(KeyboardInterrupt):
+                policy.roll_up_old()
+        summary = Notification.objects.get(notification_type='system')
+        self.assertIn('2 older notifications', summary.message)
+
+        self.assertEqual(policy.roll_up_old(), (1, 1))
+        self.assertEqual(
+            sorted(Notification.objects.values_list('message', flat=True)),
+            ['You had 1 older notification: 1 quiz save.',
+             'You had 2 older notifications: 2 quiz saves.'])
+
+    def test_keep_last_per_user(self):
+        """Test that only the newest notifications are kept."""
+        newest = [self._notify(days) for days in range(5)][:3]
+        deleted = NotificationRetentionPolicy(
+            keep_last=3, batch_size=1).enforce_keep_last()
+        self.assertEqual(deleted, 2)
+        self.assertEqual(
+            set(Notification.objects.values_list('pk', flat=True)),
+            {n.pk for n in newest})
+
+    def test_prune_command_reports_metrics(self):
+        """Test that the prune_notifications command reports rows reclaimed."""
+        self._notify(40, is_read=True)
+        out = StringIO()
+        call_command('prune_notifications', read_days=30, stdout=out)
+        self.assertIn('Reclaimed 1 rows', out.getvalue())
+
+
 class HomeViewTest(TestCase):
     """Test cases for the home view."""
 
     def setUp(self):
         """Set up test data."""
+        cache.clear()
         self.client = Client()
 
     def test_home_view_status_code(self):
@@ -239,12 +482,55 @@ class HomeViewTest(TestCase):
         response = self.client.get(reverse('home'))
         self.assertIn(quiz, response.context['featured_quizzes'])
 
+    def test_home_view_cached_after_first_request(self):
+        """Test that a warm homepage does not query for quizzes."""
+        Quiz.objects.create(title='Featured Quiz', is_featured=True)
+        self.client.get(reverse('home'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('home'))
+        self.assertContains(response, 'Featured Quiz')
+
+    def test_home_view_fills_with_recent_quizzes(self):
+        """Test that recent quizzes fill the slots left by featured ones."""
+        featured = Quiz.objects.create(title='Featured', is_featured=True)
+        recent = Quiz.objects.create(title='Recent')
+        response = self.client.get(reverse('home'))
+        self.assertEqual(
+            response.context['featured_quizzes'], [featured, recent])
+
+    def test_featured_toggle_invalidates_cache(self):
+        """Test that featuring a quiz refreshes the cached homepage."""
+        for i in range(6):
+            Quiz.objects.create(title=f'Recent {i}')
+        old = Quiz.objects.create(title='Older Quiz')
+        Quiz.objects.filter(pk=old.pk).update(
+            created_at=timezone.now() - timedelta(days=30))
+        self.client.get(reverse('home'))
+        old.refresh_from_db()
+        old.is_featured = True
+        old.save()
+        response = self.client.get(reverse('home'))
+        self.assertContains(response, 'Older Quiz')
+
+    def test_question_change_invalidates_cache(self):
+        """Test that adding a question updates the cached count."""
+        quiz = Quiz.objects.create(title='Featured Quiz', is_featured=True)
+        self.client.get(reverse('home'))
+        Question.objects.create(
+            quiz=quiz, text='Q1', option_a='A', option_b='B',
+            option_c='C', option_d='D', correct_answer='A', order=1
+        )
+        response = self.client.get(reverse('home'))
+        quizzes = response.context['featured_quizzes']
+        self.assertEqual(quizzes[0].num_questions, 1)
+
 
 class QuizDetailViewTest(TestCase):
     """Test cases for the quiz detail view."""
 
     def setUp(self):
         """Set up test data."""
+        cache.clear()
         self.client = Client()
         self.quiz = Quiz.objects.create(title='Test Quiz')
         self.question = Question.objects.create(
@@ -258,6 +544,11 @@ class QuizDetailViewTest(TestCase):
             order=1
         )
 
+    def _data_url(self):
+        self.quiz.refresh_from_db()
+        url = reverse('quizzes:data', kwargs={'slug': self.quiz.slug})
+        return f'{url}?v={self.quiz.revision}'
+
     def test_quiz_detail_view_status_code(self):
         """Test that quiz detail view returns 200."""
         response = self.client.get(
@@ -278,7 +569,7 @@ class QuizDetailViewTest(TestCase):
             reverse('quizzes:detail', kwargs={'slug': self.quiz.slug})
         )
         self.assertEqual(response.context['quiz'], self.quiz)
-        self.assertEqual(len(response.context['questions']), 1)
+        self.assertEqual(response.context['question_count'], 1)
 
     def test_quiz_detail_404_for_invalid_slug(self):
         """Test that 404 is returned for invalid slug."""
@@ -287,6 +578,171 @@ class QuizDetailViewTest(TestCase):
         )
         self.assertEqual(response.status_code, 404)
 
+    def test_quiz_detail_does_not_load_questions(self):
+        """Test that the page shell leaves the questions to the document."""
+        url = reverse('quizzes:detail', kwargs={'slug': self.quiz.slug})
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertFalse(any(
+            'FROM "quizzes_question"' in query['sql'] for query in queries))
+        self.assertNotContains(response, 'Test Question')
+        self.assertContains(
+            response, f'data-document-url="{self._data_url()}"')
+
+    def test_quiz_data_returns_questions_without_answers(self):
+        """Test that the document lists questions but no correct answers."""
+        response = self.client.get(self._data_url())
+        data = response.json()
+        self.assertEqual(data['revision'], self.quiz.revision)
+        self.assertEqual(data['questions'], [{
+            'id': self.question.id,
+            'text': 'Test Question',
+            'options': ['A', 'B', 'C', 'D'],
+        }])
+        self.assertNotIn('correct', response.content.decode())
+
+    def test_quiz_data_cached_for_its_revision(self):
+        """Test that a versioned document URL is cached for good."""
+        response = self.client.get(self._data_url())
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('public', response['Cache-Control'])
+        response = self.client.get(
+            reverse('quizzes:data', kwargs={'slug': self.quiz.slug}))
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+
+    def test_quiz_data_renders_code(self):
+        """Test that code tags in questions are rendered as HTML."""
+        self.question.text = 'What is [code]x < 1[/code]?'
+        self.question.save()
+        response = self.client.get(self._data_url())
+        self.assertIn(
+            '<code class="code-inline">x &lt; 1</code>',
+            response.json()['questions'][0]['text'])
+
+    def test_quiz_data_does_not_re_render(self):
+        """Test that the document uses stored HTML instead of rendering."""
+        with mock.patch('quizzes.rendering.render_code') as render:
+            response = self.client.get(self._data_url())
+        render.assert_not_called()
+        self.assertContains(response, 'Test Question')
+
+    def test_quiz_data_served_from_cache(self):
+        """Test that a warm document needs no question queries."""
+        url = self._data_url()
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        self.assertEqual(len(queries), 1)
+
+    def test_question_edit_refreshes_rendered_html(self):
+        """Test that editing a question changes the document and its URL."""
+        old_url = self._data_url()
+        self.client.get(old_url)
+        self.question.text = 'Edited Question'
+        self.question.save(update_fields=['text'])
+        new_url = self._data_url()
+        self.assertNotEqual(new_url, old_url)
+        response = self.client.get(new_url)
+        self.assertContains(response, 'Edited Question')
+        self.assertNotContains(response, 'Test Question')
+
+    def test_stale_render_version_re_rendered_on_read(self):
+        """Test that questions from an older renderer are re-rendered."""
+        Question.objects.filter(pk=self.question.pk).update(
+            text='New [code]x[/code]', text_html='old', render_version=0)
+        response = self.client.get(self._data_url())
+        self.assertEqual(
+            response.json()['questions'][0]['text'],
+            'New <code class="code-inline">x</code>')
+        self.question.refresh_from_db()
+        self.assertEqual(self.question.render_version, RENDERER_VERSION)
+
+
+class QuestionRenderingTest(TestCase):
+    """Test cases for the stored question HTML."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.quiz = Quiz.objects.create(title='Python Loops')
+
+    def _question(self, **kwargs):
+        fields = dict(
+            quiz=self.quiz, text='Q', option_a='A', option_b='B',
+            option_c='C', option_d='D', correct_answer='A')
+        fields.update(kwargs)
+        return Question(**fields)
+
+    def test_code_blocks_highlighted_for_quiz_language(self):
+        """Test that code blocks use the language named in the title."""
+        question = self._question(text='[codeblock]def f(): pass[/codeblock]')
+        question.save()
+        self.assertIn('code-block highlight', question.text_html)
+        self.assertIn('<span class="k">def</span>', question.text_html)
+
+    def test_fence_language_overrides_quiz_language(self):
+        """Test that a fenced block's language name is used."""
+        question = self._question(text='```sql\nSELECT 1\n```')
+        question.save()
+        self.assertIn('<span class="k">SELECT</span>', question.text_html)
+
+    def test_no_highlighting_without_language(self):
+        """Test that code blocks are left plain when no language is known."""
+        self.quiz.title = 'General Trivia'
+        question = self._question(text='[codeblock]x = 1[/codeblock]')
+        question.save()
+        self.assertEqual(
+            question.text_html,
+            '<pre><code class="code-block">x = 1</code></pre>')
+
+    def test_ambiguous_title_words_pick_no_language(self):
+        """Test that everyday words in a title do not pick a lexer."""
+        for title in ('Go Beyond the Basics', 'Swift Review', 'Grade C Quiz',
+                      'Shell Game', 'Node Trees'):
+            self.assertIsNone(language_for(title), title)
+        self.assertEqual(language_for('Golang Channels'), 'go')
+        self.assertEqual(language_for('Modern C++'), 'cpp')
+
+    def test_fence_names_ambiguous_language(self):
+        """Test that a fence may name a language a title cannot."""
+        self.quiz.title = 'Go Further'
+        question = self._question(text='```go\nfunc main() {}\n```')
+        question.save()
+        self.assertIn('<span class="kd">func</span>', question.text_html)
+
+    def test_title_language_change_re_renders_questions(self):
+        """Test that renaming a quiz to another language re-highlights it."""
+        self._question(text='[codeblock]function f() {}[/codeblock]').save()
+        self.quiz.title = 'JavaScript Loops'
+        self.quiz.save()
+        question = self.quiz.questions.rendered()[0]
+        self.assertIn('<span class="kd">function</span>', question.text_html)
+        self.assertEqual(
+            self.quiz.questions.get().render_version, RENDERER_VERSION)
+
+    def test_bulk_create_renders_questions(self):
+        """Test that bulk-created questions carry rendered HTML."""
+        Question.objects.bulk_create(
+            [self._question(option_b='[code]b[/code]', order=i)
+             for i in range(3)])
+        for question in self.quiz.questions.all():
+            self.assertEqual(
+                question.option_b_html, '<code class="code-inline">b</code>')
+            self.assertEqual(question.render_version, RENDERER_VERSION)
+
+    def test_render_questions_command_backfills_stale_rows(self):
+        """Test that the backfill command re-renders stale questions."""
+        question = self._question(text='[code]y[/code]')
+        question.save()
+        Question.objects.filter(pk=question.pk).update(
+            text_html='', render_version=0)
+        out = StringIO()
+        call_command('render_questions', stdout=out)
+        question.refresh_from_db()
+        self.assertEqual(
+            question.text_html, '<code class="code-inline">y</code>')
+        self.assertIn('Rendered 1 questions', out.getvalue())
+
 
 class QuizSubmitViewTest(TestCase):
     """Test cases for the quiz submit view."""
@@ -368,6 +824,1382 @@ class QuizSubmitViewTest(TestCase):
         ).first()
         self.assertIsNotNone(notification)
 
+    def test_answer_key_cached(self):
+        """Test that a warm answer key needs no queries."""
+        cache.clear()
+        key = get_answer_key(self.quiz)
+        self.assertEqual(key.question_ids, (self.question.id,))
+        self.assertEqual(key.letters, 'A')
+        with self.assertNumQueries(0):
+            self.assertEqual(get_answer_key(self.quiz), key)
+
+    def test_answer_key_refreshed_after_edit(self):
+        """Test that editing a correct answer changes the grading."""
+        self.client.post(
+            reverse('quizzes:submit', kwargs={'slug': self.quiz.slug}),
+            {f'question_{self.question.id}': 'A'}
+        )
+        self.question.correct_answer = 'B'
+        self.question.save()
+        response = self.client.post(
+            reverse('quizzes:submit', kwargs={'slug': self.quiz.slug}),
+            {f'question_{self.question.id}': 'A'}
+        )
+        self.assertEqual(response.context['correct_count'], 0)
+
+    def test_quiz_submit_does_not_load_creator(self):
+        """Test that notifying the creator does not fetch the creator."""
+        creator = User.objects.create_user(username='creator')
+        self.quiz.creator = creator
+        self.quiz.save()
+        self.client.login(username='testuser', password='testpass123')
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(
+                reverse('quizzes:submit', kwargs={'slug': self.quiz.slug}),
+                {f'question_{self.question.id}': 'A'}
+            )
+        user_queries = [
+            query for query in queries
+            if query['sql'].startswith('SELECT')
+            and 'FROM "auth_user"' in query['sql']
+        ]
+        # Only the logged-in user is loaded
+        self.assertEqual(len(user_queries), 1)
+
+
+class QuizGradeViewTest(TestCase):
+    """Test cases for the JSON quiz grading endpoint."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.quiz = Quiz.objects.create(title='Test Quiz')
+        for order, letter in enumerate('ABC', start=1):
+            Question.objects.create(
+                quiz=self.quiz, text=f'Question {order}', option_a='A',
+                option_b='B', option_c='C', option_d='D',
+                correct_answer=letter, order=order)
+        self.quiz.refresh_from_db()
+        self.url = reverse('quizzes:grade', kwargs={'slug': self.quiz.slug})
+
+    def _grade(self, answers, revision=None):
+        return self.client.post(
+            self.url,
+            json.dumps({
+                'revision': revision or self.quiz.revision,
+                'answers': answers,
+            }),
+            content_type='application/json',
+        )
+
+    def test_grade_returns_only_correctness(self):
+        """Test that grading returns per-question correctness and score."""
+        response = self._grade('AC-')
+        self.assertEqual(response.json(), {
+            'correct': [True, False, False],
+            'score': 1,
+            'total': 3,
+        })
+
+    def test_grade_saves_attempt_for_logged_user(self):
+        """Test that a logged-in user's attempt is saved."""
+        self.client.login(username='testuser', password='testpass123')
+        response = self._grade('ABX')
+        attempt = QuizAttempt.objects.get(user=self.user, quiz=self.quiz)
+        self.assertEqual(attempt.score, 2)
+        self.assertEqual(attempt.answer_string, 'AB-')
+        self.assertEqual(
+            response.json()['attempt_url'],
+            reverse('accounts:attempt_detail', args=[attempt.pk]))
+
+    def test_grade_refuses_stale_revision(self):
+        """Test that answers for an edited quiz are refused."""
+        response = self._grade('ABC', revision='1')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['revision'], self.quiz.revision)
+        self.assertFalse(QuizAttempt.objects.exists())
+
+    def test_grade_rejects_invalid_body(self):
+        """Test that a malformed body is a 400."""
+        response = self.client.post(
+            self.url, 'not json', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        response = self._grade(['A', 'B', 'C'])
+        self.assertEqual(response.status_code, 400)
+
+    def test_grade_requires_post(self):
+        """Test that GET is not allowed."""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 405)
+
+
+class PublicPageCacheTest(TestCase):
+    """Test cases for conditional GET on anonymous home and quiz pages."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        self.client = Client()
+        self.quiz = Quiz.objects.create(title='Test Quiz', is_featured=True)
+        self.question = Question.objects.create(
+            quiz=self.quiz, text='Q', option_a='A', option_b='B',
+            option_c='C', option_d='D', correct_answer='A')
+        self.detail_url = reverse(
+            'quizzes:detail', kwargs={'slug': self.quiz.slug})
+
+    def test_anonymous_pages_are_publicly_cacheable(self):
+        """Test that anonymous pages carry validators and set no cookies."""
+        for url in (reverse('home'), self.detail_url):
+            response = self.client.get(url)
+            self.assertTrue(response.has_header('ETag'))
+            self.assertTrue(response.has_header('Last-Modified'))
+            self.assertIn('public', response['Cache-Control'])
+            self.assertIn('Cookie', response['Vary'])
+            self.assertEqual(len(response.cookies), 0)
+            self.assertNotContains(response, 'csrfmiddlewaretoken')
+
+    def test_home_revalidates_without_queries(self):
+        """Test that a repeat homepage fetch is a 304 with no queries."""
+        etag = self.client.get(reverse('home'))['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                reverse('home'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_shared_cache_sees_writes_from_other_processes(self):
+        """Test that the homepage refreshes through a database cache."""
+        shared = {'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'test_shared_cache'}}
+        with override_settings(CACHES=shared):
+            call_command('createcachetable', verbosity=0)
+            etag = self.client.get(reverse('home'))['ETag']
+            # A management command in another process has its own cache
+            # connection, sharing only the table
+            other_process = DatabaseCache('test_shared_cache', {})
+            with mock.patch('quizzes.cache.cache', other_process):
+                Quiz.objects.create(title='Imported Quiz')
+            response = self.client.get(
+                reverse('home'), HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'Imported Quiz')
+
+    def test_home_etag_changes_when_homepage_changes(self):
+        """Test that a homepage change invalidates the ETag."""
+        etag = self.client.get(reverse('home'))['ETag']
+        Quiz.objects.create(title='Newer Quiz')
+        response = self.client.get(reverse('home'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Newer Quiz')
+
+    def test_quiz_detail_revalidates_with_one_query(self):
+        """Test that a repeat quiz page fetch only checks the version."""
+        etag = self.client.get(self.detail_url)['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_quiz_detail_revalidates_by_last_modified(self):
+        """Test that If-Modified-Since is honoured."""
+        last_modified = self.client.get(self.detail_url)['Last-Modified']
+        response = self.client.get(
+            self.detail_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_question_edit_changes_quiz_etag(self):
+        """Test that editing a question invalidates the quiz page."""
+        etag = self.client.get(self.detail_url)['ETag']
+        self.question.text = 'Edited'
+        self.question.save()
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_logged_in_pages_are_private(self):
+        """Test that pages for logged-in users are never shared."""
+        User.objects.create_user(username='testuser', password='pass12345')
+        self.client.login(username='testuser', password='pass12345')
+        response = self.client.get(self.detail_url)
+        self.assertIn('private', response['Cache-Control'])
+        self.assertFalse(response.has_header('ETag'))
+        self.assertContains(response, 'csrfmiddlewaretoken')
+
+    def test_csrf_endpoint_issues_token(self):
+        """Test that pages without a token can fetch one."""
+        response = self.client.get(reverse('csrf'))
+        self.assertTrue(response.json()['token'])
+        self.assertIn('csrftoken', response.cookies)
+        self.assertIn('no-cache', response['Cache-Control'])
+
+
+class QuizSearchTest(TestCase):
+    """Test cases for full-text quiz search."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.client = Client()
+        # Search documents are rebuilt when the saving transaction commits
+        with self.captureOnCommitCallbacks(execute=True):
+            self.loops = Quiz.objects.create(
+                title='Python Loops', description='Iterate over things')
+            self.question = Question.objects.create(
+                quiz=self.loops,
+                text='What does [code]range(3)[/code] yield?',
+                option_a='A', option_b='B', option_c='C', option_d='D',
+                correct_answer='A')
+            self.sql = Quiz.objects.create(
+                title='SQL Joins', description='Combining tables')
+            Question.objects.create(
+                quiz=self.sql, text='Which join keeps unmatched loops rows?',
+                option_a='A', option_b='B', option_c='C', option_d='D',
+                correct_answer='A')
+
+    def test_search_matches_question_text(self):
+        """Test that question text is searchable and highlighted."""
+        hits = search_hits('range')
+        self.assertEqual([hit.quiz_id for hit in hits], [self.loops.pk])
+        self.assertIn('<mark>range</mark>', hits[0].snippet)
+
+    def test_title_matches_rank_first(self):
+        """Test that a title match outranks a question text match."""
+        hits = search_hits('loops')
+        self.assertEqual(
+            [hit.quiz_id for hit in hits], [self.loops.pk, self.sql.pk])
+
+    def test_index_updated_when_question_saved(self):
+        """Test that editing a question re-indexes its quiz."""
+        self.question.text = 'What is a generator expression?'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.question.save()
+        self.assertEqual(len(search_hits('generator')), 1)
+        self.assertEqual(search_hits('range'), [])
+
+    def test_index_updated_when_question_deleted(self):
+        """Test that a deleted question is no longer found."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.question.delete()
+        self.assertEqual(search_hits('range'), [])
+
+    def test_quiz_reindexed_once_per_transaction(self):
+        """Test that saving many questions at once reindexes the quiz once."""
+        with mock.patch('quizzes.signals.index_quiz') as index_quiz:
+            with self.captureOnCommitCallbacks(execute=True):
+                for i in range(3):
+                    Question.objects.create(
+                        quiz=self.loops, text=f'Question {i}', option_a='A',
+                        option_b='B', option_c='C', option_d='D',
+                        correct_answer='A', order=i + 2)
+                self.assertFalse(index_quiz.called)
+        index_quiz.assert_called_once_with(self.loops.pk)
+
+    def test_deleted_quiz_leaves_index(self):
+        """Test that deleting a quiz removes its search document."""
+        self.loops.delete()
+        self.assertFalse(
+            QuizSearchDocument.objects.filter(pk=self.loops.pk).exists())
+        self.assertEqual(search_hits('range'), [])
+
+    def test_query_syntax_and_markup_are_safe(self):
+        """Test that search operators and HTML in queries are harmless."""
+        with self.captureOnCommitCallbacks(execute=True):
+            Question.objects.create(
+                quiz=self.sql, text='Is 1 < 2 a valid comparison?',
+                option_a='A', option_b='B', option_c='C', option_d='D',
+                correct_answer='A')
+        self.assertEqual(search_hits('"join* OR (NEAR'), [])
+        hits = search_hits('comparison')
+        self.assertIn('1 &lt; 2', hits[0].snippet)
+        self.assertIn('<mark>comparison</mark>', hits[0].snippet)
+
+    def test_search_quizzes_returns_annotated_quizzes(self):
+        """Test that results carry their question count and snippet."""
+        with self.assertNumQueries(2):
+            results = search_quizzes('joins')
+        self.assertEqual(results, [self.sql])
+        self.assertEqual(results[0].num_questions, 1)
+        self.assertTrue(results[0].snippet)
+
+    def test_search_view(self):
+        """Test that the search page lists matching quizzes."""
+        response = self.client.get(reverse('quizzes:search'), {'q': 'join'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'quizzes/quiz_search.html')
+        self.assertContains(response, 'SQL Joins')
+        self.assertNotContains(response, 'Python Loops')
+        self.assertFalse(response.context['has_next'])
+
+    def test_search_view_without_query(self):
+        """Test that the search page without a query shows no results."""
+        response = self.client.get(reverse('quizzes:search'))
+        self.assertEqual(response.context['results'], [])
+
+    def test_rebuild_command_restores_index(self):
+        """Test that the rebuild command re-creates missing documents."""
+        QuizSearchDocument.objects.all().delete()
+        out = StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertEqual(len(search_hits('range')), 1)
+        self.assertIn('Indexed 2 quizzes', out.getvalue())
+
+
+@override_settings(BACKGROUND_TASKS_EAGER=True)
+class LargeTableAdminTest(TestCase):
+    """Test cases for the admin of the quiz, question and attempt tables."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.admin = User.objects.create_superuser(
+            username='admin', password='adminpass123')
+        self.client = Client()
+        self.client.login(username='admin', password='adminpass123')
+        self.quizzes = [
+            Quiz.objects.create(title=f'Quiz {i}') for i in range(3)]
+        for quiz in self.quizzes:
+            Question.objects.create(
+                quiz=quiz, text='Q', option_a='A', option_b='B',
+                option_c='C', option_d='D', correct_answer='A')
+            QuizAttempt.objects.create(
+                quiz=quiz, user=self.admin, score=1, total_questions=1)
+        self.attempts_url = reverse('admin:quizzes_quizattempt_changelist')
+
+    def _changelist_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_attempt_changelist_queries_do_not_grow_with_rows(self):
+        """Test that listing attempts needs no per-row or per-quiz query."""
+        before = self._changelist_queries(self.attempts_url)
+        for i in range(10):
+            quiz = Quiz.objects.create(title=f'Extra {i}')
+            QuizAttempt.objects.create(
+                quiz=quiz, user=User.objects.create_user(f'user{i}'),
+                score=0, total_questions=1)
+        self.assertEqual(self._changelist_queries(self.attempts_url), before)
+
+    def test_autocomplete_filter(self):
+        """Test that the quiz filter filters and labels the selected quiz."""
+        quiz = self.quizzes[1]
+        response = self.client.get(
+            self.attempts_url, {'quiz__id__exact': quiz.pk})
+        self.assertEqual(
+            list(response.context['cl'].result_list),
+            list(QuizAttempt.objects.filter(quiz=quiz)))
+        self.assertContains(
+            response, f'<option value="{quiz.pk}" selected>{quiz}</option>',
+            html=True)
+
+    def test_autocomplete_filter_choices_are_searched(self):
+        """Test that the filter box is served by the admin autocomplete."""
+        response = self.client.get(reverse('admin:autocomplete'), {
+            'term': 'Quiz 2', 'app_label': 'quizzes',
+            'model_name': 'quizattempt', 'field_name': 'quiz',
+        })
+        self.assertEqual(
+            [result['id'] for result in response.json()['results']],
+            [str(self.quizzes[2].pk)])
+
+    def test_autocomplete_filter_ignores_invalid_value(self):
+        """Test that a malformed filter value does not raise."""
+        response = self.client.get(
+            self.attempts_url, {'quiz__id__exact': 'abc'})
+        self.assertIn(response.status_code, (200, 302))
+
+    def test_feature_action_runs_in_background(self):
+        """Test that featuring is chunked and reported by notification."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('admin:quizzes_quiz_changelist'), {
+                'action': 'feature_quizzes',
+                'select_across': '1',
+                'index': '0',
+                ACTION_CHECKBOX_NAME: [self.quizzes[0].pk],
+            })
+        self.assertEqual(Quiz.objects.filter(is_featured=True).count(), 3)
+        self.assertTrue(Notification.objects.filter(
+            recipient=self.admin, message='Featured 3 quizzes.').exists())
+
+    def test_purge_action_confirms_then_deletes(self):
+        """Test that purging asks first and then deletes in the background."""
+        data = {
+            'action': 'purge',
+            'index': '0',
+            ACTION_CHECKBOX_NAME: [
+                attempt.pk for attempt in QuizAttempt.objects.all()[:2]],
+        }
+        response = self.client.post(self.attempts_url, data)
+        self.assertTemplateUsed(
+            response, 'admin/quizzes/purge_confirmation.html')
+        self.assertEqual(QuizAttempt.objects.count(), 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(self.attempts_url, {**data, 'post': 'yes'})
+        self.assertEqual(QuizAttempt.objects.count(), 1)
+
+    def test_delete_selected_disabled_for_attempts(self):
+        """Test that the loading delete_selected action is not offered."""
+        response = self.client.get(self.attempts_url)
+        self.assertNotContains(response, 'value="delete_selected"')
+
+    def test_regenerate_action_re_renders_questions(self):
+        """Test that regenerating re-renders stale question HTML."""
+        Question.objects.update(text_html='', render_version=0)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('admin:quizzes_quiz_changelist'), {
+                'action': 'regenerate',
+                'index': '0',
+                ACTION_CHECKBOX_NAME: [self.quizzes[0].pk],
+            })
+        self.assertEqual(
+            Question.objects.filter(render_version=RENDERER_VERSION).count(),
+            1)
+
+    def test_paginator_counts_small_tables_exactly(self):
+        """Test that small or filtered tables are counted exactly."""
+        paginator = EstimatedCountPaginator(
+            QuizAttempt.objects.order_by('pk'), 100)
+        self.assertEqual(paginator.count, 3)
+
+    @skipUnless(connection.vendor == 'postgresql', 'Needs PostgreSQL')
+    def test_paginator_estimates_unfiltered_tables(self):
+        """Test that an unfiltered PostgreSQL table is not COUNTed."""
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE quizzes_quizattempt')
+        paginator = EstimatedCountPaginator(
+            QuizAttempt.objects.order_by('pk'), 100)
+        with mock.patch('quizzes.admin.ESTIMATED_COUNT_THRESHOLD', 0):
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(paginator.count, 3)
+        self.assertNotIn('COUNT', queries[0]['sql'])
+
+
+@override_settings(BACKGROUND_TASKS_EAGER=True)
+class LeaderboardTest(TestCase):
+    """Test cases for the incrementally maintained leaderboards."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.users = [
+            User.objects.create_user(
+                username=f'player{i}', password='testpass123')
+            for i in range(3)
+        ]
+        self.quiz = Quiz.objects.create(title='Ranked Quiz')
+        self.other_quiz = Quiz.objects.create(title='Other Quiz')
+        self.questions = [
+            Question.objects.create(
+                quiz=self.quiz, text=f'Question {i}', option_a='Yes',
+                option_b='No', option_c='No', option_d='No',
+                correct_answer='A', order=i)
+            for i in range(3)
+        ]
+        self.now = timezone.now()
+
+    def _submit(self, user, correct):
+        """Submit the quiz as user with the given number of right answers."""
+        self.client.force_login(user)
+        answers = {
+            f'question_{question.id}': 'A' if i < correct else 'B'
+            for i, question in enumerate(self.questions)
+        }
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse('quizzes:submit', kwargs={'slug': self.quiz.slug}),
+                answers)
+
+    def test_submit_updates_every_board(self):
+        """Test that a submit creates global and quiz entries per period."""
+        self._submit(self.users[0], 2)
+        entries = LeaderboardEntry.objects.filter(user=self.users[0])
+        self.assertEqual(entries.count(), 6)
+        self.assertEqual(
+            set(entries.values_list('period', 'quiz_id')),
+            {(period, quiz_id)
+             for period in LeaderboardEntry.Period.values
+             for quiz_id in (None, self.quiz.pk)})
+        self.assertEqual(set(entries.values_list('score', flat=True)), {2})
+
+    def test_global_board_sums_best_score_per_quiz(self):
+        """Test that retakes count only when they beat the best score."""
+        self._submit(self.users[0], 3)
+        self._submit(self.users[0], 1)
+        self._submit(self.users[0], 3)
+        week = LeaderboardEntry.Period.WEEK
+        global_entry = user_rank(self.users[0].pk, week)
+        quiz_entry = user_rank(self.users[0].pk, week, self.quiz.pk)
+        self.assertEqual(global_entry.score, 3)
+        self.assertEqual(global_entry.attempts, 3)
+        self.assertEqual(quiz_entry.score, 3)
+        self.assertEqual(quiz_entry.attempts, 3)
+
+        record_attempt(self.users[0].pk, self.other_quiz.pk, 2, self.now)
+        record_attempt(self.users[0].pk, self.quiz.pk, 5, self.now)
+        self.assertEqual(user_rank(self.users[0].pk, week).score, 7)
+
+    def test_guest_attempts_are_not_ranked(self):
+        """Test that attempts without a user stay off the boards."""
+        self.client.post(
+            reverse('quizzes:submit', kwargs={'slug': self.quiz.slug}),
+            {f'question_{self.questions[0].id}': 'A'})
+        self.assertFalse(LeaderboardEntry.objects.exists())
+
+    def test_top_entries_and_ranks(self):
+        """Test that boards order by score and tied users share a rank."""
+        for user, score in zip(self.users, [5, 9, 5]):
+            record_attempt(user.pk, self.quiz.pk, score, self.now)
+        top = top_entries(LeaderboardEntry.Period.ALL_TIME)
+        self.assertEqual(
+            [(entry.user_id, entry.rank) for entry in top],
+            [(self.users[1].pk, 1), (self.users[0].pk, 2),
+             (self.users[2].pk, 2)])
+        entry = user_rank(self.users[2].pk, LeaderboardEntry.Period.ALL_TIME)
+        self.assertEqual(entry.rank, 2)
+        self.assertIsNone(user_rank(
+            self.users[0].pk, LeaderboardEntry.Period.WEEK,
+            self.other_quiz.pk))
+
+    def test_periods_start_new_boards(self):
+        """Test that attempts in different weeks land on different boards."""
+        last_week = self.now - timedelta(days=7)
+        record_attempt(self.users[0].pk, self.quiz.pk, 4, last_week)
+        record_attempt(self.users[0].pk, self.quiz.pk, 1, self.now)
+        self.assertEqual(
+            user_rank(self.users[0].pk, LeaderboardEntry.Period.WEEK).score,
+            1)
+        self.assertEqual(
+            user_rank(self.users[0].pk, LeaderboardEntry.Period.ALL_TIME)
+            .score, 4)
+        start = period_start(
+            LeaderboardEntry.Period.WEEK, timezone.localdate(self.now))
+        self.assertEqual(start.weekday(), 0)
+
+    def test_rebuild_matches_incremental_updates(self):
+        """Test that rebuilding from attempts reproduces the boards."""
+        self._submit(self.users[0], 2)
+        self._submit(self.users[0], 3)
+        self._submit(self.users[1], 1)
+        record_attempt(self.users[1].pk, self.other_quiz.pk, 2, self.now)
+        QuizAttempt.objects.create(
+            quiz=self.other_quiz, user=self.users[1], score=2,
+            total_questions=3, completed_at=self.now)
+        ArchivedQuizAttempt.objects.create(
+            id=10_000, quiz=self.quiz, user=self.users[1], score=3,
+            total_questions=3, started_at=self.now - timedelta(days=400),
+            completed_at=self.now - timedelta(days=400))
+        record_attempt(
+            self.users[1].pk, self.quiz.pk, 3,
+            self.now - timedelta(days=400))
+        fields = ('period', 'period_start', 'quiz_id', 'user_id', 'score',
+                  'attempts')
+        before = set(LeaderboardEntry.objects.values_list(*fields))
+
+        out = StringIO()
+        call_command('rebuild_leaderboards', stdout=out)
+        self.assertEqual(
+            set(LeaderboardEntry.objects.values_list(*fields)), before)
+        self.assertIn(
+            f'Wrote {len(before)} leaderboard entries', out.getvalue())
+
+    def test_leaderboard_view_shows_user_rank(self):
+        """Test that the leaderboard page lists entries and the user's rank."""
+        for user, score in zip(self.users, [1, 3, 2]):
+            record_attempt(user.pk, self.quiz.pk, score, self.now)
+        self.client.force_login(self.users[0])
+        response = self.client.get(
+            reverse('quizzes:quiz_leaderboard', args=[self.quiz.slug]),
+            {'period': 'month'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['period'], 'month')
+        self.assertEqual(
+            [entry.score for entry in response.context['entries']], [3, 2, 1])
+        self.assertEqual(response.context['user_entry'].rank, 3)
+
+    def test_leaderboard_view_ignores_unknown_period(self):
+        """Test that an unknown period falls back to the weekly board."""
+        response = self.client.get(
+            reverse('quizzes:leaderboard'), {'period': 'decade'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['period'], 'week')
+        self.assertIsNone(response.context['user_entry'])
+
+
+class RelatedQuizzesTest(TestCase):
+    """Test cases for the batch-computed related quizzes."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        self.users = [
+            User.objects.create_user(username=f'learner{i}')
+            for i in range(4)
+        ]
+        self.python, self.django, self.css = [
+            Quiz.objects.create(title=title)
+            for title in ('Python', 'Django', 'CSS')
+        ]
+        Question.objects.create(
+            quiz=self.python, text='Question', option_a='Yes', option_b='No',
+            option_c='No', option_d='No', correct_answer='A')
+        # Three users took Python and Django, one took Python and CSS
+        for user in self.users[:3]:
+            QuizAttempt.objects.create(quiz=self.python, user=user)
+            QuizAttempt.objects.create(quiz=self.django, user=user)
+        QuizAttempt.objects.create(quiz=self.python, user=self.users[3])
+        QuizAttempt.objects.create(quiz=self.css, user=self.users[3])
+
+    def test_similarity_is_cosine_of_co_attempts(self):
+        """Test that similarity is co-attempts over both quizzes' sizes."""
+        quiz_ids, related_ids, ranks, scores = related_quizzes(
+            [1, 1, 1, 2, 2, 3], [10, 20, 20, 10, 20, 30], min_co_attempts=1)
+        self.assertEqual(quiz_ids.tolist(), [10, 20])
+        self.assertEqual(related_ids.tolist(), [20, 10])
+        self.assertEqual(ranks.tolist(), [1, 1])
+        # Repeated attempts count once: 2 shared users of 2 each
+        self.assertAlmostEqual(scores[0], 1.0, places=5)
+
+    def test_rare_pairs_and_single_quizzes_are_skipped(self):
+        """Test that pairs below min_co_attempts are not related."""
+        quiz_ids, _, _, _ = related_quizzes([1, 1], [10, 20])
+        self.assertEqual(len(quiz_ids), 0)
+        quiz_ids, _, _, _ = related_quizzes([1], [10])
+        self.assertEqual(len(quiz_ids), 0)
+
+    def test_command_stores_ranked_links(self):
+        """Test that the command stores the top related quizzes per quiz."""
+        out = StringIO()
+        call_command(
+            'compute_related_quizzes', '--min-co-attempts=1', stdout=out)
+        links = RelatedQuiz.objects.filter(quiz=self.python)
+        self.assertEqual(
+            list(links.values_list('related_id', 'rank')),
+            [(self.django.pk, 1), (self.css.pk, 2)])
+        self.assertIn('Stored 4 related quiz links', out.getvalue())
+
+    def test_quiz_pages_show_related_quizzes(self):
+        """Test that quiz and results pages list the stored links."""
+        call_command('compute_related_quizzes', stdout=StringIO())
+        response = self.client.get(
+            reverse('quizzes:detail', args=[self.python.slug]))
+        self.assertEqual(response.context['related_quizzes'], [self.django])
+        self.assertContains(response, 'Related Quizzes')
+        response = self.client.post(
+            reverse('quizzes:submit', args=[self.python.slug]))
+        self.assertEqual(response.context['related_quizzes'], [self.django])
+
+    def test_recompute_changes_quiz_page_etag(self):
+        """Test that cached quiz pages revalidate after a recompute."""
+        url = reverse('quizzes:detail', args=[self.python.slug])
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        # The job runs in another process, which shares no cache with this one
+        with override_settings(CACHES={'default': {
+                'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}):
+            call_command('compute_related_quizzes', stdout=StringIO())
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+    def test_deleting_related_quiz_changes_quiz_page_etag(self):
+        """Test that cached quiz pages drop links to a deleted quiz."""
+        call_command(
+            'compute_related_quizzes', '--min-co-attempts=1',
+            stdout=StringIO())
+        url = reverse('quizzes:detail', args=[self.python.slug])
+        etag = self.client.get(url)['ETag']
+        self.css.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['related_quizzes'], [self.django])
+
+@override_settings(BACKGROUND_TASKS_EAGER=True)
+class QuestionMasteryTest(TestCase):
+    """Test cases for question mastery and review sessions."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(
+            username='reviewer', password='testpass123')
+        self.client.force_login(self.user)
+        self.quiz = Quiz.objects.create(title='Review Quiz')
+        self.questions = [
+            Question.objects.create(
+                quiz=self.quiz, text=f'Question {i}', option_a='Yes',
+                option_b='No', option_c='No', option_d='No',
+                correct_answer='A', order=i)
+            for i in range(3)
+        ]
+        self.now = timezone.now()
+
+    def test_submit_schedules_answered_questions(self):
+        """Test that a submit creates mastery rows with due dates."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse('quizzes:submit', kwargs={'slug': self.quiz.slug}),
+                {f'question_{self.questions[0].id}': 'A',
+                 f'question_{self.questions[1].id}': 'B'})
+        mastery = {
+            row.question_id: row
+            for row in QuestionMastery.objects.filter(user=self.user)
+        }
+        self.assertEqual(len(mastery), 3)
+        right = mastery[self.questions[0].id]
+        self.assertEqual((right.box, right.streak, right.times_correct),
+                         (1, 1, 1))
+        self.assertGreater(right.due_at, right.last_seen)
+        for question in self.questions[1:]:
+            wrong = mastery[question.id]
+            self.assertEqual((wrong.box, wrong.streak), (1, 0))
+            self.assertEqual(wrong.due_at, wrong.last_seen)
+
+    def test_schedule_moves_through_boxes(self):
+        """Test that correct answers climb boxes and a miss resets them."""
+        mastery = QuestionMastery()
+        for _ in range(MAX_BOX + 2):
+            schedule(mastery, True, self.now)
+        self.assertEqual(mastery.box, MAX_BOX)
+        self.assertEqual(mastery.due_at, self.now + timedelta(days=30))
+        schedule(mastery, False, self.now)
+        self.assertEqual((mastery.box, mastery.streak), (1, 0))
+        self.assertEqual(mastery.times_seen, MAX_BOX + 3)
+
+    def test_record_answers_updates_existing_rows(self):
+        """Test that answering again updates rather than duplicates rows."""
+        question_id = self.questions[0].id
+        record_answers(self.user.pk, {question_id: True}, self.now)
+        record_answers(self.user.pk, {question_id: True}, self.now)
+        mastery = QuestionMastery.objects.get(
+            user=self.user, question_id=question_id)
+        self.assertEqual((mastery.box, mastery.times_seen), (2, 2))
+
+    def test_review_shows_due_questions_most_overdue_first(self):
+        """Test that the review session lists only due questions."""
+        record_answers(self.user.pk, {
+            self.questions[0].id: False, self.questions[1].id: True,
+        }, self.now)
+        record_answers(self.user.pk, {
+            self.questions[2].id: False}, self.now - timedelta(days=2))
+        response = self.client.get(reverse('quizzes:review'))
+        self.assertEqual(
+            response.context['questions'],
+            [self.questions[2], self.questions[0]])
+        self.assertEqual(response.context['due_count'], 2)
+
+    def test_review_answers_reschedule_questions(self):
+        """Test that review answers are graded and rescheduled."""
+        other = Question.objects.create(
+            quiz=self.quiz, text='Never seen', option_a='Yes',
+            option_b='No', option_c='No', option_d='No', correct_answer='A')
+        record_answers(self.user.pk, {self.questions[0].id: False}, self.now)
+        response = self.client.post(reverse('quizzes:review'), {
+            'question_ids': [self.questions[0].id, other.id],
+            f'question_{self.questions[0].id}': 'A',
+            f'question_{other.id}': 'A',
+        })
+        self.assertEqual(response.context['correct_count'], 1)
+        self.assertEqual(len(response.context['results']), 1)
+        self.assertEqual(response.context['due_count'], 0)
+        self.assertFalse(
+            QuestionMastery.objects.filter(question=other).exists())
+
+    def test_review_without_due_questions_shows_next_due(self):
+        """Test that an empty session says when the next review is due."""
+        record_answers(self.user.pk, {self.questions[0].id: True}, self.now)
+        response = self.client.get(reverse('quizzes:review'))
+        self.assertEqual(response.context['questions'], [])
+        self.assertEqual(
+            response.context['next_due'], self.now + timedelta(days=1))
+        self.assertContains(response, 'Nothing to review right now')
+
+    def test_review_requires_login(self):
+        """Test that anonymous users are sent to log in."""
+        self.client.logout()
+        response = self.client.get(reverse('quizzes:review'))
+        self.assertEqual(response.status_code, 302)
+
+
+class ItemStatisticsTest(TestCase):
+    """Test cases for psychometric item statistics."""
+
+    # Answers of five attempts at questions 1-3 (correct: A, B, C)
+    ANSWERS = ['ABC', 'ABD', 'ACC', 'DB-', 'CDA']
+
+    def setUp(self):
+        """Set up test data."""
+        self.creator = User.objects.create_user(
+            username='author', password='testpass123')
+        self.quiz = Quiz.objects.create(
+            title='Statistics Quiz', creator=self.creator)
+        self.questions = [
+            Question.objects.create(
+                quiz=self.quiz, text=f'Question {i}', option_a='A',
+                option_b='B', option_c='C', option_d='D',
+                correct_answer='ABC'[i], order=i)
+            for i in range(3)
+        ]
+        self.version = QuizVersion.objects.for_questions(
+            self.quiz, [question.id for question in self.questions])
+        for answer_string in self.ANSWERS:
+            QuizAttempt.objects.create(
+                quiz=self.quiz, version=self.version,
+                answer_string=answer_string, total_questions=3)
+
+    def test_item_and_quiz_statistics(self):
+        """Test difficulty, distractor shares and KR-20 on known answers."""
+        self.assertEqual(compute_item_statistics(), (1, 5))
+        first, second, third = (
+            QuestionStatistics.objects.get(question=question)
+            for question in self.questions)
+
+        self.assertEqual(
+            [first.difficulty, second.difficulty, third.difficulty],
+            [0.6, 0.6, 0.4])
+        self.assertEqual(third.choice_rates,
+                         {'A': 0.2, 'B': 0, 'C': 0.4, 'D': 0.2, '-': 0.2})
+        self.assertGreater(first.discrimination, 0)
+        self.assertLess(first.choice_discrimination['C'], 0)
+        self.assertIsNone(first.choice_discrimination['B'])
+
+        # Scores 3, 2, 2, 1, 0: KR-20 = 3/2 * (1 - 0.72 / 1.3)
+        statistics = QuizStatistics.objects.get(quiz=self.quiz)
+        self.assertEqual(statistics.attempts, 5)
+        self.assertAlmostEqual(statistics.kr20, 1.5 * (1 - 0.72 / 1.3))
+        self.assertAlmostEqual(statistics.mean_score, 8 / 15)
+
+    def test_questions_added_later_count_as_not_presented(self):
+        """Test that attempts are mapped onto questions via their version."""
+        added = Question.objects.create(
+            quiz=self.quiz, text='New', option_a='A', option_b='B',
+            option_c='C', option_d='D', correct_answer='D', order=3)
+        newer = QuizVersion.objects.for_questions(
+            self.quiz, [added.id] + [q.id for q in self.questions])
+        QuizAttempt.objects.create(
+            quiz=self.quiz, version=newer, answer_string='DABC',
+            total_questions=4)
+        compute_item_statistics()
+
+        new_stats = QuestionStatistics.objects.get(question=added)
+        self.assertEqual((new_stats.responses, new_stats.difficulty),
+                         (1, 1.0))
+        first = QuestionStatistics.objects.get(question=self.questions[0])
+        self.assertEqual(first.responses, 6)
+        # No attempt was shown all four questions but the last
+        self.assertIsNone(QuizStatistics.objects.get(quiz=self.quiz).kr20)
+
+    def test_only_creator_sees_statistics(self):
+        """Test that the statistics panel is shown to the creator alone."""
+        compute_item_statistics()
+        url = reverse('quizzes:detail', kwargs={'slug': self.quiz.slug})
+
+        self.client.force_login(self.creator)
+        response = self.client.get(url)
+        self.assertContains(response, 'Question Statistics')
+        self.assertEqual(len(response.context['question_statistics']), 3)
+
+        other = User.objects.create_user(
+            username='visitor', password='testpass123')
+        self.client.force_login(other)
+        self.assertNotContains(self.client.get(url), 'Question Statistics')
+
+
+class AdaptiveQuizTest(TestCase):
+    """Test cases for adaptive quiz sessions."""
+
+    def setUp(self):
+        """Set up test data."""
+        _load_item_bank.cache_clear()
+        self.quiz = Quiz.objects.create(title='Adaptive Quiz')
+        for order in range(30):
+            Question.objects.create(
+                quiz=self.quiz, text=f'Question {order}', option_a='A',
+                option_b='B', option_c='C', option_d='D',
+                correct_answer='ABCD'[order % 4], order=order)
+        self.quiz.refresh_from_db()
+        self.url = reverse(
+            'quizzes:adaptive_next', kwargs={'slug': self.quiz.slug})
+        self.letters = dict(
+            self.quiz.questions.values_list('id', 'correct_answer'))
+
+    def _answer(self, question_id, answer):
+        return self.client.post(
+            self.url,
+            json.dumps({'question': question_id, 'answer': answer}),
+            content_type='application/json',
+        )
+
+    def test_item_parameters_follow_statistics(self):
+        """Test that harder and sharper questions get higher b and a."""
+        a, b = item_parameters(
+            np.array([0.8, 0.3, np.nan]), np.array([0.2, 0.6, 0.4]))
+        self.assertLess(b[0], 0)
+        self.assertGreater(b[1], 0)
+        self.assertGreater(a[1], a[0])
+        self.assertEqual((a[2], b[2]), (1.0, 0.0))
+
+    def test_estimate_moves_with_answers_and_selection_follows(self):
+        """Test that the estimate rises on right answers and picks harder."""
+        bank = ItemBank(
+            question_ids=np.arange(1, 8), letters=['A'] * 7,
+            a=np.ones(7), b=np.linspace(-3, 3, 7))
+        posterior = LOG_PRIOR
+        for _ in range(3):
+            posterior = update(posterior, 1.0, 0.0, True)
+        theta, se = estimate(posterior)
+        self.assertGreater(theta, 0.5)
+        self.assertLess(se, estimate(LOG_PRIOR)[1])
+        self.assertEqual(len(posterior), len(GRID))
+
+        with mock.patch('quizzes.adaptive.SELECTION_POOL', 1):
+            index = select_next(bank, theta, [])
+            self.assertEqual(bank.b[index], 1.0)
+            # Already asked questions are skipped
+            index = select_next(bank, theta, [5])
+            self.assertNotEqual(bank.question_ids[index], 5)
+        self.assertIsNone(select_next(bank, 0.0, list(range(1, 8))))
+
+    def test_session_serves_grades_and_finishes(self):
+        """Test a full adaptive session over the JSON endpoint."""
+        data = self.client.get(self.url).json()
+        self.assertEqual(data['answered'], 0)
+        self.assertEqual(self.client.get(self.url).json()['question']['id'],
+                         data['question']['id'])
+
+        asked = []
+        while data['question']:
+            question_id = data['question']['id']
+            asked.append(question_id)
+            data = self._answer(question_id, self.letters[question_id]).json()
+            self.assertTrue(data['result']['correct'])
+
+        self.assertTrue(data['done'])
+        self.assertEqual(len(asked), len(set(asked)))
+        self.assertLessEqual(data['answered'], MAX_QUESTIONS)
+        self.assertEqual(data['correct'], data['answered'])
+        self.assertGreater(data['ability'], 1)
+
+    def test_only_the_pending_question_is_graded(self):
+        """Test that answers to other questions are refused."""
+        pending = self.client.get(self.url).json()['question']['id']
+        other = next(pk for pk in self.letters if pk != pending)
+        self.assertEqual(self._answer(other, 'A').status_code, 409)
+        self.assertEqual(self._answer(pending, 'Z').status_code, 409)
+
+        wrong = 'B' if self.letters[pending] == 'A' else 'A'
+        result = self._answer(pending, wrong).json()['result']
+        self.assertEqual(
+            (result['correct'], result['correct_answer']),
+            (False, self.letters[pending]))
+        self.assertEqual(self._answer(pending, wrong).status_code, 409)
+
+    def test_malformed_answers_are_rejected(self):
+        """Test that non-string answers get a 400 rather than an error."""
+        pending = self.client.get(self.url).json()['question']['id']
+        for answer in ([], {}, None, 1):
+            self.assertEqual(self._answer(pending, answer).status_code, 400)
+        self.assertEqual(
+            self.client.get(self.url).json()['question']['id'], pending)
+
+    @override_settings(BACKGROUND_TASKS_EAGER=True)
+    def test_answers_update_mastery_for_logged_in_users(self):
+        """Test that adaptive answers feed the review schedule."""
+        user = User.objects.create_user(
+            username='adaptive', password='testpass123')
+        self.client.force_login(user)
+        pending = self.client.get(self.url).json()['question']['id']
+        with self.captureOnCommitCallbacks(execute=True):
+            self._answer(pending, self.letters[pending])
+        self.assertTrue(QuestionMastery.objects.filter(
+            user=user, question_id=pending, times_correct=1).exists())
+
+
+class QuizExportTest(TestCase):
+    """Test cases for the streaming attempt export."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.creator = User.objects.create_user(
+            username='creator', password='testpass123')
+        self.taker = User.objects.create_user(
+            username='taker', password='testpass123')
+        self.quiz = Quiz.objects.create(
+            title='Export Quiz', creator=self.creator)
+        self.questions = [
+            Question.objects.create(
+                quiz=self.quiz, text=f'Question {i}', option_a='Yes',
+                option_b='No', option_c='No', option_d='No',
+                correct_answer='A', order=i)
+            for i in range(2)
+        ]
+        self.version = QuizVersion.objects.for_questions(
+            self.quiz, [question.id for question in self.questions])
+        self.url = reverse('quizzes:export', args=[self.quiz.slug])
+        self.client.force_login(self.creator)
+
+    def _seed(self, count):
+        """Create count attempts on the current quiz version."""
+        QuizAttempt.objects.bulk_create(
+            QuizAttempt(
+                quiz=self.quiz, user=self.taker, score=1, total_questions=2,
+                version=self.version, answer_string='AB',
+                completed_at=timezone.now())
+            for _ in range(count)
+        )
+
+    def _peak_memory(self, count):
+        """Return the peak memory traced while streaming count attempts."""
+        QuizAttempt.objects.filter(quiz=self.quiz).delete()
+        self._seed(count)
+        response = self.client.get(self.url)
+        tracemalloc.start()
+        try:
+            lines = sum(1 for _ in response.streaming_content)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(lines, count + 1)
+        return peak
+
+    def test_csv_has_one_column_per_question(self):
+        """Test that CSV rows hold the user, score and each answer."""
+        self._seed(1)
+        ArchivedQuizAttempt.objects.create(
+            id=10_000, quiz=self.quiz, user=self.taker, score=0,
+            total_questions=2, answers={str(self.questions[1].id): 'C'},
+            started_at=timezone.now() - timedelta(days=400))
+        response = self.client.get(self.url)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('export-quiz-attempts.csv',
+                      response['Content-Disposition'])
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], (
+            'attempt_id,user,score,total_questions,started_at,completed_at,'
+            f'question_{self.questions[0].id},'
+            f'question_{self.questions[1].id}'))
+        self.assertTrue(lines[1].startswith('10000,taker,0,2,'))
+        self.assertTrue(lines[1].endswith(',,C'))
+        self.assertTrue(lines[2].endswith(',A,B'))
+
+    def test_ndjson_streams_one_object_per_attempt(self):
+        """Test that NDJSON lines carry the answers by question id."""
+        self._seed(2)
+        response = self.client.get(self.url, {'format': 'ndjson'})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [
+            json.loads(line)
+            for line in b''.join(response.streaming_content).splitlines()
+        ]
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]['user'], 'taker')
+        self.assertEqual(rows[0]['answers'], {
+            str(self.questions[0].id): 'A', str(self.questions[1].id): 'B'})
+
+    def test_only_the_creator_can_export(self):
+        """Test that other users are turned away."""
+        self.client.force_login(self.taker)
+        response = self.client.get(self.url)
+        self.assertRedirects(
+            response, reverse('quizzes:detail', args=[self.quiz.slug]))
+        self.client.logout()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 302)
+        self.assertIn('login', response.url)
+
+    def test_memory_stays_flat_with_many_attempts(self):
+        """Test that streaming 20,000 attempts peaks no higher than 4,000."""
+        small = self._peak_memory(4_000)
+        large = self._peak_memory(20_000)
+        self.assertLess(large, small * 1.5 + 64 * 1024)
+
+
+class QuizBankTest(TestCase):
+    """Test cases for bulk quiz import and export."""
+
+    NDJSON = '\n'.join([
+        json.dumps({'quiz': 'Python Basics', 'description': 'Warm-up'}),
+        json.dumps({'text': 'What is len([1, 2])?',
+                    'options': ['2', '1', '3', '0'], 'answer': 'A',
+                    'explanation': 'Two items.'}),
+        '{not json',
+        json.dumps({'text': 'Too few', 'options': ['1', '2'],
+                    'answer': 'A'}),
+        json.dumps({'text': 'Which keyword defines a function?',
+                    'options': ['func', 'def', 'fn', 'lambda'],
+                    'answer': 'B'}),
+        json.dumps({'quiz': 'Empty Quiz'}),
+    ])
+
+    GIFT = """// Exported from Moodle
+$CATEGORY: $course$/Programming/CSS Selectors
+
+::Q1:: Which selector matches ids? {
+~.name
+=\\#name
+~*name
+~name
+####Ids use \\#, classes use a dot.
+}
+
+::Q2:: Pick one {=a ~b}
+
+[markdown]What does \\{\\} mean in Python? {
+~A set
+=An empty dict #Right!
+~A tuple
+~A list
+}
+"""
+
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(
+            username='importer', password='testpass123')
+
+    def test_ndjson_import_skips_invalid_records(self):
+        """Test that valid questions are stored and bad lines reported."""
+        result = import_quizzes(
+            self.NDJSON.splitlines(), 'ndjson', creator=self.user)
+        self.assertEqual((result.quizzes, result.questions), (1, 2))
+        self.assertEqual(result.error_count, 2)
+        self.assertEqual(result.errors[0], 'line 3: invalid JSON')
+        self.assertIn(
+            'line 4: a question needs exactly four', result.errors[1])
+        quiz = Quiz.objects.get(title='Python Basics')
+        self.assertEqual(quiz.creator, self.user)
+        self.assertEqual(
+            list(quiz.questions.values_list('correct_answer', 'order')),
+            [('A', 1), ('B', 2)])
+        self.assertFalse(Quiz.objects.filter(title='Empty Quiz').exists())
+        self.assertIn('keyword', QuizSearchDocument.objects.get(
+            quiz=quiz).body)
+
+    def test_gift_parser_reads_multiple_choice_questions(self):
+        """Test that GIFT escapes, categories and feedback are parsed."""
+        records = list(parse_gift(self.GIFT.splitlines(keepends=True)))
+        kinds = [kind for _, kind, _ in records]
+        self.assertEqual(kinds, ['quiz', 'question', 'error', 'question'])
+        self.assertEqual(records[0][2]['title'], 'CSS Selectors')
+        first = records[1][2]
+        self.assertEqual(first['text'], 'Which selector matches ids?')
+        self.assertEqual(first['option_b'], '#name')
+        self.assertEqual(first['correct_answer'], 'B')
+        self.assertEqual(first['explanation'], 'Ids use #, classes use a dot.')
+        self.assertEqual(records[2][0], 12)
+        last = records[3][2]
+        self.assertEqual(last['text'], 'What does {} mean in Python?')
+        self.assertEqual(last['option_b'], 'An empty dict')
+
+    def test_export_round_trips_through_gift(self):
+        """Test that exported GIFT imports back to the same questions."""
+        quiz = Quiz.objects.create(title='Tricky: {Braces}')
+        Question.objects.create(
+            quiz=quiz, text='Line one\nuses ~, = and #', option_a='a=b',
+            option_b='{x}', option_c='c:d', option_d='back\\slash',
+            correct_answer='C', explanation='See ~docs~')
+        exported = ''.join(export_gift(Quiz.objects.filter(pk=quiz.pk)))
+        result = import_quizzes(exported.splitlines(), 'gift')
+        self.assertEqual(result.error_count, 0)
+        fields = ('text', 'option_a', 'option_b', 'option_c', 'option_d',
+                  'correct_answer', 'explanation')
+        imported = Quiz.objects.exclude(pk=quiz.pk).get()
+        self.assertEqual(imported.title, 'Tricky: {Braces}')
+        self.assertEqual(
+            list(imported.questions.values_list(*fields)),
+            list(quiz.questions.values_list(*fields)))
+
+    def test_import_writes_in_batches_with_progress(self):
+        """Test that questions are written batch_size at a time."""
+        lines = [json.dumps({'quiz': 'Batched'})] + [
+            json.dumps({'text': f'Question {i}',
+                        'options': ['a', 'b', 'c', 'd'], 'answer': 'A'})
+            for i in range(5)
+        ]
+        totals = []
+        result = import_quizzes(
+            lines, 'ndjson', batch_size=2, progress=totals.append)
+        self.assertEqual(totals, [2, 4, 5])
+        self.assertEqual(result.questions, 5)
+
+    def test_quiz_split_across_batches_is_indexed_once(self):
+        """Test that a quiz's search document is built after its last batch."""
+        lines = [json.dumps({'quiz': 'Split'})] + [
+            json.dumps({'text': f'Question {i}',
+                        'options': ['a', 'b', 'c', 'd'], 'answer': 'A'})
+            for i in range(5)
+        ] + [json.dumps({'quiz': 'Next'}), json.dumps(
+            {'text': 'Last', 'options': ['a', 'b', 'c', 'd'],
+             'answer': 'A'})]
+        with mock.patch('quizzes.quiz_bank.rebuild_index',
+                        wraps=rebuild_index) as rebuild:
+            import_quizzes(lines, 'ndjson', batch_size=2)
+        self.assertEqual(
+            [sorted(call.args[0].values_list('title', flat=True))
+             for call in rebuild.call_args_list],
+            [['Split'], ['Next']])
+        self.assertIn('Question 4', QuizSearchDocument.objects.get(
+            quiz__title='Split').body)
+
+    def _import_peak_memory(self, count):
+        """Return the peak memory traced while importing count questions."""
+        def lines():
+            for i in range(count):
+                if i % 100 == 0:
+                    yield json.dumps({'quiz': f'Quiz {i}'})
+                yield json.dumps({'text': f'Question {i}',
+                                  'options': ['a', 'b', 'c', 'd'],
+                                  'answer': 'A'})
+
+        tracemalloc.start()
+        try:
+            result = import_quizzes(lines(), 'ndjson', batch_size=500)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(result.questions, count)
+        return peak
+
+    def test_import_memory_stays_flat_with_file_size(self):
+        """Test that importing 10,000 questions peaks no higher than 2,000."""
+        small = self._import_peak_memory(2_000)
+        large = self._import_peak_memory(10_000)
+        self.assertLess(large, small * 1.5 + 64 * 1024)
+
+    def test_quiz_split_across_batches_grades_all_questions(self):
+        """Test that caches read between batches do not go stale."""
+        cache.clear()
+        lines = [json.dumps({'quiz': 'Split'})] + [
+            json.dumps({'text': f'Question {i}',
+                        'options': ['a', 'b', 'c', 'd'], 'answer': 'B'})
+            for i in range(5)
+        ]
+
+        def read_caches(total):
+            # A visitor loading the quiz while the import is running
+            quiz = Quiz.objects.get(title='Split')
+            get_answer_key(quiz)
+            get_homepage_quizzes()
+
+        import_quizzes(lines, 'ndjson', batch_size=2, progress=read_caches)
+        quiz = Quiz.objects.get(title='Split')
+        self.assertEqual(len(get_answer_key(quiz).question_ids), 5)
+        quizzes, _ = get_homepage_quizzes()
+        self.assertEqual(quizzes[0].num_questions, 5)
+        response = self.client.post(
+            reverse('quizzes:grade', kwargs={'slug': quiz.slug}),
+            json.dumps({'revision': quiz.revision, 'answers': 'BBBBB'}),
+            content_type='application/json')
+        self.assertEqual(
+            (response.json()['score'], response.json()['total']), (5, 5))
+
+    def test_commands_export_and_import_files(self):
+        """Test that the commands move a bank through a file."""
+        import_quizzes(self.NDJSON.splitlines(), 'ndjson', creator=self.user)
+        path = Path(self.enterContext(TemporaryDirectory())) / 'bank.gift'
+        out = StringIO()
+        call_command(
+            'export_quizzes', str(path), '--creator=importer', stdout=out)
+        self.assertIn('Exported 2 questions', out.getvalue())
+        call_command('import_quizzes', str(path), stdout=out)
+        self.assertIn('Imported 2 questions in 1 quizzes', out.getvalue())
+        self.assertEqual(
+            Question.objects.filter(quiz__title='Python Basics').count(), 4)
+
+    def test_upload_imports_for_the_user(self):
+        """Test that an uploaded bank becomes the user's quizzes."""
+        self.client.force_login(self.user)
+        upload = SimpleUploadedFile(
+            'bank.ndjson', self.NDJSON.encode(), 'application/x-ndjson')
+        response = self.client.post(
+            reverse('quizzes:import'), {'file': upload})
+        self.assertRedirects(response, reverse('accounts:my_quizzes'))
+        self.assertEqual(
+            Quiz.objects.get(title='Python Basics').creator, self.user)
+
+    @override_settings(QUIZ_IMPORT_MAX_UPLOAD_SIZE=10)
+    def test_upload_rejects_large_or_unknown_files(self):
+        """Test that oversized or unrecognised uploads are refused."""
+        self.client.force_login(self.user)
+        response = self.client.post(reverse('quizzes:import'), {
+            'file': SimpleUploadedFile('bank.ndjson', self.NDJSON.encode())})
+        self.assertContains(response, 'must be imported by an administrator')
+        response = self.client.post(reverse('quizzes:import'), {
+            'file': SimpleUploadedFile('bank.csv', b'x')})
+        self.assertContains(response, 'Cannot tell the file format')
+        self.assertFalse(Quiz.objects.exists())
+
+
+class ServerTimingTest(TestCase):
+    """Test cases for the Server-Timing header."""
+
+    def test_header_is_off_by_default(self):
+        """Test that responses carry no Server-Timing header by default."""
+        response = self.client.get(reverse('csrf'))
+        self.assertNotIn('Server-Timing', response.headers)
+
+    @override_settings(SERVER_TIMING=True)
+    def test_header_reports_app_and_db_time(self):
+        """Test that app and database durations are reported when enabled."""
+        Quiz.objects.create(title='Timed Quiz')
+        response = Client().get(reverse('home'))
+
+        self.assertRegex(
+            response.headers['Server-Timing'],
+            r'^app;dur=\d+\.\d, db;dur=\d+\.\d$')
+
+
+class SeedDataTest(TestCase):
+    """Test cases for the synthetic benchmark dataset."""
+
+    COUNTS = {
+        'users': 20, 'quizzes': 5, 'attempts': 300, 'notifications': 40}
+
+    def test_seed_creates_consistent_rows(self):
+        """Test that seeded attempts are scored against the answer key."""
+        created = seed_dataset(
+            self.COUNTS, questions_per_quiz=4, batch_size=128)
+
+        self.assertEqual(created['questions'], 20)
+        self.assertEqual(User.objects.filter(profile__isnull=False).count(),
+                         20)
+        self.assertEqual(QuizAttempt.objects.count(), 300)
+        self.assertEqual(Notification.objects.count(), 40)
+        self.assertEqual(
+            Profile.saved_quizzes.through.objects.count(),
+            created['saved quizzes'])
+        for attempt in QuizAttempt.objects.select_related('version')[:50]:
+            key = dict(Question.objects.filter(
+                quiz_id=attempt.quiz_id).values_list('id', 'correct_answer'))
+            answers = attempt.get_answers()
+            self.assertEqual(len(answers), 4)
+            self.assertEqual(attempt.score, sum(
+                answers.get(question_id) == key[question_id]
+                for question_id in key))
+            self.assertLess(attempt.started_at, attempt.completed_at)
+
+    def test_seed_is_reproducible(self):
+        """Test that the same seed builds the same attempts."""
+        def snapshot():
+            return list(QuizAttempt.objects.order_by('id').values_list(
+                'user__username', 'quiz__slug', 'answer_string', 'score'))
+
+        seed_dataset(self.COUNTS, questions_per_quiz=4, seed=7)
+        first = snapshot()
+        User.objects.all().delete()
+        Quiz.objects.all().delete()
+        seed_dataset(self.COUNTS, questions_per_quiz=4, seed=7)
+
+        self.assertEqual(snapshot(), first)
+
+    def test_seed_refuses_existing_prefix(self):
+        """Test that seeding twice with one prefix is rejected."""
+        seed_dataset(self.COUNTS, questions_per_quiz=4)
+        with self.assertRaises(ValueError):
+            seed_dataset(self.COUNTS, questions_per_quiz=4)
+
 
 class QuizCreateViewTest(TestCase):
     """Test cases for the quiz create view."""
@@ -396,6 +2228,10 @@ class QuizCreateViewTest(TestCase):
 class TemplateTagsTest(TestCase):
     """Test cases for custom template tags and filters."""
 
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+
     def test_quiz_card_displays_correctly(self):
         """Test that quiz cards display correctly on home page."""
         Quiz.objects.create(
@@ -415,3 +2251,34 @@ class TemplateTagsTest(TestCase):
         )
         response = self.client.get(reverse('home'))
         self.assertContains(response, '1')
+
+
+class RenderCodeFilterTest(TestCase):
+    """Test cases for the render_code filter."""
+
+    def test_matches_golden_outputs(self):
+        """Test that output matches the recorded original implementation."""
+        golden = Path(__file__).parent / 'testdata'
+        cases = json.loads(
+            (golden / 'render_code_golden.json').read_text(encoding='utf-8'))
+        for case in cases:
+            with self.subTest(text=case['input']):
+                self.assertEqual(render_code(case['input']), case['output'])
+
+    def test_output_is_escaped(self):
+        """Test that HTML in the input is escaped, including in code."""
+        self.assertEqual(
+            render_code('<b>[code]<i>[/code]'),
+            '&lt;b&gt;<code class="code-inline">&lt;i&gt;</code>')
+
+    def test_empty_input_returned_unchanged(self):
+        """Test that empty values are passed through."""
+        self.assertEqual(render_code(''), '')
+        self.assertIsNone(render_code(None))
+
+    def test_repeated_input_is_memoized(self):
+        """Test that rendering the same text twice hits the memo."""
+        _render.cache_clear()
+        render_code('[code]x[/code]')
+        render_code('[code]x[/code]')
+        self.assertEqual(_render.cache_info().hits, 1)
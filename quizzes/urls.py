@@ -6,8 +6,20 @@ app_name = 'quizzes'
 urlpatterns = [
     path('generate/', views.quiz_generate, name='generate'),
     path('create/', views.quiz_create, name='create'),
+    path('import/', views.quiz_import, name='import'),
+    path('search/', views.quiz_search, name='search'),
+    path('leaderboard/', views.leaderboard, name='leaderboard'),
+    path('review/', views.review, name='review'),
     path('<slug:slug>/', views.quiz_detail, name='detail'),
+    path('<slug:slug>/data/', views.quiz_data, name='data'),
+    path('<slug:slug>/grade/', views.quiz_grade, name='grade'),
+    path('<slug:slug>/leaderboard/', views.leaderboard,
+         name='quiz_leaderboard'),
     path('<slug:slug>/submit/', views.quiz_submit, name='submit'),
+    path('<slug:slug>/adaptive/', views.adaptive_quiz, name='adaptive'),
+    path('<slug:slug>/adaptive/next/', views.adaptive_next,
+         name='adaptive_next'),
+    path('<slug:slug>/export/', views.quiz_export, name='export'),
     path('<slug:slug>/edit/', views.quiz_edit, name='edit'),
     path('<slug:slug>/delete/', views.quiz_delete, name='delete'),
 ]
@@ -1,32 +1,65 @@
+import io
+import json
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.db import transaction
+from django.db.models import Count, Max
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
 from django.utils import timezone
-from .models import Quiz, Question, QuizAttempt, Notification
+from django.middleware.csrf import get_token
+from django.utils.cache import patch_cache_control
+from django.views.decorators.cache import never_cache
+from accounts.context_processors import get_saved_quiz_ids
+from .models import (
+    LeaderboardEntry, Notification, Question, QuestionStatistics, Quiz,
+    QuizAttempt, QuizStatistics, RelatedQuiz)
+from .answers import (
+    UNANSWERED, VALID_ANSWERS, decode_answers, encode_answers, grade_answers)
+from .adaptive import MAX_QUESTIONS as ADAPTIVE_MAX_QUESTIONS, AdaptiveSession
+from .cache import (
+    get_answer_key, get_homepage_quizzes, get_homepage_version,
+    get_quiz_document)
+from .decorators import public_page
+from .export import EXPORT_FORMATS, EXPORT_WRITERS
+from .quiz_bank import import_quizzes
+from .leaderboards import record_attempt, top_entries, user_rank
+from .mastery import (
+    REVIEW_SESSION_SIZE, due_mastery, due_questions, next_due,
+    record_answers)
+from .search import index_quiz, search_quizzes
 from .services import QuizGeneratorService
-from .forms import QuizForm, QuestionFormSet
+from .tasks import run_in_background
+from .forms import QuizForm, QuestionFormSet, QuizImportForm
+
+
+def _home_etag(request):
+    """Return the ETag of the homepage; needs no database query."""
+    version = get_homepage_version()
+    return f'home-{settings.PUBLIC_PAGE_VERSION}-{version.timestamp()}'
 
 
+def _home_last_modified(request):
+    """Return when the current homepage contents were first served."""
+    return get_homepage_version()
+
+
+@public_page(etag_func=_home_etag, last_modified_func=_home_last_modified)
 def home(request):
     """Homepage view with featured quizzes."""
-    # Get featured quizzes first, then fill with recent if needed
-    featured_quizzes = Quiz.objects.filter(
-        is_featured=True).order_by('-created_at')[:6]
-
-    # If less than 6 featured, fill with recent non-featured quizzes
-    if featured_quizzes.count() < 6:
-        featured_ids = list(featured_quizzes.values_list('id', flat=True))
-        remaining = 6 - featured_quizzes.count()
-        recent_quizzes = Quiz.objects.exclude(
-            id__in=featured_ids).order_by('-created_at')[:remaining]
-        featured_quizzes = list(featured_quizzes) + list(recent_quizzes)
+    featured_quizzes, featured_cards_html = get_homepage_quizzes()
 
     # Check if we need to show signup modal for guest limit
     show_signup_modal = request.session.pop('show_signup_modal', False)
 
     context = {
         'featured_quizzes': featured_quizzes,
+        'featured_cards_html': featured_cards_html,
+        'saved_quiz_ids_list': sorted(get_saved_quiz_ids(
+            request, [quiz.pk for quiz in featured_quizzes])),
         'show_signup_modal': show_signup_modal,
     }
     return render(request, 'index.html', context)
@@ -76,8 +109,8 @@ def quiz_generate(request):
                     is_ai_generated=True,
                 )
 
-                for i, q_data in enumerate(quiz_data['questions']):
-                    Question.objects.create(
+                Question.objects.bulk_create(
+                    Question(
                         quiz=quiz,
                         text=q_data['text'],
                         option_a=q_data['option_a'],
@@ -88,6 +121,10 @@ def quiz_generate(request):
                         explanation=q_data.get('explanation', ''),
                         order=i + 1,
                     )
+                    for i, q_data in enumerate(quiz_data['questions'])
+                )
+                # bulk_create sends no signals, so index the questions here
+                index_quiz(quiz.pk)
 
             # Increment guest quiz count after successful generation
             if not request.user.is_authenticated:
@@ -110,79 +147,419 @@ def quiz_generate(request):
     return redirect('home')
 
 
+SEARCH_PAGE_SIZE = 20
+
+
+def quiz_search(request):
+    """Search quizzes by title, description and question text."""
+    query = request.GET.get('q', '').strip()
+    try:
+        page = max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        page = 1
+
+    # One extra hit tells whether there is a next page without a COUNT
+    results = search_quizzes(
+        query, limit=SEARCH_PAGE_SIZE + 1,
+        offset=(page - 1) * SEARCH_PAGE_SIZE) if query else []
+
+    context = {
+        'query': query,
+        'results': results[:SEARCH_PAGE_SIZE],
+        'page': page,
+        'has_next': len(results) > SEARCH_PAGE_SIZE,
+    }
+    return render(request, 'quizzes/quiz_search.html', context)
+
+
+def _with_choices(questions):
+    """Attach (letter, option HTML) pairs to each question for templates."""
+    for question in questions:
+        question.choices = [
+            (letter, getattr(question, f'option_{letter.lower()}_html'))
+            for letter in 'ABCD'
+        ]
+    return questions
+
+
+@login_required
+def review(request):
+    """Show the user's due questions and grade their review answers."""
+    if request.method == 'POST':
+        question_ids = [
+            int(question_id)
+            for question_id in request.POST.getlist('question_ids')
+            if question_id.isdigit()
+        ][:REVIEW_SESSION_SIZE]
+        questions = Question.objects.filter(
+            pk__in=question_ids, mastery__user=request.user
+        ).select_related('quiz').rendered()
+        _with_choices(questions)
+        results = []
+        for question in questions:
+            user_answer = request.POST.get(f'question_{question.id}', '')
+            results.append({
+                'question': question,
+                'user_answer': user_answer,
+                'is_correct': user_answer == question.correct_answer,
+            })
+        record_answers(request.user.pk, {
+            result['question'].id: result['is_correct'] for result in results
+        }, timezone.now())
+
+        context = {
+            'results': results,
+            'correct_count': sum(result['is_correct'] for result in results),
+            'due_count': due_mastery(request.user).count(),
+        }
+        return render(request, 'quizzes/review.html', context)
+
+    questions = _with_choices(due_questions(request.user))
+    context = {
+        'questions': questions,
+        'due_count': due_mastery(request.user).count() if questions else 0,
+        'next_due': None if questions else next_due(request.user),
+    }
+    return render(request, 'quizzes/review.html', context)
+
+
+def leaderboard(request, slug=None):
+    """Show the top of the global board, or of one quiz's board."""
+    quiz = get_object_or_404(Quiz, slug=slug) if slug else None
+    quiz_id = quiz.pk if quiz else None
+    period = request.GET.get('period')
+    if period not in LeaderboardEntry.Period.values:
+        period = LeaderboardEntry.Period.WEEK
+
+    entries = top_entries(period, quiz_id)
+    user_entry = None
+    if request.user.is_authenticated:
+        user_entry = next(
+            (entry for entry in entries if entry.user_id == request.user.pk),
+            None) or user_rank(request.user.pk, period, quiz_id)
+
+    context = {
+        'quiz': quiz,
+        'period': period,
+        'periods': LeaderboardEntry.Period.choices,
+        'entries': entries,
+        'user_entry': user_entry,
+    }
+    return render(request, 'quizzes/leaderboard.html', context)
+
+
+# A document URL names its revision, so it can be cached for good
+QUIZ_DOCUMENT_MAX_AGE = 60 * 60 * 24 * 365
+
+
+def _quiz_versions(request, slug):
+    """
+    Return when the quiz and its related quizzes last changed.
+
+    Queried once per request. The related quizzes' time comes from the
+    rows themselves, so a recompute in another process is seen here, and
+    their count changes when a related quiz is deleted along with its link.
+
+    Returns:
+        (updated_at, related_at or None, related_count), or None if the
+        quiz does not exist
+    """
+    if not hasattr(request, '_quiz_versions'):
+        request._quiz_versions = Quiz.objects.filter(slug=slug).annotate(
+            related_at=Max('related_links__computed_at'),
+            related_count=Count('related_links'),
+        ).values_list('updated_at', 'related_at', 'related_count').first()
+    return request._quiz_versions
+
+
+def _quiz_last_modified(request, slug):
+    """Return when the quiz or its related quizzes last changed."""
+    versions = _quiz_versions(request, slug)
+    if versions is None:
+        return None
+    updated_at, related_at, _ = versions
+    return max(updated_at, related_at or updated_at)
+
+
+def _quiz_etag(request, slug):
+    """Return the ETag of a quiz page, or None if the quiz does not exist."""
+    versions = _quiz_versions(request, slug)
+    if versions is None:
+        return None
+    updated_at, related_at, related_count = versions
+    related = related_at.timestamp() if related_at else 0
+    return (
+        f'quiz-{slug}-{settings.PUBLIC_PAGE_VERSION}-{updated_at.timestamp()}'
+        f'-{related}-{related_count}')
+
+
+def _related_quizzes(quiz):
+    """Return the precomputed related quizzes of a quiz, best first."""
+    return [
+        link.related
+        for link in RelatedQuiz.objects.filter(quiz=quiz).select_related(
+            'related').order_by('rank')
+    ]
+
+
+def _quiz_statistics(quiz):
+    """Return a quiz's item statistics and its questions', or None."""
+    statistics = QuizStatistics.objects.filter(quiz=quiz).first()
+    if statistics is None:
+        return None
+    questions = QuestionStatistics.objects.filter(
+        question__quiz=quiz).select_related('question').order_by(
+            'question__order', 'question__id')
+    return statistics, list(questions)
+
+
+@public_page(etag_func=_quiz_etag, last_modified_func=_quiz_last_modified)
 def quiz_detail(request, slug):
-    """Display a quiz for taking."""
-    quiz = get_object_or_404(Quiz, slug=slug)
-    questions = quiz.questions.all()
+    """Display a quiz for taking; questions are loaded from quiz_data."""
+    quiz = get_object_or_404(
+        Quiz.objects.select_related('creator'), slug=slug)
 
     context = {
         'quiz': quiz,
-        'questions': questions,
+        'question_count': len(get_answer_key(quiz).question_ids),
+        'related_quizzes': _related_quizzes(quiz),
+        'adaptive_max_questions': ADAPTIVE_MAX_QUESTIONS,
     }
+    # Only the creator sees how the questions perform
+    if request.user.is_authenticated and request.user.pk == quiz.creator_id:
+        statistics = _quiz_statistics(quiz)
+        if statistics:
+            context['quiz_statistics'], context['question_statistics'] = (
+                statistics)
     return render(request, 'quizzes/quiz_detail.html', context)
 
 
-def quiz_submit(request, slug):
-    """Handle quiz submission and show results."""
+def quiz_data(request, slug):
+    """Return a quiz's questions as a compact, versioned JSON document."""
     quiz = get_object_or_404(Quiz, slug=slug)
+    response = HttpResponse(
+        get_quiz_document(quiz), content_type='application/json')
+    if request.GET.get('v') == quiz.revision:
+        patch_cache_control(
+            response, public=True, max_age=QUIZ_DOCUMENT_MAX_AGE,
+            immutable=True)
+    else:
+        patch_cache_control(response, no_cache=True)
+    return response
+
+
+@never_cache
+def csrf_token(request):
+    """
+    Return a CSRF token for pages served without one.
+
+    Cached public pages cannot carry a per-visitor token, so their forms
+    fetch one from here just before posting.
+    """
+    return JsonResponse({'token': get_token(request)})
+
+
+def _record_attempt(request, quiz, answer_key, answer_string, correct_count):
+    """Save a logged-in user's attempt and notify the quiz creator."""
+    total_questions = len(answer_key.question_ids)
+    attempt = QuizAttempt.objects.create(
+        quiz=quiz,
+        user=request.user,
+        score=correct_count,
+        total_questions=total_questions,
+        version_id=answer_key.version_id,
+        answer_string=answer_string,
+        completed_at=timezone.now(),
+    )
+    run_in_background(
+        record_attempt, request.user.pk, quiz.pk, correct_count,
+        attempt.completed_at)
+    graded = grade_answers(answer_key.letters, answer_string)
+    run_in_background(
+        record_answers, request.user.pk,
+        dict(zip(answer_key.question_ids, graded)), attempt.completed_at)
+
+    # Notify quiz creator (if not self)
+    if quiz.creator_id and quiz.creator_id != request.user.id:
+        score_percentage = (
+            correct_count / total_questions * 100) if total_questions else 0
+        Notification.objects.create(
+            recipient_id=quiz.creator_id,
+            notification_type=Notification.NotificationType.QUIZ_COMPLETED,
+            message=f'{
+                request.user.username} completed your quiz "{
+                quiz.title}" with a score of {
+                round(score_percentage)}%',
+            related_quiz=quiz,
+        )
+    return attempt
+
+
+def adaptive_quiz(request, slug):
+    """Show the adaptive mode page; questions come from adaptive_next."""
+    quiz = get_object_or_404(Quiz, slug=slug)
+    if request.GET.get('restart'):
+        AdaptiveSession(request.session, quiz).restart()
+    return render(request, 'quizzes/adaptive_quiz.html', {'quiz': quiz})
+
+
+def _adaptive_question(question_id):
+    """Return the rendered question the adaptive page shows next."""
+    question = Question.objects.filter(pk=question_id).select_related(
+        'quiz').rendered()[0]
+    return {
+        'id': question.pk,
+        'text': question.text_html,
+        'options': [question.option_a_html, question.option_b_html,
+                    question.option_c_html, question.option_d_html],
+    }
+
 
+def adaptive_next(request, slug):
+    """
+    Grade an adaptive answer and return the next question as JSON.
+
+    GET returns the question awaiting an answer, starting a session if
+    needed. POST takes {"question": id, "answer": letter} for that
+    question and returns whether it was right, the updated ability
+    estimate and the next question, or none once the session is done.
+    """
+    quiz = get_object_or_404(Quiz, slug=slug)
+    session = AdaptiveSession(request.session, quiz)
+    data = {}
+
+    if request.method == 'POST':
+        try:
+            payload = json.loads(request.body)
+            question_id = int(payload['question'])
+            answer = payload['answer']
+        except (ValueError, TypeError, KeyError):
+            return JsonResponse({'error': 'Invalid request body'}, status=400)
+        if not isinstance(answer, str):
+            return JsonResponse({'error': 'Invalid request body'}, status=400)
+        if question_id != session.pending or answer not in VALID_ANSWERS:
+            return JsonResponse(
+                {'error': 'This question is not awaiting an answer'},
+                status=409)
+        try:
+            correct, correct_answer = session.answer(answer)
+        except ValueError:
+            return JsonResponse({'error': 'This quiz has changed'}, status=409)
+        if request.user.is_authenticated:
+            run_in_background(
+                record_answers, request.user.pk, {question_id: correct},
+                timezone.now())
+        explanation = Question.objects.filter(pk=question_id).values_list(
+            'explanation_html', flat=True).first()
+        data['result'] = {
+            'question': question_id,
+            'correct': correct,
+            'correct_answer': correct_answer,
+            'explanation': explanation or '',
+        }
+    elif request.method != 'GET':
+        return JsonResponse({'error': 'GET or POST required'}, status=405)
+
+    next_id = session.next_question()
+    data.update(
+        session.summary(),
+        question=_adaptive_question(next_id) if next_id else None,
+    )
+    return JsonResponse(data)
+
+
+def quiz_grade(request, slug):
+    """
+    Grade answers posted as JSON and return per-question correctness.
+
+    The body holds the revision the answers were given against and one
+    letter per question in document order, e.g. {"revision": "...",
+    "answers": "AC-B"}. Answers for an older revision are refused with
+    409 so a quiz edited mid-attempt is never graded with the new key.
+    """
     if request.method != 'POST':
-        return redirect('quizzes:detail', slug=slug)
+        return JsonResponse({'error': 'POST required'}, status=405)
 
-    questions = quiz.questions.all()
-    results = []
-    correct_count = 0
-    answers_dict = {}
+    quiz = get_object_or_404(Quiz, slug=slug)
+    try:
+        payload = json.loads(request.body)
+        revision = payload['revision']
+        answers = payload['answers']
+    except (ValueError, TypeError, KeyError):
+        return JsonResponse({'error': 'Invalid request body'}, status=400)
+    if not isinstance(answers, str):
+        return JsonResponse({'error': 'Invalid request body'}, status=400)
+    if revision != quiz.revision:
+        return JsonResponse(
+            {'error': 'This quiz has changed', 'revision': quiz.revision},
+            status=409)
+
+    answer_key = get_answer_key(quiz)
+    count = len(answer_key.question_ids)
+    answer_string = ''.join(
+        char if char in VALID_ANSWERS else UNANSWERED
+        for char in answers[:count].ljust(count, UNANSWERED)
+    )
+    graded = grade_answers(answer_key.letters, answer_string)
+    correct_count = sum(graded)
+
+    data = {
+        'correct': graded,
+        'score': correct_count,
+        'total': len(graded),
+    }
+    if request.user.is_authenticated:
+        attempt = _record_attempt(
+            request, quiz, answer_key, answer_string, correct_count)
+        data['attempt_url'] = reverse(
+            'accounts:attempt_detail', args=[attempt.pk])
+    return JsonResponse(data)
 
-    for question in questions:
-        user_answer = request.POST.get(f'question_{question.id}', '')
-        is_correct = user_answer == question.correct_answer
-        if is_correct:
-            correct_count += 1
 
-        # Store answer for QuizAttempt
-        answers_dict[str(question.id)] = user_answer
+def quiz_submit(request, slug):
+    """Handle quiz submission and show results."""
+    quiz = get_object_or_404(Quiz, slug=slug)
 
-        results.append({
-            'question': question,
-            'user_answer': user_answer,
-            'is_correct': is_correct,
-        })
+    if request.method != 'POST':
+        return redirect('quizzes:detail', slug=slug)
+
+    answer_key = get_answer_key(quiz)
+    answer_string = encode_answers(answer_key.question_ids, {
+        question_id: request.POST.get(f'question_{question_id}', '')
+        for question_id in answer_key.question_ids
+    })
+    graded = grade_answers(answer_key.letters, answer_string)
+    correct_count = sum(graded)
+    total_questions = len(graded)
 
     score_percentage = (
         correct_count /
-        len(questions) *
-        100) if questions else 0
+        total_questions *
+        100) if total_questions else 0
 
     # Save quiz attempt for logged-in users
     if request.user.is_authenticated:
-        QuizAttempt.objects.create(
-            quiz=quiz,
-            user=request.user,
-            score=correct_count,
-            total_questions=len(questions),
-            answers=answers_dict,
-            completed_at=timezone.now(),
-        )
+        _record_attempt(
+            request, quiz, answer_key, answer_string, correct_count)
 
-        # Notify quiz creator (if not self)
-        if quiz.creator and quiz.creator != request.user:
-            Notification.objects.create(
-                recipient=quiz.creator,
-                notification_type=Notification.NotificationType.QUIZ_COMPLETED,
-                message=f'{
-                    request.user.username} completed your quiz "{
-                    quiz.title}" with a score of {
-                    round(score_percentage)}%',
-                related_quiz=quiz,
-            )
+    # Full questions are only loaded to display the results
+    answers = decode_answers(answer_key.question_ids, answer_string)
+    results = [
+        {
+            'question': question,
+            'user_answer': answers.get(question.id, ''),
+            'is_correct': answers.get(question.id) == question.correct_answer,
+        }
+        for question in quiz.questions.rendered()
+    ]
 
     context = {
         'quiz': quiz,
         'results': results,
         'correct_count': correct_count,
-        'total_questions': len(questions),
+        'total_questions': total_questions,
         'score_percentage': round(score_percentage),
+        'related_quizzes': _related_quizzes(quiz),
     }
     return render(request, 'quizzes/quiz_results.html', context)
 
@@ -204,14 +581,15 @@ def quiz_create(request):
             question_formset = QuestionFormSet(request.POST, instance=quiz)
 
             if question_formset.is_valid():
-                questions = question_formset.save(commit=False)
-                for i, question in enumerate(questions):
-                    question.order = i + 1
-                    question.save()
+                with transaction.atomic():
+                    questions = question_formset.save(commit=False)
+                    for i, question in enumerate(questions):
+                        question.order = i + 1
+                        question.save()
 
-                # Delete any marked for deletion
-                for obj in question_formset.deleted_objects:
-                    obj.delete()
+                    # Delete any marked for deletion
+                    for obj in question_formset.deleted_objects:
+                        obj.delete()
 
                 messages.success(
                     request, f'Quiz "{
@@ -235,6 +613,57 @@ def quiz_create(request):
     return render(request, 'quizzes/quiz_create.html', context)
 
 
+@login_required
+def quiz_export(request, slug):
+    """Stream every attempt at one of the user's quizzes as CSV or NDJSON."""
+    quiz = get_object_or_404(Quiz, slug=slug)
+
+    if quiz.creator != request.user:
+        messages.error(
+            request, 'You can only export results of your own quizzes.')
+        return redirect('quizzes:detail', slug=slug)
+
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        export_format = 'csv'
+    response = StreamingHttpResponse(
+        EXPORT_WRITERS[export_format](quiz),
+        content_type=EXPORT_FORMATS[export_format])
+    response['Content-Disposition'] = (
+        f'attachment; filename="{quiz.slug}-attempts.{export_format}"')
+    return response
+
+
+@login_required
+def quiz_import(request):
+    """Import quizzes from an uploaded NDJSON or GIFT file."""
+    if request.method == 'POST':
+        form = QuizImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            upload = form.cleaned_data['file']
+            lines = io.TextIOWrapper(
+                upload.file, encoding='utf-8-sig', errors='replace')
+            result = import_quizzes(
+                lines, form.cleaned_data['file_format'],
+                creator=request.user)
+            if result.questions:
+                messages.success(
+                    request,
+                    f'Imported {result.questions} questions in '
+                    f'{result.quizzes} quizzes.')
+            if result.error_count:
+                messages.warning(
+                    request,
+                    f'Skipped {result.error_count} invalid records: '
+                    f'{"; ".join(result.errors[:5])}')
+            if result.questions:
+                return redirect('accounts:my_quizzes')
+    else:
+        form = QuizImportForm()
+
+    return render(request, 'quizzes/quiz_import.html', {'form': form})
+
+
 @login_required
 def quiz_edit(request, slug):
     """Edit an existing quiz."""
@@ -250,15 +679,16 @@ def quiz_edit(request, slug):
         question_formset = QuestionFormSet(request.POST, instance=quiz)
 
         if quiz_form.is_valid() and question_formset.is_valid():
-            quiz_form.save()
+            with transaction.atomic():
+                quiz_form.save()
 
-            questions = question_formset.save(commit=False)
-            for i, question in enumerate(questions):
-                question.order = i + 1
-                question.save()
+                questions = question_formset.save(commit=False)
+                for i, question in enumerate(questions):
+                    question.order = i + 1
+                    question.save()
 
-            for obj in question_formset.deleted_objects:
-                obj.delete()
+                for obj in question_formset.deleted_objects:
+                    obj.delete()
 
             messages.success(
                 request, f'Quiz "{
@@ -0,0 +1,26 @@
+/**
+ * Admin Autocomplete Filter
+ * Applies the changelist filter when an object is picked in (or cleared
+ * from) an autocomplete box in the filter sidebar
+ */
+/* jshint esversion: 11 */
+/* global django */
+
+'use strict';
+{
+    const $ = django.jQuery;
+
+    $(document).on('change', 'select.autocomplete-filter', function() {
+        const params = new URLSearchParams(window.location.search);
+        const parameterName = this.dataset.parameterName;
+
+        if (this.value) {
+            params.set(parameterName, this.value);
+        } else {
+            params.delete(parameterName);
+        }
+        // Start again from the first page of the filtered list
+        params.delete('p');
+        window.location.search = params.toString();
+    });
+}
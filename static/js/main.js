@@ -2,7 +2,7 @@
  * Code Mastery - Main JavaScript
 */
 /* jshint esversion: 11 */
-/* global bootstrap */
+/* global bootstrap, ensureCsrfToken */
 
 (function() {
     "use strict";
@@ -293,4 +293,126 @@
         });
     }
 
+
+    /**
+     * Live notifications
+     * Keeps the bell badge, and the notifications page when open, up to
+     * date from the server-sent event stream
+     */
+    const notificationNav = select('#navmenu[data-notification-stream]');
+    if (notificationNav && window.EventSource) {
+        const NOTIFICATION_ICONS = {
+            quiz_completed: 'fa-trophy text-success',
+            quiz_saved: 'fa-bookmark text-orange'
+        };
+
+        const updateUnreadCount = count => {
+            select('.notification-bell', true).forEach(bell => {
+                const icon = bell.querySelector('.fa-bell');
+                icon.classList.toggle('fa-solid', count > 0);
+                icon.classList.toggle('fa-regular', count === 0);
+                let badge = bell.querySelector('.notification-badge');
+                if (count > 0) {
+                    if (!badge) {
+                        badge = document.createElement('span');
+                        badge.className = 'notification-badge';
+                        bell.appendChild(badge);
+                    }
+                    badge.textContent = count;
+                } else if (badge) {
+                    badge.remove();
+                }
+            });
+            const summary = select('#notifications-summary');
+            if (summary) {
+                summary.textContent = count > 0 ?
+                    `You have ${count} unread notification${count === 1 ? '' : 's'}` :
+                    'All caught up!';
+            }
+        };
+
+        const addNotification = notification => {
+            const page = select('#notifications-page');
+            if (!page || page.querySelector(`[data-notification-id="${notification.id}"]`)) return;
+            let list = page.querySelector('.notifications-list');
+            if (!list) {
+                list = document.createElement('div');
+                list.className = 'notifications-list';
+                page.querySelector('.notifications-empty')?.replaceWith(list);
+            }
+
+            const item = document.createElement('div');
+            item.className = 'notification-item card mb-3 unread';
+            item.dataset.notificationId = notification.id;
+            const iconClass = NOTIFICATION_ICONS[notification.type] || 'fa-circle-info text-info';
+            item.innerHTML = `
+                <div class="card-body d-flex align-items-start">
+                    <div class="notification-icon me-3">
+                        <i class="fa-solid ${iconClass}"></i>
+                    </div>
+                    <div class="notification-content flex-grow-1">
+                        <p class="mb-1"></p>
+                        <small class="text-muted">
+                            <i class="fa-regular fa-clock me-1"></i>just now
+                        </small>
+                    </div>
+                    <div class="notification-actions ms-2 d-flex flex-nowrap gap-1">
+                        <form method="post" class="d-inline live-mark-read">
+                            <button type="submit" class="btn btn-sm btn-outline-success" title="Mark as read">
+                                <i class="fa-solid fa-check"></i>
+                            </button>
+                        </form>
+                    </div>
+                </div>
+            `;
+            // The message is user-generated, so it is set as text
+            item.querySelector('.notification-content p').textContent = notification.message;
+            const form = item.querySelector('form');
+            form.action = notification.mark_read_url;
+            if (notification.quiz_url) {
+                const link = document.createElement('a');
+                link.href = notification.quiz_url;
+                link.className = 'btn btn-sm btn-outline-light';
+                link.title = 'View Quiz';
+                link.innerHTML = '<i class="fa-solid fa-eye"></i>';
+                form.before(link);
+            }
+            form.addEventListener('submit', async event => {
+                event.preventDefault();
+                await ensureCsrfToken(form);
+                form.submit();
+            });
+            list.prepend(item);
+        };
+
+        const stream = new EventSource(notificationNav.dataset.notificationStream);
+        stream.addEventListener('unread', event => {
+            updateUnreadCount(JSON.parse(event.data).count);
+        });
+        stream.addEventListener('notification', event => {
+            addNotification(JSON.parse(event.data));
+        });
+    }
 })();
+
+/**
+ * Make sure a form carries a CSRF token before it is posted.
+ * Anonymous pages are cached for every visitor and rendered without one,
+ * so a token is fetched and added as the usual hidden input.
+ */
+async function ensureCsrfToken(form) {
+    let input = form.querySelector('[name="csrfmiddlewaretoken"]');
+    if (!input) {
+        const response = await fetch('/csrf/', { credentials: 'same-origin' });
+        if (!response.ok) {
+            throw new Error(`CSRF token request failed: ${response.status}`);
+        }
+        const data = await response.json();
+        input = document.createElement('input');
+        input.type = 'hidden';
+        input.name = 'csrfmiddlewaretoken';
+        input.value = data.token;
+        form.appendChild(input);
+    }
+    return input.value;
+}
@@ -0,0 +1,124 @@
+/**
+ * Adaptive Quiz Page JavaScript
+ * Shows one question at a time from the adaptive endpoint, which grades
+ * each answer and picks the next question for the learner's level
+ */
+/* jshint esversion: 11 */
+/* global ensureCsrfToken */
+
+const ADAPTIVE_LETTERS = ['A', 'B', 'C', 'D'];
+
+document.addEventListener('DOMContentLoaded', function() {
+    const form = document.getElementById('adaptive-form');
+    if (!form) return;
+
+    const submitBtn = form.querySelector('.quiz-submit-btn');
+    let current = null;
+
+    async function request(options) {
+        const response = await fetch(form.dataset.nextUrl, {
+            credentials: 'same-origin',
+            ...options
+        });
+        if (!response.ok) {
+            throw new Error(`Adaptive request failed: ${response.status}`);
+        }
+        return response.json();
+    }
+
+    function show(data) {
+        document.getElementById('adaptive-max').textContent = data.max_questions;
+        document.getElementById('adaptive-count').textContent =
+            Math.min(data.answered + 1, data.max_questions);
+        if (data.answered) {
+            document.getElementById('adaptive-level').textContent =
+                `top ${Math.max(100 - data.percentile, 1)}%`;
+        }
+
+        current = data.question;
+        if (!current) {
+            form.querySelector('#adaptive-question').innerHTML = '';
+            submitBtn.remove();
+            document.getElementById('summary-correct').textContent = data.correct;
+            document.getElementById('summary-answered').textContent = data.answered;
+            document.getElementById('summary-percentile').textContent = data.percentile;
+            document.getElementById('adaptive-summary').classList.remove('d-none');
+            return;
+        }
+
+        // Question and option HTML is pre-rendered and escaped on the server
+        const options = current.options.map((optionHtml, i) => {
+            const letter = ADAPTIVE_LETTERS[i];
+            const inputId = `q${current.id}_${letter.toLowerCase()}`;
+            return `
+                <div class="form-check option-item mb-3">
+                    <input class="form-check-input" type="radio"
+                           name="answer" id="${inputId}" value="${letter}">
+                    <label class="form-check-label" for="${inputId}">
+                        <span class="option-letter">${letter}</span>
+                        ${optionHtml}
+                    </label>
+                </div>
+            `;
+        }).join('');
+        document.getElementById('adaptive-question').innerHTML = `
+            <div class="card mb-4 question-card">
+                <div class="card-body">
+                    <p class="question-text mb-4">${current.text}</p>
+                    <div class="options">${options}</div>
+                </div>
+            </div>
+        `;
+        submitBtn.disabled = false;
+    }
+
+    function showFeedback(result) {
+        const feedback = document.getElementById('adaptive-feedback');
+        const type = result.correct ? 'success' : 'danger';
+        const heading = result.correct ?
+            '<i class="fas fa-check me-2"></i>Correct!' :
+            `<i class="fas fa-times me-2"></i>Not quite - the answer was ${result.correct_answer}.`;
+        feedback.innerHTML = `
+            <div class="alert alert-${type}" role="status">
+                <strong>${heading}</strong>
+                ${result.explanation ? `<div class="mt-2">${result.explanation}</div>` : ''}
+            </div>
+        `;
+    }
+
+    form.addEventListener('submit', async event => {
+        event.preventDefault();
+        const checked = form.querySelector('input[name="answer"]:checked');
+        if (!current || !checked) return;
+
+        submitBtn.disabled = true;
+        try {
+            const csrfToken = await ensureCsrfToken(form);
+            const data = await request({
+                method: 'POST',
+                headers: {
+                    'X-CSRFToken': csrfToken,
+                    'X-Requested-With': 'XMLHttpRequest',
+                    'Content-Type': 'application/json'
+                },
+                body: JSON.stringify({ question: current.id, answer: checked.value })
+            });
+            showFeedback(data.result);
+            show(data);
+        } catch (error) {
+            console.error('Adaptive answer error:', error);
+            // The session may have moved on in another tab; resync
+            show(await request({ method: 'GET' }));
+        }
+    });
+
+    request({ method: 'GET' }).then(show).catch(error => {
+        console.error('Adaptive load error:', error);
+        document.getElementById('adaptive-question').innerHTML = `
+            <div class="alert alert-danger" role="alert">
+                <i class="fas fa-exclamation-triangle me-2"></i>
+                Could not load the next question. Please refresh the page.
+            </div>
+        `;
+    });
+});
@@ -3,6 +3,7 @@
  * Handles the quiz generator form, loading modal, and random topic generation
  */
 /* jshint esversion: 11 */
+/* global ensureCsrfToken */
 
 document.addEventListener('DOMContentLoaded', function() {
     const form = document.getElementById('quiz-generator-form');
@@ -129,8 +130,7 @@ document.addEventListener('DOMContentLoaded', function() {
         isSubmitting = true;
         loadingModal.classList.add('active');
         
-        // Disable visible form elements after a tiny delay to allow form submission
-        setTimeout(function() {
+        const disableForm = function() {
             // Disable only visible inputs and buttons (not hidden CSRF token)
             form.querySelectorAll('input[type="text"], button').forEach(el => {
                 el.disabled = true;
@@ -141,6 +141,40 @@ document.addEventListener('DOMContentLoaded', function() {
             if (externalBtn) {
                 externalBtn.disabled = true;
             }
-        }, 10);
+        };
+        
+        // The cached homepage has no CSRF token; fetch one, then post
+        if (!form.querySelector('[name="csrfmiddlewaretoken"]')) {
+            e.preventDefault();
+            ensureCsrfToken(form).then(function() {
+                form.submit();
+                disableForm();
+            }).catch(function(error) {
+                console.error('CSRF token error:', error);
+                isSubmitting = false;
+                loadingModal.classList.remove('active');
+            });
+            return false;
+        }
+        
+        // Disable visible form elements after a tiny delay to allow form submission
+        setTimeout(disableForm, 10);
+    });
+});
+
+/**
+ * Saved Quiz Indicators
+ * Homepage cards are cached for every visitor, so the current user's
+ * saved state is applied here from the ids embedded in the page.
+ */
+document.addEventListener('DOMContentLoaded', function() {
+    const savedIdsScript = document.getElementById('saved-quiz-ids');
+    if (!savedIdsScript) return;
+
+    const savedIds = new Set(JSON.parse(savedIdsScript.textContent));
+    document.querySelectorAll('[data-saved-quiz]').forEach(function(icon) {
+        if (savedIds.has(Number(icon.dataset.savedQuiz))) {
+            icon.classList.remove('d-none');
+        }
     });
 });
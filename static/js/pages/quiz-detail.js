@@ -1,110 +1,20 @@
 /**
  * Quiz Detail Page JavaScript
- * Handles form validation and unanswered question highlighting
+ * Renders questions from the quiz document, validates answers and grades
+ * them through the JSON grading endpoint
  */
 /* jshint esversion: 11 */
+/* global ensureCsrfToken */
+
+const OPTION_LETTERS = ['A', 'B', 'C', 'D'];
+const UNANSWERED = '-';
 
 document.addEventListener('DOMContentLoaded', function() {
     const quizForm = document.getElementById('quiz-form');
     
     if (!quizForm) return;
     
-    quizForm.addEventListener('submit', function(e) {
-        // Get all question cards
-        const questionCards = document.querySelectorAll('.question-card');
-        let firstUnanswered = null;
-        let unansweredCount = 0;
-        
-        // Clear previous unanswered highlights
-        questionCards.forEach(card => {
-            card.classList.remove('unanswered');
-        });
-        
-        // Check each question for an answer
-        questionCards.forEach((card) => {
-            const radioButtons = card.querySelectorAll('input[type="radio"]');
-            const isAnswered = Array.from(radioButtons).some(radio => radio.checked);
-            
-            if (!isAnswered) {
-                unansweredCount++;
-                card.classList.add('unanswered');
-                
-                // Track first unanswered question
-                if (!firstUnanswered) {
-                    firstUnanswered = card;
-                }
-            }
-        });
-        
-        // If there are unanswered questions, prevent submission
-        if (unansweredCount > 0) {
-            e.preventDefault();
-            
-            // Show alert message
-            const message = unansweredCount === 1 ?
-                'Please answer the highlighted question before submitting.' :
-                `Please answer all ${unansweredCount} highlighted questions before submitting.`;
-            
-            // Remove existing alert if any
-            const existingAlert = document.querySelector('.quiz-validation-alert');
-            if (existingAlert) {
-                existingAlert.remove();
-            }
-            
-            // Create and show alert
-            const alertDiv = document.createElement('div');
-            alertDiv.className = 'alert alert-warning alert-dismissible fade show quiz-validation-alert';
-            alertDiv.setAttribute('role', 'alert');
-            alertDiv.innerHTML = `
-                <i class="fas fa-exclamation-triangle me-2"></i>
-                ${message}
-                <button type="button" class="btn-close" data-bs-dismiss="alert" aria-label="Close"></button>
-            `;
-            
-            // Insert alert before the form
-            quizForm.parentNode.insertBefore(alertDiv, quizForm);
-            
-            // Scroll to first unanswered question with offset for header
-            if (firstUnanswered) {
-                const headerOffset = 100;
-                const elementPosition = firstUnanswered.getBoundingClientRect().top;
-                const offsetPosition = elementPosition + window.pageYOffset - headerOffset;
-                
-                window.scrollTo({
-                    top: offsetPosition,
-                    behavior: 'smooth'
-                });
-                
-                // Add a pulse animation to draw attention
-                firstUnanswered.classList.add('unanswered-pulse');
-                setTimeout(() => {
-                    firstUnanswered.classList.remove('unanswered-pulse');
-                }, 1500);
-            }
-            
-            return false;
-        }
-    });
-    
-    // Remove unanswered highlight when user answers a question
-    document.querySelectorAll('.question-card input[type="radio"]').forEach(radio => {
-        radio.addEventListener('change', function() {
-            const card = this.closest('.question-card');
-            if (card) {
-                card.classList.remove('unanswered');
-                card.classList.remove('unanswered-pulse');
-                
-                // Check if all questions are now answered to remove the alert
-                const unansweredCards = document.querySelectorAll('.question-card.unanswered');
-                if (unansweredCards.length === 0) {
-                    const alert = document.querySelector('.quiz-validation-alert');
-                    if (alert) {
-                        alert.remove();
-                    }
-                }
-            }
-        });
-    });
+    initQuiz(quizForm);
 
     // Share button functionality
     const shareBtn = document.querySelector('.share-btn');
@@ -148,6 +58,283 @@ document.addEventListener('DOMContentLoaded', function() {
     }
 });
 
+/**
+ * Load the quiz document, render its questions and wire up grading
+ */
+async function initQuiz(quizForm) {
+    const container = document.getElementById('quiz-questions');
+    const submitBtn = quizForm.querySelector('.quiz-submit-btn');
+    let quizDocument;
+    
+    try {
+        const response = await fetch(quizForm.dataset.documentUrl, {
+            headers: { 'Accept': 'application/json' }
+        });
+        if (!response.ok) {
+            throw new Error(`Quiz document request failed: ${response.status}`);
+        }
+        quizDocument = await response.json();
+    } catch (error) {
+        console.error('Quiz load error:', error);
+        container.innerHTML = `
+            <div class="alert alert-danger" role="alert">
+                <i class="fas fa-exclamation-circle me-2"></i>
+                Failed to load the questions. <a href="" class="alert-link">Reload the page</a> to try again.
+            </div>
+        `;
+        return;
+    }
+    
+    renderQuestions(container, quizDocument.questions);
+    submitBtn.disabled = false;
+    
+    // Remove unanswered highlight when user answers a question
+    quizForm.addEventListener('change', function(e) {
+        const card = e.target.closest('.question-card');
+        if (card) {
+            card.classList.remove('unanswered');
+            card.classList.remove('unanswered-pulse');
+            
+            // Check if all questions are now answered to remove the alert
+            const unansweredCards = document.querySelectorAll('.question-card.unanswered');
+            if (unansweredCards.length === 0) {
+                const alert = document.querySelector('.quiz-validation-alert');
+                if (alert) {
+                    alert.remove();
+                }
+            }
+        }
+    });
+    
+    quizForm.addEventListener('submit', function(e) {
+        e.preventDefault();
+        if (validateAnswers(quizForm)) {
+            gradeQuiz(quizForm, quizDocument, submitBtn);
+        }
+    });
+}
+
+/**
+ * Build the question cards from the quiz document
+ */
+function renderQuestions(container, questions) {
+    container.innerHTML = '';
+    
+    questions.forEach((question, index) => {
+        // Question and option HTML is pre-rendered and escaped on the server
+        const options = question.options.map((optionHtml, i) => {
+            const letter = OPTION_LETTERS[i];
+            const inputId = `q${question.id}_${letter.toLowerCase()}`;
+            return `
+                <div class="form-check option-item mb-3">
+                    <input class="form-check-input" type="radio"
+                           name="question_${question.id}"
+                           id="${inputId}"
+                           value="${letter}">
+                    <label class="form-check-label" for="${inputId}">
+                        <span class="option-letter">${letter}</span>
+                        ${optionHtml}
+                    </label>
+                </div>
+            `;
+        }).join('');
+        
+        const card = document.createElement('div');
+        card.className = 'card mb-4 question-card';
+        card.dataset.question = index + 1;
+        card.innerHTML = `
+            <div class="card-header d-flex justify-content-between align-items-center">
+                <span class="question-number">Question ${index + 1}</span>
+            </div>
+            <div class="card-body">
+                <p class="question-text mb-4">${question.text}</p>
+                <div class="options">${options}</div>
+            </div>
+        `;
+        container.appendChild(card);
+    });
+}
+
+/**
+ * Highlight unanswered questions, returning true when all are answered
+ */
+function validateAnswers(quizForm) {
+    // Get all question cards
+    const questionCards = document.querySelectorAll('.question-card');
+    let firstUnanswered = null;
+    let unansweredCount = 0;
+    
+    // Clear previous unanswered highlights
+    questionCards.forEach(card => {
+        card.classList.remove('unanswered');
+    });
+    
+    // Check each question for an answer
+    questionCards.forEach((card) => {
+        const radioButtons = card.querySelectorAll('input[type="radio"]');
+        const isAnswered = Array.from(radioButtons).some(radio => radio.checked);
+        
+        if (!isAnswered) {
+            unansweredCount++;
+            card.classList.add('unanswered');
+            
+            // Track first unanswered question
+            if (!firstUnanswered) {
+                firstUnanswered = card;
+            }
+        }
+    });
+    
+    if (unansweredCount === 0) {
+        return true;
+    }
+    
+    const message = unansweredCount === 1 ?
+        'Please answer the highlighted question before submitting.' :
+        `Please answer all ${unansweredCount} highlighted questions before submitting.`;
+    showQuizAlert(quizForm, 'warning', message);
+    
+    // Scroll to first unanswered question with offset for header
+    scrollToElement(firstUnanswered);
+    
+    // Add a pulse animation to draw attention
+    firstUnanswered.classList.add('unanswered-pulse');
+    setTimeout(() => {
+        firstUnanswered.classList.remove('unanswered-pulse');
+    }, 1500);
+    
+    return false;
+}
+
+/**
+ * Post the answers to the grading endpoint and show the results
+ */
+async function gradeQuiz(quizForm, quizDocument, submitBtn) {
+    // One letter per question, in document order
+    const answers = Array.from(document.querySelectorAll('.question-card')).map(card => {
+        const checked = card.querySelector('input[type="radio"]:checked');
+        return checked ? checked.value : UNANSWERED;
+    }).join('');
+    submitBtn.disabled = true;
+    
+    let response;
+    try {
+        const csrfToken = await ensureCsrfToken(quizForm);
+        response = await fetch(quizForm.dataset.gradeUrl, {
+            method: 'POST',
+            headers: {
+                'X-CSRFToken': csrfToken,
+                'X-Requested-With': 'XMLHttpRequest',
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({ revision: quizDocument.revision, answers: answers })
+        });
+    } catch (error) {
+        // Network failure - fall back to the regular form submission
+        console.error('Quiz grade error:', error);
+        quizForm.submit();
+        return;
+    }
+    
+    if (response.status === 409) {
+        showQuizAlert(quizForm, 'warning',
+            'This quiz was updated while you were taking it. ' +
+            '<a href="" class="alert-link">Reload the page</a> to get the latest version.');
+        submitBtn.disabled = false;
+        return;
+    }
+    if (!response.ok) {
+        showQuizAlert(quizForm, 'danger', 'Failed to submit the quiz. Please try again.');
+        submitBtn.disabled = false;
+        return;
+    }
+    
+    showResults(quizForm, await response.json(), submitBtn);
+}
+
+/**
+ * Mark each question correct or incorrect and show the score
+ */
+function showResults(quizForm, result, submitBtn) {
+    document.querySelectorAll('.question-card').forEach((card, index) => {
+        const isCorrect = result.correct[index];
+        card.classList.add(isCorrect ? 'answer-correct' : 'answer-incorrect');
+        card.querySelectorAll('input[type="radio"]').forEach(radio => {
+            radio.disabled = true;
+        });
+        
+        const badge = document.createElement('span');
+        badge.className = `badge ${isCorrect ? 'bg-success' : 'bg-danger'}`;
+        badge.innerHTML = isCorrect ?
+            '<i class="fas fa-check me-1"></i>Correct' :
+            '<i class="fas fa-times me-1"></i>Incorrect';
+        card.querySelector('.card-header').appendChild(badge);
+    });
+    
+    const percentage = result.total ? Math.round(result.score / result.total * 100) : 0;
+    const reviewLink = result.attempt_url ?
+        `<a href="${result.attempt_url}" class="btn btn-sm btn-outline-light">Review answers</a>` : '';
+    
+    const summary = document.createElement('div');
+    summary.className = 'alert quiz-score-summary d-flex flex-wrap justify-content-between align-items-center gap-2';
+    summary.setAttribute('role', 'status');
+    summary.innerHTML = `
+        <span>
+            <i class="fas fa-trophy me-2"></i>
+            You scored <strong>${result.score}/${result.total}</strong> (${percentage}%)
+        </span>
+        <span class="d-flex gap-2">
+            ${reviewLink}
+            <a href="" class="btn btn-sm btn-primary">Try again</a>
+        </span>
+    `;
+    
+    const existingAlert = document.querySelector('.quiz-validation-alert');
+    if (existingAlert) {
+        existingAlert.remove();
+    }
+    submitBtn.remove();
+    quizForm.parentNode.insertBefore(summary, quizForm);
+    scrollToElement(summary);
+}
+
+/**
+ * Show a dismissible alert above the quiz form
+ */
+function showQuizAlert(quizForm, type, message) {
+    // Remove existing alert if any
+    const existingAlert = document.querySelector('.quiz-validation-alert');
+    if (existingAlert) {
+        existingAlert.remove();
+    }
+    
+    const alertDiv = document.createElement('div');
+    alertDiv.className = `alert alert-${type} alert-dismissible fade show quiz-validation-alert`;
+    alertDiv.setAttribute('role', 'alert');
+    alertDiv.innerHTML = `
+        <i class="fas fa-exclamation-triangle me-2"></i>
+        ${message}
+        <button type="button" class="btn-close" data-bs-dismiss="alert" aria-label="Close"></button>
+    `;
+    
+    // Insert alert before the form
+    quizForm.parentNode.insertBefore(alertDiv, quizForm);
+}
+
+/**
+ * Scroll an element into view below the fixed header
+ */
+function scrollToElement(element) {
+    const headerOffset = 100;
+    const elementPosition = element.getBoundingClientRect().top;
+    const offsetPosition = elementPosition + window.pageYOffset - headerOffset;
+    
+    window.scrollTo({
+        top: offsetPosition,
+        behavior: 'smooth'
+    });
+}
+
 /**
  * Show a toast notification for share/save feedback
  */
@@ -195,10 +382,13 @@ function initSaveQuizButtons() {
             
             const quizId = this.dataset.quizId;
             const csrfToken = this.dataset.csrfToken;
+            // PUT and DELETE are idempotent, so repeated clicks are safe
+            const method = this.dataset.saved === 'true' ? 'DELETE' : 'PUT';
+            this.disabled = true;
             
             try {
                 const response = await fetch(`/accounts/quiz/${quizId}/save/`, {
-                    method: 'POST',
+                    method: method,
                     headers: {
                         'X-CSRFToken': csrfToken,
                         'X-Requested-With': 'XMLHttpRequest',
@@ -244,6 +434,8 @@ function initSaveQuizButtons() {
             } catch (error) {
                 console.error('Save quiz error:', error);
                 showToast('An error occurred. Please try again.', 'error');
+            } finally {
+                this.disabled = false;
             }
         });
     });
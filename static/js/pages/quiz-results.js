@@ -56,10 +56,13 @@ document.addEventListener('DOMContentLoaded', function() {
             
             const quizId = this.dataset.quizId;
             const csrfToken = this.dataset.csrfToken;
+            // PUT and DELETE are idempotent, so repeated clicks are safe
+            const method = this.dataset.saved === 'true' ? 'DELETE' : 'PUT';
+            this.disabled = true;
             
             try {
                 const response = await fetch(`/accounts/quiz/${quizId}/save/`, {
-                    method: 'POST',
+                    method: method,
                     headers: {
                         'X-CSRFToken': csrfToken,
                         'X-Requested-With': 'XMLHttpRequest',
@@ -104,6 +107,8 @@ document.addEventListener('DOMContentLoaded', function() {
             } catch (error) {
                 console.error('Save quiz error:', error);
                 showToast('An error occurred. Please try again.', 'error');
+            } finally {
+                this.disabled = false;
             }
         });
     });